@@ -0,0 +1,158 @@
+import numpy as np
+
+# Stat columns used for team scoring, in matrix column order
+STAT_FIELDS = ('hp', 'attack', 'defense', 'movement_speed')
+HP, ATTACK, DEFENSE, MOVEMENT_SPEED = range(len(STAT_FIELDS))
+
+TEAM_SIZE = 5
+
+# Weights of the overall team score (they sum to 1)
+STATS_WEIGHT = 0.6
+ROLE_COVERAGE_WEIGHT = 0.25
+SPECIALTY_DIVERSITY_WEIGHT = 0.15
+
+# Bonus for a counter candidate that fills a role the team is missing
+MISSING_ROLE_BONUS = 0.25
+
+class StatMatrix:
+    """
+    The hero catalog as column arrays for vectorized scoring.
+
+    Rows are heroes; `stats` holds the raw STAT_FIELDS values and
+    `normalized` the same values min-max scaled to 0..1 across the
+    catalog. Missing stats count as 0.
+    """
+
+    def __init__(self, rows):
+        self.ids = np.array([row['idHEROES'] for row in rows], dtype=np.int64)
+        self.names = [row['hero_name'] for row in rows]
+        self.role_ids = np.array([row.get('role_id') or 0 for row in rows], dtype=np.int64)
+        self.role_names = [row.get('role_name') for row in rows]
+        self.specialty_ids = np.array([row.get('specialty_id') or 0 for row in rows], dtype=np.int64)
+
+        stats = np.array(
+            [[row.get(field) for field in STAT_FIELDS] for row in rows],
+            dtype=np.float64
+        ).reshape(len(rows), len(STAT_FIELDS))
+        self.stats = np.nan_to_num(stats)
+
+        low = self.stats.min(axis=0, initial=0)
+        span = self.stats.max(axis=0, initial=0) - low
+        span[span == 0] = 1
+        self.normalized = (self.stats - low) / span
+
+        self._positions = {int(hero_id): i for i, hero_id in enumerate(self.ids)}
+
+    def positions(self, hero_ids):
+        """
+        Maps hero IDs to matrix rows.
+
+        Returns:
+            Tuple of (row index array, list of unknown hero IDs)
+        """
+        missing = [hero_id for hero_id in hero_ids if hero_id not in self._positions]
+        index = np.array([self._positions[hero_id] for hero_id in hero_ids if hero_id in self._positions], dtype=np.int64)
+        return index, missing
+
+def score_team(matrix, index):
+    """
+    Scores one lineup.
+
+    Args:
+        matrix: StatMatrix of the catalog
+        index: Row indexes of the lineup's heroes
+
+    Returns:
+        Dictionary with stat totals, normalized stat means, role coverage,
+        specialty diversity and the overall score (0-100)
+    """
+    roles = matrix.role_ids[index]
+    specialties = matrix.specialty_ids[index]
+
+    normalized_means = matrix.normalized[index].mean(axis=0)
+    role_coverage = np.unique(roles[roles > 0]).size / TEAM_SIZE
+    specialty_diversity = np.unique(specialties[specialties > 0]).size / TEAM_SIZE
+
+    score = (
+        STATS_WEIGHT * normalized_means.mean()
+        + ROLE_COVERAGE_WEIGHT * role_coverage
+        + SPECIALTY_DIVERSITY_WEIGHT * specialty_diversity
+    )
+
+    return {
+        'heroes': [{'idHEROES': int(matrix.ids[i]), 'hero_name': matrix.names[i]} for i in index],
+        'stats_total': dict(zip(STAT_FIELDS, matrix.stats[index].sum(axis=0).tolist())),
+        'stats_normalized': dict(zip(STAT_FIELDS, np.round(normalized_means, 4).tolist())),
+        'roles': sorted({matrix.role_names[i] for i in index if matrix.role_names[i]}),
+        'role_coverage': round(role_coverage, 4),
+        'specialty_diversity': round(specialty_diversity, 4),
+        'score': round(float(score) * 100, 2)
+    }
+
+def rank_counters(matrix, own_index, opponent_index, limit=5):
+    """
+    Ranks every catalog hero as a counter to the opponent lineup in one pass.
+
+    A candidate scores for attack above the opponents' average defense,
+    defense and hp above their average attack, and speed above theirs,
+    plus a bonus when it fills a role missing from its own lineup. Heroes
+    already in either lineup are excluded.
+
+    Args:
+        matrix: StatMatrix of the catalog
+        own_index: Row indexes of the lineup the counters are for
+        opponent_index: Row indexes of the lineup to counter
+        limit: Number of candidates to return
+
+    Returns:
+        List of candidate dictionaries, best first
+    """
+    norm = matrix.normalized
+    opponent = norm[opponent_index].mean(axis=0)
+
+    scores = (
+        (norm[:, ATTACK] - opponent[DEFENSE])
+        + (norm[:, DEFENSE] - opponent[ATTACK])
+        + 0.5 * (norm[:, HP] - opponent[ATTACK])
+        + 0.5 * (norm[:, MOVEMENT_SPEED] - opponent[MOVEMENT_SPEED])
+    )
+    scores += MISSING_ROLE_BONUS * ~np.isin(matrix.role_ids, matrix.role_ids[own_index])
+
+    scores[own_index] = -np.inf
+    scores[opponent_index] = -np.inf
+
+    limit = min(limit, int(np.isfinite(scores).sum()))
+    if limit <= 0:
+        return []
+
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top])]
+
+    return [{
+        'idHEROES': int(matrix.ids[i]),
+        'hero_name': matrix.names[i],
+        'role_name': matrix.role_names[i],
+        'counter_score': round(float(scores[i]), 4)
+    } for i in top]
+
+def compare_teams(matrix, team_a_index, team_b_index, counters=5):
+    """Scores two lineups against each other and ranks counters for both"""
+    team_a = score_team(matrix, team_a_index)
+    team_b = score_team(matrix, team_b_index)
+
+    if team_a['score'] > team_b['score']:
+        winner = 'team_a'
+    elif team_b['score'] > team_a['score']:
+        winner = 'team_b'
+    else:
+        winner = 'draw'
+
+    return {
+        'team_a': team_a,
+        'team_b': team_b,
+        'winner': winner,
+        'counters': {
+            'team_a': rank_counters(matrix, team_a_index, team_b_index, counters),
+            'team_b': rank_counters(matrix, team_b_index, team_a_index, counters)
+        }
+    }
@@ -2,11 +2,31 @@ from flask import Flask, jsonify
 from flask_mysqldb import MySQL
 import datetime
 from config import Config
-from auth import create_token, validate_credentials
-from routes.heroes import heroes_bp, init_mysql as init_heroes_mysql
-from routes.roles import roles_bp, init_mysql as init_roles_mysql
-from routes.hero_stats import hero_stats_bp, init_mysql as init_stats_mysql
-from routes.specialties import specialties_bp, init_mysql as init_specialties_mysql
+from utils import ModelJSONProvider
+from auth import init_auth, login_token, LoginError, users_cli
+from repositories import init_mysql
+from db_router import db_router
+from shards import shard_router
+from ratelimit import rate_limiter
+from idempotency import idempotency
+from errors import register_error_handlers
+from health import health_monitor
+from tracing import tracer
+from routes.heroes import heroes_bp
+from routes.roles import roles_bp
+from routes.hero_stats import hero_stats_bp
+from routes.specialties import specialties_bp
+from routes.teams import teams_bp
+from routes.catalog import catalog_bp
+from routes.jobs import jobs_bp
+from routes.changes import changes_bp
+from routes.query import query_bp
+from routes.profiler import profiler_bp
+from routes.statements import statements_bp
+from routes.regions import regions_bp
+from routes.bootstrap import bootstrap_bp
+from catalog_io import catalog_cli
+from jobs import init_jobs
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -14,20 +34,60 @@ app = Flask(__name__)
 # Load configuration
 app.config.from_object(Config)
 
+# Serialize row models straight to JSON
+app.json = ModelJSONProvider(app)
+
+# Dummy password hash, so logins for unknown users cost one bcrypt check
+init_auth(app)
+
 # Initialize MySQL
 mysql = MySQL(app)
 
-# Initialize MySQL for all blueprints
-init_heroes_mysql(mysql)
-init_roles_mysql(mysql)
-init_stats_mysql(mysql)
-init_specialties_mysql(mysql)
+# Initialize MySQL for the data access layer used by all blueprints
+init_mysql(mysql)
+
+# Route reads to replicas when MYSQL_REPLICAS is configured
+db_router.init_app(app)
+
+# One catalog database per game region when SHARD_REGIONS is configured
+shard_router.init_app(app)
+
+# Token-bucket rate limiting (in-process, or shared through SQLite)
+rate_limiter.init_app(app)
+
+# Idempotency-Key replay for create endpoints (in-process, or shared through MySQL)
+idempotency.init_app(app)
+
+# JSON errors; 503 + Retry-After while the database is unavailable
+register_error_handlers(app)
+
+# Request counting for the readiness probe
+health_monitor.init_app(app)
+
+# Sampled request tracing (traceparent in and out, OTLP/JSON export)
+tracer.init_app(app)
 
 # Register blueprints
 app.register_blueprint(heroes_bp, url_prefix='/api')
 app.register_blueprint(roles_bp, url_prefix='/api')
 app.register_blueprint(hero_stats_bp, url_prefix='/api')
 app.register_blueprint(specialties_bp, url_prefix='/api')
+app.register_blueprint(teams_bp, url_prefix='/api')
+app.register_blueprint(catalog_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(changes_bp, url_prefix='/api')
+app.register_blueprint(query_bp, url_prefix='/api')
+app.register_blueprint(profiler_bp, url_prefix='/api')
+app.register_blueprint(statements_bp, url_prefix='/api')
+app.register_blueprint(regions_bp, url_prefix='/api')
+app.register_blueprint(bootstrap_bp, url_prefix='/api')
+
+# Flask CLI: flask catalog export|import|build-snapshot, flask users create|set-password|hash-password
+app.cli.add_command(catalog_cli)
+app.cli.add_command(users_cli)
+
+# Background jobs: cache warm-up and refresh, optional snapshot builds
+init_jobs(app)
 
 # ==================== AUTH ROUTES ====================
 
@@ -38,14 +98,27 @@ def login():
     
     auth = request.get_json()
     
-    if not auth or not auth.get('username') or not auth.get('password'):
+    if not isinstance(auth, dict) or not auth.get('username') or not auth.get('password'):
         return jsonify({'message': 'Username and password required'}), 400
     
-    if validate_credentials(auth['username'], auth['password']):
-        token = create_token(auth['username'])
-        return jsonify({'token': token}), 200
+    if not isinstance(auth['username'], str) or not isinstance(auth['password'], str):
+        return jsonify({'message': 'Username and password must be strings'}), 400
+    
+    region = auth.get('region')
+    if region is not None:
+        if not isinstance(region, str):
+            return jsonify({'message': 'Region must be a string'}), 400
+        shard_router.check(region)
+    
+    try:
+        token = login_token(auth['username'], auth['password'], region)
+    except LoginError as e:
+        response = jsonify({'message': e.message})
+        if e.retry_after:
+            response.headers['Retry-After'] = str(e.retry_after)
+        return response, e.status_code
     
-    return jsonify({'message': 'Invalid credentials'}), 401
+    return jsonify({'token': token}), 200
 
 # ==================== HEALTH CHECK ====================
 
@@ -57,6 +130,23 @@ def health_check():
         'timestamp': datetime.datetime.utcnow().isoformat()
     })
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving requests (no dependency checks)"""
+    return jsonify(health_monitor.live())
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 503 while this worker should not receive traffic"""
+    result, age = health_monitor.ready()
+    
+    response = jsonify(dict(result, age_seconds=age))
+    if result['status'] != 'ready':
+        response.headers['Retry-After'] = str(app.config['HEALTH_CACHE_SECONDS'])
+        return response, 503
+    
+    return response, 200
+
 # ==================== RUN APP ====================
 
 if __name__ == '__main__':
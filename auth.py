@@ -1,8 +1,21 @@
-from flask import request, jsonify
+from flask import request, jsonify, g, current_app
 from functools import wraps
+from collections import OrderedDict
+import hashlib
+import hmac
+import math
+import threading
+import time
+import bcrypt
+import click
 import jwt
 import datetime
+from flask.cli import AppGroup
 from config import Config
+from ratelimit import rate_limiter
+from repositories import user_repository
+from signals import user_changed
+from tracing import span
 
 def token_required(f):
     """
@@ -21,38 +34,143 @@ def token_required(f):
             if token.startswith('Bearer '):
                 token = token[7:]
             
-            data = jwt.decode(
-                token,
-                Config.SECRET_KEY,
-                algorithms=['HS256']
-            )
+            with span('auth.token_required'):
+                data = jwt.decode(
+                    token,
+                    Config.SECRET_KEY,
+                    algorithms=['HS256']
+                )
             
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token has expired!'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'message': 'Token is invalid!'}), 401
         
+        # Expose the authenticated user to the rest of the request
+        g.jwt_claims = data
+        g.current_user = data.get('user')
+        
         return f(*args, **kwargs)
     
     return decorated
 
-def create_token(username):
+def admin_required(f):
+    """
+    Decorator limiting a route to tokens with the admin claim.
+    
+    Usage: @admin_required below @token_required
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not g.get('jwt_claims', {}).get('admin'):
+            return jsonify({'message': 'Admin privileges required!'}), 403
+        
+        return f(*args, **kwargs)
+    
+    return decorated
+
+def create_token(username, admin=False, region=None):
     """
     Creates a JWT token for authenticated user.
     
     Args:
         username: Username to encode in token
+        admin: Whether the user may call admin-only endpoints
+        region: Game region whose catalog the token's requests use by default
     
     Returns:
         JWT token string
     """
-    token = jwt.encode({
+    claims = {
         'user': username,
+        'admin': bool(admin),
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=Config.JWT_EXPIRATION_HOURS)
-    }, Config.SECRET_KEY, algorithm='HS256')
+    }
+    if region:
+        claims['region'] = region
+    
+    token = jwt.encode(claims, Config.SECRET_KEY, algorithm='HS256')
     
     return token
 
+# ==================== PASSWORD HASHING ====================
+
+def hash_password(password, rounds=None):
+    """
+    Hashes a password with bcrypt.
+    
+    Args:
+        password: Plain-text password (at most 72 bytes in UTF-8)
+        rounds: bcrypt cost factor (default: BCRYPT_ROUNDS)
+    
+    Returns:
+        bcrypt hash string
+    """
+    rounds = rounds or current_app.config['BCRYPT_ROUNDS']
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('ascii')
+
+def check_password(password, password_hash):
+    """Returns True if the password matches the bcrypt hash"""
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('ascii'))
+    except ValueError:
+        # Over-long password or malformed hash
+        return False
+
+def init_auth(app):
+    """Precomputes the hash that logins for unknown usernames are checked against"""
+    rounds = app.config['BCRYPT_ROUNDS']
+    app.extensions['dummy_password_hash'] = bcrypt.hashpw(b'', bcrypt.gensalt(rounds)).decode('ascii')
+
+def _find_account(username):
+    """
+    Looks up the bootstrap admin or a row of the users table, without checking a password.
+    
+    Returns:
+        (username, password hash, admin), or None for an unknown username
+    """
+    config = current_app.config
+    bootstrap_hash = config.get('BOOTSTRAP_ADMIN_PASSWORD_HASH')
+    
+    if bootstrap_hash and username == config.get('BOOTSTRAP_ADMIN_USERNAME'):
+        return username, bootstrap_hash, True
+    
+    user = user_repository.get_by_username(username)
+    if user is None:
+        return None
+    return user.username, user.password_hash, bool(user.is_admin)
+
+def _verify_account(account, password):
+    """
+    Checks a password against an account from _find_account().
+    
+    An unknown account is checked against a hash precomputed by
+    init_auth(), so it pays for exactly one hash check and takes as long
+    as a wrong password.
+    
+    Returns:
+        Dictionary with 'user' and 'admin', or None if the credentials are invalid
+    """
+    if account is None:
+        check_password(password, current_app.extensions['dummy_password_hash'])
+        return None
+    
+    username, password_hash, admin = account
+    if check_password(password, password_hash):
+        return {'user': username, 'admin': admin}
+    return None
+
+def authenticate(username, password):
+    """
+    Checks credentials against the bootstrap admin or the users table.
+    
+    The bootstrap admin is checked without touching the database.
+    
+    Returns:
+        Dictionary with 'user' and 'admin', or None if the credentials are invalid
+    """
+    return _verify_account(_find_account(username), password)
+
 def validate_credentials(username, password):
     """
     Validates user credentials.
@@ -64,5 +182,146 @@ def validate_credentials(username, password):
     Returns:
         Boolean indicating if credentials are valid
     """
-    # In production, check against database
-    return username == 'admin' and password == 'password'
\ No newline at end of file
+    return authenticate(username, password) is not None
+
+# ==================== LOGIN ====================
+
+class IssuedTokenCache:
+    """
+    Tokens issued in the last few minutes, keyed by an HMAC of the credentials.
+    
+    A repeat login with the same username and password gets the same
+    token back without another bcrypt check. Keys are HMACs under
+    SECRET_KEY, so the cache never holds passwords, and only correct
+    credentials can produce a key that is already cached. The stored
+    password hash and admin flag are part of the key, so a change made
+    by any process (e.g. the users CLI) misses the cache.
+    """
+    
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(username, password, region=None, account=None):
+        password_hash, admin = (account[1], account[2]) if account else ('', False)
+        message = f'{username}\0{password}\0{region or ""}\0{password_hash}\0{int(admin)}'.encode('utf-8')
+        return hmac.new(Config.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).digest()
+    
+    def get(self, key, window):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            username, token, issued_at = entry
+            if time.monotonic() - issued_at >= window:
+                del self._entries[key]
+                return None
+            return token
+    
+    def put(self, key, username, token):
+        with self._lock:
+            self._entries[key] = (username, token, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def forget_user(self, username):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] == username]:
+                del self._entries[key]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+issued_tokens = IssuedTokenCache(Config.LOGIN_TOKEN_CACHE_MAX_ENTRIES)
+
+def _forget_user(sender, username, **extra):
+    issued_tokens.forget_user(username)
+
+user_changed.connect(_forget_user, weak=False)
+
+# Bounds concurrent bcrypt checks, so a login burst queues briefly or gets
+# 503 instead of starving every worker thread
+_hash_slots = threading.BoundedSemaphore(Config.LOGIN_MAX_CONCURRENT_HASHES)
+
+class LoginError(Exception):
+    """A rejected login, with the HTTP status and optional Retry-After seconds"""
+    
+    def __init__(self, message, status_code, retry_after=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def login_token(username, password, region=None):
+    """
+    Returns a token for valid credentials, with an optional region claim.
+    
+    Repeat logins within LOGIN_TOKEN_REUSE_SECONDS get the token issued
+    earlier, unless the account changed since. Otherwise, the attempt is
+    charged to the 'login' rate limit pool per IP and per username
+    before the password hash is checked.
+    
+    Raises:
+        LoginError: 401 invalid credentials, 429 too many attempts,
+                    503 too many concurrent hash checks
+    """
+    config = current_app.config
+    account = _find_account(username)
+    reuse_key = IssuedTokenCache.key(username, password, region, account)
+    
+    token = issued_tokens.get(reuse_key, config['LOGIN_TOKEN_REUSE_SECONDS'])
+    if token is not None:
+        return token
+    
+    if config.get('RATE_LIMIT_ENABLED'):
+        allowed, retry_after, remaining = rate_limiter.check(
+            'login', 1, [('ip', request.remote_addr or 'unknown'), ('user', username)]
+        )
+        if not allowed:
+            raise LoginError('Too many login attempts', 429, max(1, math.ceil(retry_after)))
+    
+    if not _hash_slots.acquire(timeout=config['LOGIN_HASH_WAIT_SECONDS']):
+        raise LoginError('Login service busy, try again', 503, 1)
+    try:
+        with span('auth.authenticate'):
+            identity = _verify_account(account, password)
+    finally:
+        _hash_slots.release()
+    
+    if identity is None:
+        raise LoginError('Invalid credentials', 401)
+    
+    token = create_token(identity['user'], identity['admin'], region)
+    issued_tokens.put(reuse_key, identity['user'], token)
+    return token
+
+# ==================== CLI ====================
+
+users_cli = AppGroup('users', help='Manage API users.')
+
+@users_cli.command('create')
+@click.argument('username')
+@click.option('--admin', is_flag=True, help='Allow admin-only endpoints.')
+@click.password_option()
+def create_user_command(username, admin, password):
+    """Add a user with a bcrypt-hashed password."""
+    user_repository.create(username, hash_password(password), admin)
+    click.echo(f"Created user {username}")
+
+@users_cli.command('set-password')
+@click.argument('username')
+@click.password_option()
+def set_password_command(username, password):
+    """Replace a user's password."""
+    user_repository.set_password(username, hash_password(password))
+    click.echo(f"Updated password for {username}")
+
+@users_cli.command('hash-password')
+@click.password_option()
+def hash_password_command(password):
+    """Print a bcrypt hash (e.g. for BOOTSTRAP_ADMIN_PASSWORD_HASH)."""
+    click.echo(hash_password(password))
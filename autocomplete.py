@@ -0,0 +1,115 @@
+import threading
+from bisect import bisect_left
+from live_index import LiveIndex
+from search_index import normalize
+
+def _keys(text):
+    """The text from each of its word starts: 'cadia riverlands', 'riverlands'"""
+    words = normalize(text).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+class _SortedKeys:
+    """Completion keys in a sorted list, with a parallel list of what they complete to"""
+    __slots__ = ('keys', 'values')
+
+    def __init__(self, pairs):
+        pairs.sort(key=lambda pair: pair[0])
+        self.keys = [key for key, value in pairs]
+        self.values = [value for key, value in pairs]
+
+    def matches(self, prefix):
+        """Yields the values of keys starting with `prefix`, in key order"""
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[i].startswith(prefix):
+                return
+            yield self.values[i]
+
+class Completions:
+    """
+    Prefix completions of hero names and origins.
+
+    Names and origins are kept as sorted arrays of normalized keys, one
+    per word start, so "riv" completes "Cadia Riverlands". A lookup is a
+    binary search plus a scan over the matches it returns, so it costs
+    O(log n + k). Hero names come before origins; origins shared by many
+    heroes appear once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built = False
+        self._records = {}
+        self._names = _SortedKeys([])
+        self._origins = _SortedKeys([])
+
+    def _rebuild(self):
+        names = []
+        origins = {}
+        for record in self._records.values():
+            if record.hero_name:
+                hero = {'text': record.hero_name, 'type': 'hero', 'idHEROES': record.idHEROES}
+                names.extend((key, hero) for key in _keys(record.hero_name))
+            if record.origin:
+                origins.setdefault(normalize(record.origin), {'text': record.origin, 'type': 'origin'})
+
+        self._names = _SortedKeys(names)
+        self._origins = _SortedKeys([
+            (key, origin) for normalized, origin in origins.items() for key in _keys(normalized)
+        ])
+
+    def build(self, records):
+        """
+        Builds the arrays from catalog records.
+
+        Args:
+            records: HeroRecord rows (HeroRepository.list_records())
+        """
+        with self._lock:
+            self._records = {record.idHEROES: record for record in records}
+            self._rebuild()
+            self.built = True
+
+    def upsert(self, record):
+        # The catalog is small, so a write re-sorts rather than patching the arrays
+        with self._lock:
+            self._records[record.idHEROES] = record
+            self._rebuild()
+
+    def remove(self, hero_id):
+        with self._lock:
+            if self._records.pop(hero_id, None) is not None:
+                self._rebuild()
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` completions of `prefix`.
+
+        Returns:
+            List of {'text', 'type'} dicts ('hero' ones also carry idHEROES)
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            names, origins = self._names, self._origins
+
+        completions = []
+        seen = set()
+        for values in (names.matches(prefix), origins.matches(prefix)):
+            for value in values:
+                if len(completions) >= limit:
+                    return completions
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    completions.append(value)
+        return completions
+
+_live = LiveIndex(Completions)
+# The default region's completions
+completions = _live.default
+ensure_built = _live.ensure_built
+rebuild = _live.rebuild
+
+def complete(prefix, limit=10):
+    return ensure_built().complete(prefix, limit)
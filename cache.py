@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response
+from config import Config
+from errors import is_unavailable
+from shards import shard_router
+from signals import hero_changed, stats_changed, catalog_reloaded
+from singleflight import SingleFlight
+
+# ==================== SHARED RESPONSE CACHE ====================
+
+class _Entry:
+    __slots__ = ('status', 'headers', 'body', 'stored_at', 'max_age', 'stale_while_revalidate')
+
+    def __init__(self, status, headers, body, max_age, stale_while_revalidate):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+    def is_fresh(self):
+        return self.age() < self.max_age
+
+    def is_usable_stale(self):
+        return self.age() < self.max_age + self.stale_while_revalidate
+
+class ResponseCache:
+    """
+    Bounded in-process cache of rendered GET responses.
+
+    Entries hold the response bytes and headers rather than Response
+    objects, so every request gets its own Response. Like ResultCache,
+    each clear bumps a generation number, and a response rendered before
+    the clear is not stored.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.flight = SingleFlight()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def claim_refresh(self, key):
+        """Returns True for exactly one caller revalidating a stale entry"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def release_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+response_cache = ResponseCache(Config.RESPONSE_CACHE_MAX_ENTRIES)
+
+def _invalidate(sender, **extra):
+    response_cache.clear()
+
+hero_changed.connect(_invalidate, weak=False)
+stats_changed.connect(_invalidate, weak=False)
+catalog_reloaded.connect(_invalidate, weak=False)
+
+# ==================== QUERY RESULT CACHE ====================
+
+class ResultCache:
+    """
+    Bounded in-process cache of repository query results.
+
+    Writes clear it through the same signals as the response cache. Each
+    clear bumps a generation number, and a result that was read before
+    the clear is not stored, so a read racing a write cannot put stale
+    rows back.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, max_age):
+        """Returns (hit, rows) for an entry younger than max_age seconds"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            rows, stored_at = entry
+            if time.monotonic() - stored_at >= max_age:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, rows
+
+    def set(self, key, rows, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (rows, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+result_cache = ResultCache(Config.DB_RESULT_CACHE_MAX_ENTRIES)
+
+def _invalidate_results(sender, **extra):
+    result_cache.clear()
+
+hero_changed.connect(_invalidate_results, weak=False)
+stats_changed.connect(_invalidate_results, weak=False)
+catalog_reloaded.connect(_invalidate_results, weak=False)
+
+# ==================== CACHE POLICIES ====================
+
+def cache_control_value(max_age, stale_while_revalidate=0, private=True):
+    """Builds a Cache-Control header value for a cache policy"""
+    parts = ['private' if private else 'public', f'max-age={max_age}']
+    if stale_while_revalidate:
+        parts.append(f'stale-while-revalidate={stale_while_revalidate}')
+    return ', '.join(parts)
+
+def _cache_key():
+    return (
+        shard_router.current(),
+        request.path,
+        tuple(sorted(request.args.items(multi=True))),
+        request.args.get('format', 'json').lower(),
+        request.headers.get('Accept-Encoding', '')
+    )
+
+def _render(view, args, kwargs, policy):
+    response = make_response(view(*args, **kwargs))
+    if response.status_code == 200:
+        response.headers['Cache-Control'] = policy
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def _from_entry(entry, cache_status):
+    response = current_app.response_class(entry.body, status=entry.status, headers=entry.headers)
+    response.headers['Age'] = str(int(entry.age()))
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def _conditional(response):
+    # A client revalidating with the ETag it holds gets a bodiless 304
+    if 'ETag' in response.headers:
+        response.make_conditional(request)
+    return response
+
+def cached(max_age=60, stale_while_revalidate=0, private=True):
+    """
+    Decorator applying a per-endpoint HTTP cache policy.
+
+    Sets Cache-Control on successful responses and, when
+    RESPONSE_CACHE_ENABLED is on, serves GET requests from the shared
+    response cache. Concurrent misses for the same key are coalesced so
+    only one of them runs the view (and its database queries). A stale
+    response keeps being served if revalidating it fails because the
+    database is unavailable. A response with an ETag is answered
+    with 304 Not Modified when If-None-Match matches it, cached or not.
+
+    Usage: @cached(max_age=60) below @token_required, so cached
+    responses are still only served to authenticated clients.
+
+    Args:
+        max_age: Seconds a response stays fresh
+        stale_while_revalidate: Extra seconds a stale response may be
+                                served while one request refreshes it
+        private: Mark the response private (JWT-protected data) or public
+    """
+    policy = cache_control_value(max_age, stale_while_revalidate, private)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            return _conditional(serve(*args, **kwargs))
+
+        def serve(*args, **kwargs):
+            if request.method != 'GET' or not current_app.config.get('RESPONSE_CACHE_ENABLED'):
+                return _render(f, args, kwargs, policy)
+
+            key = _cache_key()
+            entry = response_cache.get(key)
+
+            def fill():
+                # A write clearing the cache during the render makes this response stale
+                generation = response_cache.generation
+                response = _render(f, args, kwargs, policy)
+                new_entry = _Entry(
+                    response.status_code,
+                    list(response.headers.items()),
+                    response.get_data(),
+                    max_age,
+                    stale_while_revalidate
+                )
+                if response.status_code == 200:
+                    response_cache.set(key, new_entry, generation)
+                return new_entry
+
+            if entry is not None:
+                if entry.is_fresh():
+                    return _from_entry(entry, 'HIT')
+
+                if entry.is_usable_stale():
+                    # One request revalidates, everyone else keeps the stale copy
+                    if not response_cache.claim_refresh(key):
+                        return _from_entry(entry, 'STALE')
+                    try:
+                        return _from_entry(response_cache.flight.do(key, fill), 'REVALIDATED')
+                    except Exception as e:
+                        # Keep serving the stale copy while the database is unavailable
+                        if not is_unavailable(e):
+                            raise
+                        return _from_entry(entry, 'STALE')
+                    finally:
+                        response_cache.release_refresh(key)
+
+            return _from_entry(response_cache.flight.do(key, fill), 'MISS')
+
+        return decorated
+
+    return decorator
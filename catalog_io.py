@@ -0,0 +1,283 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from MySQLdb import cursors
+from MySQLdb.constants import FIELD_TYPE
+from repositories import mysql_connection, hero_repository, role_repository, specialty_repository, ChangeRepository
+from signals import catalog_reloaded
+from snapshot import write_snapshot
+
+try:
+    import pyarrow as pa
+except ImportError:  # CSV snapshots still work without pyarrow
+    pa = None
+
+# Tables in dependency order: heroes reference the other three
+TABLES = ('roles', 'specialty', 'hero_stats', 'heroes')
+
+BATCH_SIZE = 1000
+
+# Marks NULL in CSV snapshots (same convention as mysqldump / LOAD DATA)
+CSV_NULL = '\\N'
+
+def default_snapshot_type():
+    return 'arrow' if pa is not None else 'csv'
+
+# ==================== EXPORT ====================
+
+def _arrow_type(type_code):
+    if type_code in (FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.LONGLONG,
+                     FIELD_TYPE.INT24, FIELD_TYPE.YEAR):
+        return pa.int64()
+    if type_code in (FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE):
+        return pa.float64()
+    return pa.string()
+
+def _arrow_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+def _export_table(archive, cur, table, snapshot_type):
+    """Streams one table into the archive in batches and returns its row count"""
+    cur.execute(f"SELECT * FROM {table}")
+    columns = [column[0] for column in cur.description]
+    count = 0
+
+    if snapshot_type == 'arrow':
+        schema = pa.schema([(column[0], _arrow_type(column[1])) for column in cur.description])
+        with archive.open(f'{table}.arrow', 'w') as member:
+            with pa.ipc.new_stream(member, schema) as writer:
+                while True:
+                    rows = cur.fetchmany(BATCH_SIZE)
+                    if not rows:
+                        break
+                    arrays = [
+                        pa.array([_arrow_value(row[i]) for row in rows], type=field.type)
+                        for i, field in enumerate(schema)
+                    ]
+                    writer.write_batch(pa.record_batch(arrays, schema=schema))
+                    count += len(rows)
+    else:
+        with archive.open(f'{table}.csv', 'w') as member:
+            text = io.TextIOWrapper(member, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(columns)
+            while True:
+                rows = cur.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                writer.writerows([CSV_NULL if value is None else value for value in row] for row in rows)
+                count += len(rows)
+            text.flush()
+            text.detach()
+
+    return count
+
+def export_catalog(fileobj, snapshot_type=None):
+    """
+    Writes the whole catalog to a zip snapshot.
+
+    The archive holds one member per table (`<table>.arrow` as an Arrow
+    IPC stream, or `<table>.csv`) plus a manifest.json with row counts.
+    Rows are streamed from an unbuffered server-side cursor in batches,
+    so memory stays flat regardless of table size.
+
+    Args:
+        fileobj: Writable binary file object
+        snapshot_type: 'arrow' or 'csv' (default: arrow if pyarrow is installed)
+
+    Returns:
+        Manifest dictionary
+    """
+    snapshot_type = snapshot_type or default_snapshot_type()
+    if snapshot_type == 'arrow' and pa is None:
+        raise ValueError('Arrow snapshots require pyarrow; use type=csv')
+    if snapshot_type not in ('arrow', 'csv'):
+        raise ValueError('Snapshot type must be arrow or csv')
+
+    manifest = {'type': snapshot_type, 'tables': {}}
+
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for table in TABLES:
+            cur = mysql_connection().cursor(cursors.SSCursor)
+            try:
+                manifest['tables'][table] = _export_table(archive, cur, table, snapshot_type)
+            finally:
+                cur.close()
+        archive.writestr('manifest.json', json.dumps(manifest))
+
+    return manifest
+
+def export_to_tempfile(snapshot_type=None):
+    """Exports into a spooled temp file (kept in memory up to 8 MB) rewound for reading"""
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    export_catalog(spool, snapshot_type)
+    spool.seek(0)
+    return spool
+
+# ==================== IMPORT ====================
+
+def spool_stream(stream):
+    """Copies a (possibly unseekable) upload stream into a seekable spooled temp file"""
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
+def _table_columns(cur, table):
+    cur.execute(f"SELECT * FROM {table} LIMIT 0")
+    return [column[0] for column in cur.description]
+
+def _arrow_batches(member):
+    reader = pa.ipc.open_stream(member)
+    columns = reader.schema.names
+    for batch in reader:
+        yield columns, list(zip(*[column.to_pylist() for column in batch.columns]))
+
+def _csv_batches(member):
+    reader = csv.reader(io.TextIOWrapper(member, encoding='utf-8', newline=''))
+    columns = next(reader, [])
+    batch = []
+    for row in reader:
+        batch.append(tuple(None if value == CSV_NULL else value for value in row))
+        if len(batch) >= BATCH_SIZE:
+            yield columns, batch
+            batch = []
+    if batch:
+        yield columns, batch
+
+def import_catalog(fileobj, truncate=False):
+    """
+    Bulk-loads a snapshot written by export_catalog.
+
+    Tables load in dependency order with multi-row INSERT ... ON DUPLICATE
+    KEY UPDATE batches inside a single transaction, so rows are upserted
+    by primary key and a failed import leaves the catalog unchanged.
+
+    Args:
+        fileobj: Readable binary file object with the zip snapshot
+        truncate: Delete existing rows first, so the catalog matches the snapshot exactly
+
+    Returns:
+        Dictionary of imported row counts per table
+
+    Raises:
+        ValueError: If the snapshot is malformed or has unknown columns
+    """
+    connection = mysql_connection()
+    counts = {}
+
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ValueError('Snapshot must be a zip archive')
+
+    with archive:
+        names = set(archive.namelist())
+        cur = connection.cursor()
+        try:
+            if truncate:
+                for table in reversed(TABLES):
+                    cur.execute(f"DELETE FROM {table}")
+
+            for table in TABLES:
+                if f'{table}.arrow' in names:
+                    if pa is None:
+                        raise ValueError('Arrow snapshots require pyarrow')
+                    batches = _arrow_batches(archive.open(f'{table}.arrow'))
+                elif f'{table}.csv' in names:
+                    batches = _csv_batches(archive.open(f'{table}.csv'))
+                else:
+                    continue
+
+                known = set(_table_columns(cur, table))
+                counts[table] = 0
+
+                for columns, rows in batches:
+                    unknown = [column for column in columns if column not in known]
+                    if unknown:
+                        raise ValueError(f'Unknown columns for {table}: {", ".join(unknown)}')
+
+                    column_list = ', '.join(f'`{column}`' for column in columns)
+                    placeholders = ', '.join(['%s'] * len(columns))
+                    updates = ', '.join(f'`{column}` = VALUES(`{column}`)' for column in columns)
+                    cur.executemany(
+                        f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}) "
+                        f"ON DUPLICATE KEY UPDATE {updates}",
+                        rows
+                    )
+                    counts[table] += len(rows)
+
+            if current_app.config.get('CHANGE_FEED_ENABLED'):
+                # Clients that sync from the change feed must reload everything
+                ChangeRepository.append(cur, 'catalog', None, 'reload')
+
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cur.close()
+
+    catalog_reloaded.send(None, tables=counts)
+    return counts
+
+# ==================== SERVING SNAPSHOT ====================
+
+def build_snapshot(path):
+    """
+    Writes the memory-mapped serving snapshot from the database.
+
+    Run it on a node with database access; workers started with
+    SNAPSHOT_SERVING pick up the new file on their next check.
+
+    Returns:
+        Snapshot version
+    """
+    return write_snapshot(
+        path,
+        hero_repository.list_records(),
+        role_repository.list_all_from_database(),
+        specialty_repository.list_all_from_database()
+    )
+
+# ==================== CLI ====================
+
+catalog_cli = AppGroup('catalog', help='Export, import and build catalog snapshots.')
+
+@catalog_cli.command('export')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--type', 'snapshot_type', type=click.Choice(['arrow', 'csv']), default=None,
+              help='Snapshot format (default: arrow if pyarrow is installed).')
+def export_command(path, snapshot_type):
+    """Write the catalog to a snapshot file."""
+    with open(path, 'wb') as f:
+        manifest = export_catalog(f, snapshot_type)
+    click.echo(f"Exported {manifest['type']} snapshot to {path}: {manifest['tables']}")
+
+@catalog_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--truncate', is_flag=True, help='Delete existing rows before loading.')
+def import_command(path, truncate):
+    """Load a snapshot file into the catalog."""
+    with open(path, 'rb') as f:
+        counts = import_catalog(f, truncate)
+    click.echo(f"Imported {path}: {counts}")
+
+@catalog_cli.command('build-snapshot')
+@click.option('--path', default=None, type=click.Path(dir_okay=False, writable=True),
+              help='Output file (default: SNAPSHOT_PATH).')
+def build_snapshot_command(path):
+    """Write the memory-mapped serving snapshot from the database."""
+    path = path or current_app.config['SNAPSHOT_PATH']
+    version = build_snapshot(path)
+    click.echo(f"Published serving snapshot {version} to {path}")
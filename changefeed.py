@@ -0,0 +1,81 @@
+import threading
+import time
+from flask import current_app
+from repositories import change_repository, hero_repository, stats_repository
+from signals import hero_changed, stats_changed, catalog_reloaded
+
+class ChangeNotifier:
+    """
+    Wakes long-poll and stream clients when this process logs a change.
+
+    Changes written by other processes are picked up by polling every
+    CHANGES_POLL_SECONDS while a client waits.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._condition = threading.Condition()
+
+    def notify(self, *args, **extra):
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Waits up to `timeout` seconds unless a change arrived after `version`"""
+        with self._condition:
+            if self.version == version:
+                self._condition.wait(timeout)
+
+change_notifier = ChangeNotifier()
+
+hero_changed.connect(change_notifier.notify, weak=False)
+stats_changed.connect(change_notifier.notify, weak=False)
+catalog_reloaded.connect(change_notifier.notify, weak=False)
+
+def wait_for_changes(since, limit, wait=0):
+    """
+    Returns changes after `since`, waiting up to `wait` seconds for one to arrive.
+
+    Args:
+        since: Last sequence number the client has applied
+        limit: Maximum number of changes to return
+        wait: Seconds to long-poll when there are no changes yet
+
+    Returns:
+        List of Change models, oldest first (empty if none arrived in time)
+    """
+    deadline = time.monotonic() + wait
+    poll_seconds = current_app.config['CHANGES_POLL_SECONDS']
+
+    while True:
+        version = change_notifier.version
+        changes = change_repository.list_since(since, limit)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            return changes
+        change_notifier.wait(version, min(remaining, poll_seconds))
+
+def with_data(changes):
+    """
+    Converts changes to dicts carrying each entity's current state.
+
+    Heroes and hero stats are loaded with one query per entity type. The
+    `data` of a deleted (or since-deleted) entity is None.
+    """
+    hero_ids = {change.entity_id for change in changes if change.entity == 'hero'}
+    stats_ids = {change.entity_id for change in changes if change.entity == 'hero_stats'}
+    heroes = hero_repository.get_many(sorted(hero_ids))
+    stats = stats_repository.get_many(sorted(stats_ids))
+
+    entries = []
+    for change in changes:
+        entry = change.to_dict()
+        if change.entity == 'hero':
+            entry['data'] = heroes.get(change.entity_id)
+        elif change.entity == 'hero_stats':
+            entry['data'] = stats.get(change.entity_id)
+        else:
+            entry['data'] = None
+        entries.append(entry)
+    return entries
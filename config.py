@@ -1,3 +1,5 @@
+import os
+
 class Config:
     """Config settings for the Flask application"""
     
@@ -10,10 +12,125 @@ class Config:
     MYSQL_PASSWORD = 'root'
     MYSQL_DB = 'mlbbdb'
     MYSQL_CURSORCLASS = 'DictCursor'
+    MYSQL_PORT = 3306
+    
+    # Read Replicas (reads go to replicas, writes to the primary above)
+    # Example: [{'host': '127.0.0.1', 'port': 3307}, {'host': '127.0.0.1', 'port': 3308}]
+    MYSQL_REPLICAS = []
+    DB_REPLICA_STRATEGY = 'round_robin'  # or 'least_connections'
+    DB_REPLICA_RETRY_SECONDS = 30        # Skip a failed replica for this long
+    DB_READ_YOUR_WRITES_SECONDS = 5      # Keep a client on the primary after it writes
+    DB_POOL_SIZE = 10
+    
+    # Region Sharding (one catalog database per game region)
+    # The default region uses MYSQL_* above; list the others here, e.g.
+    # {'na': {'db': 'mlbbdb_na'}, 'eu': {'host': '10.0.2.5', 'db': 'mlbbdb_eu'}}
+    SHARD_DEFAULT_REGION = 'sea'
+    SHARD_REGIONS = {}
+    SHARD_FANOUT_MAX_WORKERS = 4         # Parallel queries at once (cross-region endpoints, /api/bootstrap)
+    
+    # Database Failures (connection, overload and lock errors)
+    DB_READ_RETRIES = 2                  # Extra attempts for reads; writes are never retried
+    DB_RETRY_BASE_SECONDS = 0.05         # Backoff before retry n is random in [0, base * 2**n]
+    DB_RETRY_MAX_SECONDS = 0.5
+    DB_CIRCUIT_ENABLED = True
+    DB_CIRCUIT_FAILURE_THRESHOLD = 5     # Consecutive failures that open the circuit
+    DB_CIRCUIT_OPEN_SECONDS = 10         # Answer 503 without querying for this long, then try once
     
     # JWT Settings
     JWT_EXPIRATION_HOURS = 24
     
+    # Credentials (users table with bcrypt hashes)
+    BCRYPT_ROUNDS = 12
+    # Built-in admin that works without the users table; replace the hash in production
+    # (generate one with: flask users hash-password)
+    BOOTSTRAP_ADMIN_USERNAME = 'admin'
+    BOOTSTRAP_ADMIN_PASSWORD_HASH = '$2b$12$3FKNanyPDJAX.CO4x1fkB.vztH4UK495QkLK4QN7rjunQIhGhuGXO'
+    LOGIN_TOKEN_REUSE_SECONDS = 300      # Repeat logins within this window get the same token
+    LOGIN_TOKEN_CACHE_MAX_ENTRIES = 4096
+    LOGIN_MAX_CONCURRENT_HASHES = 4      # bcrypt checks running at once per process
+    LOGIN_HASH_WAIT_SECONDS = 1.0        # Wait this long for a slot, then answer 503
+    
+    # Coalesce identical concurrent reads into one query
+    DB_SINGLE_FLIGHT_ENABLED = True
+    
+    # Keep repository query results in-process (cleared on writes)
+    DB_RESULT_CACHE_ENABLED = True
+    DB_RESULT_CACHE_SECONDS = 60
+    DB_RESULT_CACHE_MAX_ENTRIES = 1024
+    
+    # In-memory Hero Indexes (role/specialty listings, search, autocomplete, similar heroes)
+    # Writes in this process update them at once; this catches other workers' and direct DB writes
+    LIVE_INDEX_CHECK_SECONDS = 15        # Compare the catalog version this often, rebuild if it changed (0 = off)
+    
+    # Background Jobs (cache warm-up after startup, periodic refresh)
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_MAX_CONCURRENT_JOBS = 2    # Background jobs running at once (DB connections they hold)
+    SCHEDULER_REFRESH_SECONDS = 45       # Re-run warm-up jobs before DB_RESULT_CACHE_SECONDS runs out
+    
+    # Health Probes (GET /api/health/live, /api/health/ready)
+    HEALTH_CACHE_SECONDS = 2             # Reuse a readiness result for this long
+    HEALTH_DB_MAX_LATENCY_MS = 250       # Slower SELECT 1 round trips drain the node
+    HEALTH_MAX_POOL_SATURATION = 1.0     # Replica connections in use / pool size
+    HEALTH_MAX_IN_FLIGHT_REQUESTS = 64   # Per worker process
+    HEALTH_MAX_JOB_WAIT_SECONDS = 60     # Longest a due background job may wait for a worker
+    HEALTH_REQUIRE_WARM_CACHE = True     # Not ready until warm-up jobs succeed (when the scheduler runs)
+    
+    # Tracing (spans for auth, MySQL and serialization, exported as OTLP/JSON)
+    TRACING_ENABLED = True
+    TRACE_SAMPLE_RATE = 0.01             # Share of requests traced when no traceparent decides
+    TRACE_RESPECT_PARENT = True          # Follow the sampled flag of an incoming traceparent
+    TRACE_EXPORTER = 'file'              # or 'otlp' to POST to a collector
+    TRACE_FILE_PATH = 'traces.jsonl'
+    TRACE_OTLP_ENDPOINT = 'http://localhost:4318/v1/traces'
+    TRACE_SERVICE_NAME = 'mlbb-api'
+    TRACE_QUEUE_SIZE = 2048              # Spans waiting for export; more are dropped
+    TRACE_EXPORT_INTERVAL_SECONDS = 5
+    
+    # Profiling (GET /api/admin/profile, admin tokens only)
+    PROFILER_INTERVAL_MS = 10            # Stack sample period
+    PROFILER_MAX_SECONDS = 60            # Longest on-demand capture
+    PROFILER_CONTINUOUS_SECONDS = 0      # Write a profile to PROFILER_OUTPUT_DIR this often (0 = off)
+    PROFILER_CONTINUOUS_DURATION = 10    # Length of each periodic capture
+    PROFILER_OUTPUT_DIR = 'profiles'
+    
+    # Response Caching
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_MAX_ENTRIES = 512
+    
+    # Rate Limiting (token buckets per JWT user and per client IP)
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_BACKEND = 'memory'        # or 'sqlite' to share buckets between local workers
+    RATE_LIMIT_SQLITE_PATH = 'ratelimit.sqlite3'
+    RATE_LIMIT_MAX_BUCKETS = 10000
+    # Per pool and identity: (bucket capacity, tokens refilled per second)
+    RATE_LIMITS = {
+        'default': {'user': (120, 2.0), 'ip': (240, 4.0)},
+        'expensive': {'user': (30, 0.5), 'ip': (60, 1.0)},
+        # Login attempts that need a password hash, per IP and per attempted username
+        'login': {'user': (5, 0.05), 'ip': (20, 0.2)}
+    }
+    
+    # Idempotency Keys (POST /api/heroes and /api/hero-stats with an Idempotency-Key header)
+    IDEMPOTENCY_ENABLED = True
+    IDEMPOTENCY_BACKEND = 'memory'       # or 'mysql' to share keys between workers (idempotency_keys table)
+    IDEMPOTENCY_TTL_SECONDS = 86400      # How long a stored response can be replayed
+    IDEMPOTENCY_PENDING_SECONDS = 60     # A claim by a request that never finished expires after this
+    IDEMPOTENCY_MAX_ENTRIES = 10000      # Memory backend only
+    
+    # Change Feed (GET /api/changes)
+    CHANGE_FEED_ENABLED = False          # Log hero / hero stats writes to the changes table (create it first)
+    CHANGES_MAX_WAIT_SECONDS = 30        # Longest long-poll
+    CHANGES_POLL_SECONDS = 1             # How often a waiting client checks for other workers' changes
+    CHANGES_STREAM_SECONDS = 300         # SSE streams end after this long; clients reconnect with Last-Event-ID
+    CHANGES_RETENTION_DAYS = 7
+    
+    # Catalog Snapshot (serve catalog reads from a memory-mapped file, no DB)
+    SNAPSHOT_SERVING = False
+    SNAPSHOT_PATH = 'catalog.snapshot'
+    SNAPSHOT_CHECK_SECONDS = 5           # How often workers look for a newly published file
+    SNAPSHOT_BUILD_SECONDS = 0           # Rebuild interval of the scheduled builder job (0 = off)
+    
     # API Settings
     DEBUG = True
     PORT = 5000
\ No newline at end of file
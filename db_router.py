@@ -0,0 +1,326 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from queue import LifoQueue, Empty, Full
+import MySQLdb
+from MySQLdb import cursors
+from flask import g, request, has_request_context
+
+# Cookie telling any worker that this client wrote recently
+PRIMARY_COOKIE = 'mlbb_primary_until'
+
+# Set by ReplicaRouter.worker() on a request's worker threads, which have no request of their own
+_in_worker = ContextVar('in_worker', default=False)
+_worker_reads_primary = ContextVar('worker_reads_primary', default=False)
+
+# ==================== CONNECTION POOL ====================
+
+def connect_kwargs(config, server=None):
+    """
+    MySQLdb.connect() arguments for a server, defaulting to the MYSQL_* settings.
+
+    Args:
+        config: App config
+        server: Optional dict overriding host, port, user, password and db
+    """
+    server = server or {}
+    return {
+        'host': server.get('host', config.get('MYSQL_HOST')),
+        'port': server.get('port', config.get('MYSQL_PORT', 3306)),
+        'user': server.get('user', config.get('MYSQL_USER')),
+        'passwd': server.get('password', config.get('MYSQL_PASSWORD')),
+        'db': server.get('db', config.get('MYSQL_DB')),
+        'cursorclass': getattr(cursors, config.get('MYSQL_CURSORCLASS') or 'Cursor')
+    }
+
+class ConnectionPool:
+    """Keeps idle MySQL connections to one server for reuse across requests"""
+
+    def __init__(self, connect_kwargs, size):
+        self.connect_kwargs = connect_kwargs
+        self.size = size
+        self.in_use = 0
+        self._idle = LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Checks out a live connection, reusing an idle one when possible.
+
+        Raises:
+            MySQLdb.Error: If no connection to the server can be opened
+        """
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            conn = None
+
+        if conn is not None:
+            try:
+                conn.ping()
+            except MySQLdb.Error:
+                self._close(conn)
+                conn = None
+
+        if conn is None:
+            conn = MySQLdb.connect(**self.connect_kwargs)
+
+        with self._lock:
+            self.in_use += 1
+        return conn
+
+    def release(self, conn, broken=False):
+        """Returns a connection to the pool, or closes it if it is broken or the pool is full"""
+        with self._lock:
+            self.in_use -= 1
+
+        if not broken:
+            # End any open transaction, so the next user does not read its old snapshot
+            try:
+                conn.rollback()
+            except MySQLdb.Error:
+                broken = True
+
+        if broken:
+            self._close(conn)
+            return
+
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            self._close(conn)
+
+    def idle_count(self):
+        return self._idle.qsize()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+class Endpoint:
+    """A database server with its pool and health state"""
+
+    def __init__(self, name, connect_kwargs, pool_size):
+        self.name = name
+        self.pool = ConnectionPool(connect_kwargs, pool_size)
+        self.down_until = 0.0
+
+    def is_healthy(self):
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, seconds):
+        self.down_until = time.monotonic() + seconds
+
+# ==================== READ/WRITE ROUTER ====================
+
+class ReplicaRouter:
+    """
+    Sends reads to replicas and leaves writes on the primary.
+
+    The primary is the Flask-MySQLdb connection; worker threads of a
+    request take primary connections from a pool instead. Replicas come from
+    MYSQL_REPLICAS and are chosen round-robin or by least connections,
+    skipping any replica whose last connection attempt failed within
+    DB_REPLICA_RETRY_SECONDS. After a client writes, its reads stay on the
+    primary for DB_READ_YOUR_WRITES_SECONDS, so it always sees its own
+    changes even while replicas lag.
+    """
+
+    def __init__(self):
+        self.replicas = []
+        self.primary = None
+        self.strategy = 'round_robin'
+        self.retry_seconds = 30
+        self.read_your_writes_seconds = 5
+        self._counter = itertools.count()
+        self._recent_writes = {}
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configures replicas from app.config and hooks request teardown"""
+        config = app.config
+        self.strategy = config.get('DB_REPLICA_STRATEGY', 'round_robin')
+        self.retry_seconds = config.get('DB_REPLICA_RETRY_SECONDS', 30)
+        self.read_your_writes_seconds = config.get('DB_READ_YOUR_WRITES_SECONDS', 5)
+
+        self.primary = ConnectionPool(connect_kwargs(config), config.get('DB_POOL_SIZE', 10))
+        self.replicas = []
+        for i, replica in enumerate(config.get('MYSQL_REPLICAS', [])):
+            name = replica.get('name', f'replica-{i + 1}')
+            self.replicas.append(Endpoint(name, connect_kwargs(config, replica), config.get('DB_POOL_SIZE', 10)))
+
+        app.teardown_appcontext(self.release)
+        app.after_request(self._remember_write)
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    # -------------------- replica selection --------------------
+
+    def _candidates(self):
+        healthy = [endpoint for endpoint in self.replicas if endpoint.is_healthy()]
+
+        if self.strategy == 'least_connections':
+            return sorted(healthy, key=lambda endpoint: endpoint.pool.in_use)
+
+        if not healthy:
+            return []
+        start = next(self._counter) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def read_connection(self):
+        """
+        Returns this request's replica connection, or None to read from the primary.
+
+        The replica connection is checked out once per request and
+        returned to its pool at teardown.
+        """
+        if not self.enabled or self.must_read_primary():
+            return None
+
+        if 'db_replica' in g:
+            return g.db_replica[1]
+
+        for endpoint in self._candidates():
+            try:
+                conn = endpoint.pool.acquire()
+            except MySQLdb.Error:
+                endpoint.mark_down(self.retry_seconds)
+                continue
+
+            g.db_replica = (endpoint, conn)
+            return conn
+
+        return None
+
+    def primary_connection(self):
+        """
+        Returns a worker thread's pooled primary connection, or None outside a worker.
+
+        Requests use the Flask-MySQLdb connection, which is opened and
+        closed with each app context; workers run many short app contexts,
+        so they check a connection out of the primary pool once per app
+        context and return it at teardown.
+        """
+        if not _in_worker.get() or self.primary is None:
+            return None
+
+        if 'db_primary' not in g:
+            g.db_primary = self.primary.acquire()
+        return g.db_primary
+
+    def discard(self, conn):
+        """
+        Closes this app context's replica or pooled primary connection if it is `conn`.
+
+        The next query checks out a fresh connection.
+
+        Returns:
+            True if `conn` was a pooled connection
+        """
+        replica = g.get('db_replica')
+        if replica is not None and replica[1] is conn:
+            endpoint, conn = g.pop('db_replica')
+            endpoint.pool.release(conn, broken=True)
+            return True
+
+        if g.get('db_primary') is conn:
+            self.primary.release(g.pop('db_primary'), broken=True)
+            return True
+        return False
+
+    def release(self, exc=None):
+        replica = g.pop('db_replica', None)
+        if replica is not None:
+            endpoint, conn = replica
+            endpoint.pool.release(conn, broken=exc is not None)
+
+        primary = g.pop('db_primary', None)
+        if primary is not None:
+            self.primary.release(primary, broken=exc is not None)
+
+    @contextmanager
+    def worker(self, read_primary=False):
+        """
+        Runs the block as a worker thread of a request (see ShardRouter.gather()).
+
+        Args:
+            read_primary: The request must read from the primary (it wrote
+                recently), so the worker's reads must too
+        """
+        worker_token = _in_worker.set(True)
+        primary_token = _worker_reads_primary.set(read_primary)
+        try:
+            yield
+        finally:
+            _worker_reads_primary.reset(primary_token)
+            _in_worker.reset(worker_token)
+
+    # -------------------- read-your-writes --------------------
+
+    def _client_key(self):
+        return g.get('current_user') or request.remote_addr
+
+    def note_write(self):
+        """Pins the current client's reads to the primary for a short window"""
+        if not self.enabled or not has_request_context():
+            return
+
+        g.db_wrote = True
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[self._client_key()] = now + self.read_your_writes_seconds
+            # Clients that write and never read again would otherwise stay forever
+            if now >= self._next_prune:
+                self._recent_writes = {key: until for key, until in self._recent_writes.items() if until > now}
+                self._next_prune = now + self.read_your_writes_seconds
+
+    def must_read_primary(self):
+        """True if the current client wrote recently and must read from the primary"""
+        if not self.enabled:
+            return False
+
+        # Workers have no request to look at, so they carry the request's answer
+        if _worker_reads_primary.get():
+            return True
+
+        if not has_request_context():
+            return False
+
+        if g.get('db_wrote'):
+            return True
+
+        try:
+            if float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+
+        key = self._client_key()
+        with self._lock:
+            until = self._recent_writes.get(key)
+            if until is None:
+                return False
+            if until > time.monotonic():
+                return True
+            del self._recent_writes[key]
+            return False
+
+    def _remember_write(self, response):
+        # The cookie carries the stickiness to other worker processes
+        if g.get('db_wrote'):
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(time.time() + self.read_your_writes_seconds),
+                max_age=self.read_your_writes_seconds,
+                httponly=True
+            )
+        return response
+
+db_router = ReplicaRouter()
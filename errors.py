@@ -0,0 +1,232 @@
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+import MySQLdb
+from flask import current_app, make_response
+from werkzeug.exceptions import HTTPException
+from utils import format_response
+
+# ==================== CLASSIFICATION ====================
+
+# The connection is unusable and must not go back to a pool
+CONNECTION_ERRORS = {
+    2002,  # CR_CONNECTION_ERROR
+    2003,  # CR_CONN_HOST_ERROR
+    2006,  # CR_SERVER_GONE_ERROR
+    2013,  # CR_SERVER_LOST
+    2055,  # CR_SERVER_LOST_EXTENDED
+    1053,  # ER_SERVER_SHUTDOWN
+    4031   # ER_CLIENT_INTERACTION_TIMEOUT
+}
+
+# The server is up but refuses more work
+OVERLOAD_ERRORS = {
+    1040,  # ER_CON_COUNT_ERROR (too many connections)
+    1203,  # ER_TOO_MANY_USER_CONNECTIONS
+    1226,  # ER_USER_LIMIT_REACHED
+    3024   # ER_QUERY_TIMEOUT (max_execution_time exceeded)
+}
+
+# The statement lost a race for row locks and was rolled back
+CONTENTION_ERRORS = {
+    1205,  # ER_LOCK_WAIT_TIMEOUT
+    1213   # ER_LOCK_DEADLOCK
+}
+
+def classify(error):
+    """
+    Sorts a database error by what the caller can do about it.
+
+    Returns:
+        'connection' (reconnect), 'overload' (back off), 'contention'
+        (try again), or None for errors retrying cannot fix, such as SQL
+        syntax or constraint violations
+    """
+    if isinstance(error, MySQLdb.InterfaceError):
+        # Raised when using a connection that is already closed
+        return 'connection'
+    if not isinstance(error, MySQLdb.Error):
+        return None
+
+    code = error.args[0] if error.args and isinstance(error.args[0], int) else None
+    if code in CONNECTION_ERRORS:
+        return 'connection'
+    if code in OVERLOAD_ERRORS:
+        return 'overload'
+    if code in CONTENTION_ERRORS:
+        return 'contention'
+    return None
+
+class DatabaseUnavailable(Exception):
+    """The database is failing or saturated; answered with 503 and Retry-After"""
+
+    def __init__(self, message='Database unavailable, try again shortly', retry_after=1):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+def is_unavailable(error):
+    """True for errors that mean the database could not serve the request right now"""
+    return isinstance(error, DatabaseUnavailable) or classify(error) is not None
+
+# ==================== CIRCUIT BREAKER ====================
+
+class CircuitBreaker:
+    """
+    Stops sending queries to a database that keeps failing.
+
+    After DB_CIRCUIT_FAILURE_THRESHOLD consecutive connection or overload
+    errors the circuit opens: queries fail fast with DatabaseUnavailable
+    for DB_CIRCUIT_OPEN_SECONDS instead of piling onto a server that is
+    down or out of connections. Then a single trial query is let through;
+    if it succeeds the circuit closes, otherwise it opens again.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.open_until = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'open' if time.monotonic() < self.open_until else 'half_open'
+
+    def before(self):
+        """
+        Admits a query or raises DatabaseUnavailable while the circuit is open.
+
+        Returns:
+            True if the query is the half-open trial
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+
+            now = time.monotonic()
+            if now < self.open_until or self._trial:
+                retry_after = max(1, math.ceil(self.open_until - now))
+                raise DatabaseUnavailable(retry_after=retry_after)
+
+            self._trial = True
+            return True
+
+    def record_success(self, trial=False):
+        with self._lock:
+            if trial:
+                self._trial = False
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, threshold, open_seconds, trial=False):
+        with self._lock:
+            if trial:
+                self._trial = False
+            self.failures += 1
+            if trial or self.failures >= threshold:
+                now = time.monotonic()
+                self.opened_at = self.opened_at or now
+                self.open_until = now + open_seconds
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.open_until = 0.0
+            self._trial = False
+
+    @contextmanager
+    def guard(self):
+        """Runs a block of database work, counting its outcome toward the circuit"""
+        config = current_app.config
+        if not config.get('DB_CIRCUIT_ENABLED'):
+            yield
+            return
+
+        trial = self.before()
+        try:
+            yield
+        except Exception as e:
+            if classify(e) in ('connection', 'overload'):
+                self.record_failure(
+                    config['DB_CIRCUIT_FAILURE_THRESHOLD'],
+                    config['DB_CIRCUIT_OPEN_SECONDS'],
+                    trial
+                )
+            else:
+                # The server answered, so it is reachable
+                self.record_success(trial)
+            raise
+        else:
+            self.record_success(trial)
+
+circuit_breaker = CircuitBreaker()
+
+# ==================== RETRIES ====================
+
+def retry_read(fn):
+    """
+    Calls a read-only `fn`, retrying transient database errors.
+
+    Connection, overload and lock errors are retried up to
+    DB_READ_RETRIES more times, sleeping a random time between 0 and
+    min(DB_RETRY_MAX_SECONDS, DB_RETRY_BASE_SECONDS * 2**attempt) so
+    retrying workers do not hit the server in lockstep. Only use this for
+    statements that are safe to run twice.
+    """
+    config = current_app.config
+    retries = config.get('DB_READ_RETRIES', 0)
+    base = config.get('DB_RETRY_BASE_SECONDS', 0.05)
+    cap = config.get('DB_RETRY_MAX_SECONDS', 0.5)
+
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except MySQLdb.Error as e:
+            if attempt == retries or classify(e) is None:
+                raise
+            current_app.logger.warning('Retrying read after %s (attempt %d of %d)', e, attempt + 1, retries)
+            time.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+# ==================== ERROR HANDLERS ====================
+
+def _unavailable_response(message, retry_after):
+    response = make_response(format_response({'error': message, 'retry_after': retry_after}, 503))
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def register_error_handlers(app):
+    """
+    Turns exceptions raised by views into JSON (or XML) error responses.
+
+    Database outages and saturation become 503 with Retry-After so clients
+    back off and retry; anything else is logged and answered with a
+    generic 500 that does not leak driver messages.
+    """
+
+    @app.errorhandler(DatabaseUnavailable)
+    def database_unavailable(e):
+        return _unavailable_response(e.message, e.retry_after)
+
+    @app.errorhandler(MySQLdb.Error)
+    def database_error(e):
+        if classify(e) is not None:
+            app.logger.warning('Database unavailable: %s', e)
+            return _unavailable_response('Database unavailable, try again shortly', 1)
+
+        app.logger.exception('Database error')
+        return format_response({'error': 'Database error'}, 500)
+
+    @app.errorhandler(Exception)
+    def unexpected_error(e):
+        if isinstance(e, HTTPException):
+            return e
+
+        app.logger.exception('Unhandled error')
+        return format_response({'error': 'Internal server error'}, 500)
@@ -0,0 +1,176 @@
+import datetime
+import threading
+import time
+from flask import current_app, g, request
+from db_router import db_router
+from errors import circuit_breaker
+from repositories import get_cursor, read_flight
+from scheduler import scheduler
+from singleflight import SingleFlight
+
+# ==================== CHECKS ====================
+
+def _check_database(config):
+    """Round trip of SELECT 1 on the primary, unless the circuit breaker is open"""
+    state = circuit_breaker.state
+    max_latency_ms = config['HEALTH_DB_MAX_LATENCY_MS']
+
+    if state == 'open':
+        return {'ok': False, 'circuit': state, 'error': 'Circuit breaker open'}
+
+    started = time.perf_counter()
+    try:
+        with get_cursor() as cur:
+            cur.execute("SELECT 1")
+            cur.fetchone()
+    except Exception as e:
+        return {'ok': False, 'circuit': circuit_breaker.state, 'error': str(e)}
+
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    return {
+        'ok': latency_ms <= max_latency_ms,
+        'circuit': state,
+        'latency_ms': latency_ms,
+        'max_latency_ms': max_latency_ms
+    }
+
+def _check_replicas(config):
+    """
+    Replica pool usage.
+
+    Reads fall back to the primary when no replica is healthy, so only
+    saturating every healthy replica pool makes the node unready.
+    """
+    max_saturation = config['HEALTH_MAX_POOL_SATURATION']
+    endpoints = []
+
+    for endpoint in db_router.replicas:
+        pool = endpoint.pool
+        endpoints.append({
+            'name': endpoint.name,
+            'healthy': endpoint.is_healthy(),
+            'in_use': pool.in_use,
+            'idle': pool.idle_count(),
+            'size': pool.size,
+            'saturation': round(pool.in_use / pool.size, 2) if pool.size else 0.0
+        })
+
+    healthy = [endpoint for endpoint in endpoints if endpoint['healthy']]
+    saturated = bool(healthy) and all(endpoint['saturation'] >= max_saturation for endpoint in healthy)
+    return {'ok': not saturated, 'endpoints': endpoints}
+
+def _check_cache(config):
+    """Warm-up jobs have filled the caches (only required while the scheduler runs)"""
+    required = bool(config.get('SCHEDULER_ENABLED') and config.get('HEALTH_REQUIRE_WARM_CACHE'))
+    warmed_up = scheduler.warmed_up()
+    return {'ok': warmed_up or not required, 'warmed_up': warmed_up, 'required': required}
+
+def _check_queues(config, requests_in_flight):
+    """Work waiting in this worker: requests, coalesced reads and background jobs"""
+    jobs_waiting, oldest_job_wait = scheduler.queue_depth()
+    max_requests = config['HEALTH_MAX_IN_FLIGHT_REQUESTS']
+    max_job_wait = config['HEALTH_MAX_JOB_WAIT_SECONDS']
+
+    return {
+        'ok': requests_in_flight <= max_requests and oldest_job_wait <= max_job_wait,
+        'requests_in_flight': requests_in_flight,
+        'max_requests_in_flight': max_requests,
+        'db_reads_in_flight': read_flight.in_flight(),
+        'jobs_waiting': jobs_waiting,
+        'oldest_job_wait_seconds': oldest_job_wait
+    }
+
+# ==================== MONITOR ====================
+
+def long_lived(f):
+    """
+    Marks a view that holds its request open on purpose (long-poll, SSE).
+
+    Its requests are idle clients rather than queued work, so they are
+    not counted as in flight. Usage: directly below @bp.route().
+    """
+    f.health_long_lived = True
+    return f
+
+class HealthMonitor:
+    """
+    Liveness and readiness of this worker.
+
+    Liveness only says the process answers requests. Readiness runs the
+    dependency checks above; a node that is slow to reach MySQL, has its
+    pools saturated, is still warming its caches or has too much queued
+    work answers 503 so the load balancer drains it. Probe results are
+    kept for HEALTH_CACHE_SECONDS and concurrent probes share one run, so
+    frequent probing costs at most one SELECT 1 per interval.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._last = None
+
+    def init_app(self, app):
+        app.before_request(self._request_started)
+        app.teardown_request(self._request_finished)
+
+    def _request_started(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'health_long_lived', False):
+            return
+        with self._lock:
+            self.in_flight += 1
+        g.health_counted = True
+
+    def _request_finished(self, exc=None):
+        if g.pop('health_counted', False):
+            with self._lock:
+                self.in_flight -= 1
+
+    def live(self):
+        return {
+            'status': 'alive',
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'timestamp': datetime.datetime.utcnow().isoformat()
+        }
+
+    def _probe(self):
+        config = current_app.config
+        # The probe request itself is in flight too
+        requests_in_flight = max(0, self.in_flight - 1)
+
+        checks = {
+            'database': _check_database(config),
+            'replicas': _check_replicas(config),
+            'cache': _check_cache(config),
+            'queues': _check_queues(config, requests_in_flight)
+        }
+        result = {
+            'status': 'ready' if all(check['ok'] for check in checks.values()) else 'not_ready',
+            'checked_at': datetime.datetime.utcnow().isoformat(),
+            'checks': checks
+        }
+        self._last = (time.monotonic(), result)
+        return result
+
+    def ready(self):
+        """
+        Returns the latest readiness result, probing again once it is older
+        than HEALTH_CACHE_SECONDS.
+
+        Returns:
+            (result dictionary, age of the result in seconds)
+        """
+        last = self._last
+        if last is not None:
+            age = time.monotonic() - last[0]
+            if age < current_app.config['HEALTH_CACHE_SECONDS']:
+                return last[1], round(age, 3)
+
+        return self._flight.do('ready', self._probe), 0.0
+
+    def reset(self):
+        self._last = None
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,135 @@
+import threading
+from live_index import LiveIndex
+from models import RoleHero, SpecialtyHero, HeroSummary
+
+def _positions(bits):
+    """Yields the positions of the set bits, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class HeroIndex:
+    """
+    Inverted index from role and specialty IDs to heroes.
+
+    Every hero gets a fixed slot; each role and specialty maps to a
+    bitset (a Python int) with the bits of its heroes' slots set. A
+    listing is one dict lookup, a combined filter is a bitwise OR per
+    filter and an AND across filters, and the matching heroes come from
+    the in-memory records, so none of it queries MySQL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built = False
+        self._records = []
+        self._slots = {}
+        self._roles = {}
+        self._specialties = {}
+
+    def build(self, records):
+        """
+        Builds the index from catalog records.
+
+        Args:
+            records: HeroRecord rows (HeroRepository.list_records())
+        """
+        records = sorted(records, key=lambda record: record.idHEROES)
+        roles = {}
+        specialties = {}
+
+        for slot, record in enumerate(records):
+            if record.role_name is not None:
+                roles[record.role_id] = roles.get(record.role_id, 0) | 1 << slot
+            if record.specialty_name is not None:
+                specialties[record.specialty_id] = specialties.get(record.specialty_id, 0) | 1 << slot
+
+        with self._lock:
+            self._records = records
+            self._slots = {record.idHEROES: slot for slot, record in enumerate(records)}
+            self._roles = roles
+            self._specialties = specialties
+            self.built = True
+
+    def _clear(self, slot):
+        record = self._records[slot]
+        mask = ~(1 << slot)
+        for bitsets, key in ((self._roles, record.role_id), (self._specialties, record.specialty_id)):
+            if key in bitsets:
+                bitsets[key] &= mask
+
+    def upsert(self, record):
+        """Adds or replaces one hero, moving it between role/specialty sets as needed"""
+        with self._lock:
+            slot = self._slots.get(record.idHEROES)
+            if slot is None:
+                slot = len(self._records)
+                self._records.append(record)
+                self._slots[record.idHEROES] = slot
+            else:
+                self._clear(slot)
+                self._records[slot] = record
+
+            if record.role_name is not None:
+                self._roles[record.role_id] = self._roles.get(record.role_id, 0) | 1 << slot
+            if record.specialty_name is not None:
+                self._specialties[record.specialty_id] = self._specialties.get(record.specialty_id, 0) | 1 << slot
+
+    def remove(self, hero_id):
+        """Drops a hero; its slot stays empty until the next build"""
+        with self._lock:
+            slot = self._slots.pop(hero_id, None)
+            if slot is not None:
+                self._clear(slot)
+                self._records[slot] = None
+
+    def _match(self, bitsets, ids):
+        bits = 0
+        for key in ids:
+            bits |= bitsets.get(key, 0)
+        return bits
+
+    def heroes(self, role_ids=None, specialty_ids=None):
+        """
+        Returns the heroes matching every given filter, ordered by ID.
+
+        Args:
+            role_ids: Heroes with any of these roles (None = any role)
+            specialty_ids: Heroes with any of these specialties (None = any specialty)
+
+        Returns:
+            List of HeroRecord
+        """
+        with self._lock:
+            bits = (1 << len(self._records)) - 1
+            if role_ids is not None:
+                bits &= self._match(self._roles, role_ids)
+            if specialty_ids is not None:
+                bits &= self._match(self._specialties, specialty_ids)
+
+            return [
+                self._records[slot] for slot in _positions(bits)
+                if self._records[slot] is not None
+            ]
+
+_live = LiveIndex(HeroIndex)
+# The default region's index
+hero_index = _live.default
+ensure_built = _live.ensure_built
+rebuild = _live.rebuild
+
+def role_heroes(role_id):
+    """All heroes with a role, like RoleRepository.list_heroes()"""
+    index = ensure_built()
+    return [record.project(RoleHero) for record in index.heroes(role_ids=[role_id])]
+
+def specialty_heroes(specialty_id):
+    """All heroes with a specialty"""
+    index = ensure_built()
+    return [record.project(SpecialtyHero) for record in index.heroes(specialty_ids=[specialty_id])]
+
+def filter_heroes(role_ids=None, specialty_ids=None):
+    """Heroes with any of `role_ids` AND any of `specialty_ids`"""
+    index = ensure_built()
+    return [record.project(HeroSummary) for record in index.heroes(role_ids, specialty_ids)]
@@ -0,0 +1,220 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response, g
+from repositories import idempotency_repository, commit_count
+from singleflight import SingleFlight
+from utils import format_response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+class StoredResponse:
+    """A response kept for replay; `status` is None while the first request runs"""
+    __slots__ = ('fingerprint', 'status', 'content_type', 'body')
+
+    def __init__(self, fingerprint, status=None, content_type=None, body=None):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+
+# ==================== STORES ====================
+
+class MemoryIdempotencyStore:
+    """
+    Stored responses in a bounded in-process dict (one per worker process).
+
+    Entries expire after their TTL; the oldest are dropped first once
+    `max_entries` is exceeded.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._entries:
+            key, (expires_at, stored) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            return entry[1]
+
+    def claim(self, key, fingerprint, seconds):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._entries.pop(key, None)
+            self._entries[key] = (now + seconds, StoredResponse(fingerprint))
+            self._evict(now)
+            return True
+
+    def complete(self, key, stored, seconds):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + seconds, stored)
+
+    def release(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+class MySQLIdempotencyStore:
+    """Stored responses in the idempotency_keys table, shared by all workers"""
+
+    def get(self, key):
+        row = idempotency_repository.get(key)
+        if row is None:
+            return None
+        body = row['body']
+        return StoredResponse(
+            row['fingerprint'],
+            row['status_code'],
+            row['content_type'],
+            bytes(body) if body is not None else None
+        )
+
+    def claim(self, key, fingerprint, seconds):
+        return idempotency_repository.claim(key, fingerprint, seconds)
+
+    def complete(self, key, stored, seconds):
+        idempotency_repository.complete(key, stored.status, stored.content_type, stored.body, seconds)
+
+    def release(self, key):
+        idempotency_repository.release(key)
+
+# ==================== IDEMPOTENCY ====================
+
+class Idempotency:
+    """
+    Replays the stored response of a POST retried with the same Idempotency-Key.
+
+    Keys are scoped to the JWT user. The first request with a key claims
+    it, runs the view and stores the response for IDEMPOTENCY_TTL_SECONDS;
+    a retry gets that response back without running the view again.
+    Concurrent duplicates in one worker wait for the first and share its
+    response; a duplicate arriving at another worker while the first is
+    still running gets 409 (MySQL backend). A failed request releases its
+    key for the retry only if it committed nothing; otherwise the failure
+    is stored like any other response.
+    """
+
+    def __init__(self):
+        self.store = MemoryIdempotencyStore()
+        self.flight = SingleFlight()
+
+    def init_app(self, app):
+        if app.config.get('IDEMPOTENCY_BACKEND') == 'mysql':
+            self.store = MySQLIdempotencyStore()
+        else:
+            self.store = MemoryIdempotencyStore(app.config.get('IDEMPOTENCY_MAX_ENTRIES', 10000))
+
+    def run(self, key, fingerprint, view):
+        """
+        Runs `view` once for `key`, or returns the response stored for it.
+
+        Returns:
+            StoredResponse (status None if another worker is still running it)
+        """
+        config = current_app.config
+
+        stored = self.store.get(key)
+        if stored is not None:
+            return stored
+
+        if not self.store.claim(key, fingerprint, config['IDEMPOTENCY_PENDING_SECONDS']):
+            return self.store.get(key) or StoredResponse(fingerprint)
+
+        commits = commit_count()
+        try:
+            response = make_response(view())
+        except Exception:
+            if commit_count() == commits:
+                self.store.release(key)
+            else:
+                # The write is committed, so a retry must not run it again
+                failed = make_response(format_response({
+                    'error': 'The request was applied, but its response could not be produced'
+                }, 500))
+                self.store.complete(key, self._stored(fingerprint, failed), config['IDEMPOTENCY_TTL_SECONDS'])
+            raise
+
+        stored = self._stored(fingerprint, response)
+        failed = response.status_code >= 500 or response.status_code == 429
+        if failed and commit_count() == commits:
+            # Nothing was written; let the client's retry run again
+            self.store.release(key)
+        else:
+            self.store.complete(key, stored, config['IDEMPOTENCY_TTL_SECONDS'])
+        return stored
+
+    @staticmethod
+    def _stored(fingerprint, response):
+        return StoredResponse(fingerprint, response.status_code, response.content_type, response.get_data())
+
+idempotency = Idempotency()
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.full_path}\n'.encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def idempotent(f):
+    """
+    Decorator honoring an Idempotency-Key header on a create endpoint.
+
+    Replayed responses carry Idempotent-Replayed: true. Reusing a key for
+    a different request body or URL gets 422.
+
+    Usage: @idempotent below @rate_limit, so retries still count against
+    the client's rate limit.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or not current_app.config.get('IDEMPOTENCY_ENABLED'):
+            return f(*args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return format_response({'error': f'{HEADER} must be 1-{MAX_KEY_LENGTH} characters'}, 400)
+
+        scoped_key = f"{g.get('current_user') or request.remote_addr}:{key}"
+        fingerprint = _fingerprint()
+        ran = []
+
+        def view():
+            ran.append(True)
+            return f(*args, **kwargs)
+
+        stored = idempotency.flight.do(scoped_key, lambda: idempotency.run(scoped_key, fingerprint, view))
+
+        if stored.fingerprint != fingerprint:
+            return format_response({'error': f'{HEADER} was already used for a different request'}, 422)
+
+        if stored.status is None:
+            response = make_response(format_response({
+                'error': f'A request with this {HEADER} is still in progress'
+            }, 409))
+            response.headers['Retry-After'] = '1'
+            return response
+
+        response = make_response(stored.body, stored.status)
+        response.content_type = stored.content_type
+        if not ran:
+            response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    return decorated
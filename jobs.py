@@ -0,0 +1,89 @@
+from catalog_io import build_snapshot
+from repositories import (
+    hero_repository, role_repository, specialty_repository, stats_repository, change_repository,
+    idempotency_repository, refresh_reads
+)
+from profiler import write_profile
+from ratelimit import rate_limiter
+from scheduler import scheduler
+import hero_index
+import search_index
+import autocomplete
+import similarity
+
+# ==================== WARM-UP JOBS ====================
+
+def warm_catalog():
+    """Loads the joined hero catalog and the lookup tables into the result cache"""
+    with refresh_reads():
+        hero_repository.list_all()
+        role_repository.list_all()
+        specialty_repository.list_all()
+        stats_repository.list_hero_stats()
+
+def warm_hero_index():
+    """Rebuilds the role/specialty hero index, picking up writes made by other processes"""
+    hero_index.rebuild()
+
+def warm_search_index():
+    """Rebuilds the hero search index, picking up writes made by other processes"""
+    search_index.rebuild()
+
+def warm_autocomplete():
+    """Rebuilds the hero name/origin completions, picking up writes made by other processes"""
+    autocomplete.rebuild()
+
+def warm_similarity():
+    """Rebuilds the similar-heroes index, picking up writes made by other processes"""
+    similarity.rebuild()
+
+# ==================== MAINTENANCE JOBS ====================
+
+def prune_changes(days):
+    change_repository.prune(days)
+
+def init_jobs(app):
+    """
+    Registers the background jobs and starts the scheduler when SCHEDULER_ENABLED.
+
+    Warm-up jobs run right after startup and then every
+    SCHEDULER_REFRESH_SECONDS, so hot reads are refreshed before their
+    cached results expire instead of going cold to MySQL.
+    """
+    config = app.config
+    refresh = config.get('SCHEDULER_REFRESH_SECONDS')
+
+    scheduler.init_app(app)
+    scheduler.add_job('warm-catalog', warm_catalog, refresh, warmup=True)
+    scheduler.add_job('warm-hero-index', warm_hero_index, refresh, warmup=True)
+    scheduler.add_job('warm-search-index', warm_search_index, refresh, warmup=True)
+    scheduler.add_job('warm-autocomplete', warm_autocomplete, refresh, warmup=True)
+    scheduler.add_job('warm-similarity', warm_similarity, refresh, warmup=True)
+
+    if config.get('CHANGE_FEED_ENABLED'):
+        days = config['CHANGES_RETENTION_DAYS']
+        scheduler.add_job('prune-changes', lambda: prune_changes(days), 3600, delay=60)
+
+    if config.get('IDEMPOTENCY_BACKEND') == 'mysql':
+        scheduler.add_job('prune-idempotency-keys', idempotency_repository.prune, 3600, delay=60)
+
+    if config.get('RATE_LIMIT_BACKEND') == 'sqlite':
+        scheduler.add_job('prune-rate-limit-buckets', rate_limiter.store.prune, 3600, delay=60)
+
+    if config.get('PROFILER_CONTINUOUS_SECONDS'):
+        directory = config['PROFILER_OUTPUT_DIR']
+        duration = config['PROFILER_CONTINUOUS_DURATION']
+        interval = config['PROFILER_INTERVAL_MS'] / 1000
+        scheduler.add_job(
+            'write-profile',
+            lambda: write_profile(directory, duration, interval),
+            config['PROFILER_CONTINUOUS_SECONDS'],
+            delay=config['PROFILER_CONTINUOUS_SECONDS']
+        )
+
+    if config.get('SNAPSHOT_BUILD_SECONDS'):
+        path = config['SNAPSHOT_PATH']
+        scheduler.add_job('build-snapshot', lambda: build_snapshot(path), config['SNAPSHOT_BUILD_SECONDS'])
+
+    if config.get('SCHEDULER_ENABLED'):
+        scheduler.start()
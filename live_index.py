@@ -0,0 +1,147 @@
+import threading
+import time
+from flask import current_app
+from errors import is_unavailable
+from repositories import hero_repository, serving_snapshot
+from shards import RegionLocal
+from signals import hero_changed, catalog_reloaded
+
+# Every LiveIndex, so one hook can update them all
+_live_indexes = []
+
+def _catalog_records():
+    """HeroRecord rows of the current region's catalog"""
+    snapshot = serving_snapshot()
+    return snapshot.heroes() if snapshot is not None else hero_repository.list_records()
+
+def _catalog_version():
+    """Changes whenever the current region's catalog does, in any process"""
+    snapshot = serving_snapshot()
+    return ('snapshot', snapshot.version) if snapshot is not None else hero_repository.catalog_version()
+
+class _RegionIndex:
+    __slots__ = ('index', 'generation', 'version', 'checked_at')
+
+    def __init__(self, index):
+        self.index = index
+        # Bumped by every hero write, so a build that raced a write is redone
+        self.generation = 0
+        # Catalog version the index was built from, and when it was last compared
+        self.version = None
+        self.checked_at = 0.0
+
+class LiveIndex:
+    """
+    An in-memory hero index per region, built from the catalog on first
+    use and kept current by hero writes.
+
+    `factory` makes an empty index with a `built` flag and build(records),
+    upsert(record) and remove(hero_id) methods taking HeroRecord rows;
+    upsert() may return False to ask for a rebuild instead. One hook
+    serves every LiveIndex: it re-reads a written hero once and applies
+    the row to each index of the region that is built.
+
+    Hooks only see writes made by this process. Writes by other workers
+    or outside the API are caught by comparing the catalog version every
+    LIVE_INDEX_CHECK_SECONDS and rebuilding when it changed.
+    """
+
+    def __init__(self, factory):
+        self._regions = RegionLocal(lambda: _RegionIndex(factory()))
+        self._build_lock = threading.Lock()
+        _live_indexes.append(self)
+
+    @property
+    def default(self):
+        """The default region's index"""
+        return self._regions.default.index
+
+    def current(self):
+        """The current region's index (see shards.py)"""
+        return self._regions.get().index
+
+    def ensure_built(self):
+        """
+        Returns the current region's index, built from its catalog.
+
+        Builds it on first use or after invalidation, and rebuilds it
+        when the catalog version changed since the last build.
+        """
+        region = self._regions.get()
+        index = region.index
+        if index.built and not self._check_due(region):
+            return index
+        with self._build_lock:
+            if not index.built:
+                self._build(region)
+            elif self._check_due(region):
+                region.checked_at = time.monotonic()
+                try:
+                    changed = _catalog_version() != region.version
+                except Exception as e:
+                    # Keep serving the index we have while the database is down
+                    if not is_unavailable(e):
+                        raise
+                    changed = False
+                if changed:
+                    self._build(region)
+        return index
+
+    def rebuild(self):
+        """Rebuilds the current region's index from its catalog, built or not"""
+        region = self._regions.get()
+        with self._build_lock:
+            self._build(region)
+        return region.index
+
+    def _check_due(self, region):
+        seconds = current_app.config.get('LIVE_INDEX_CHECK_SECONDS')
+        return bool(seconds) and time.monotonic() - region.checked_at >= seconds
+
+    def _build(self, region):
+        generation = region.generation
+        # Read before the rows, so a write in between shows up as a change next time
+        version = _catalog_version()
+        region.index.build(_catalog_records())
+        region.version = version
+        region.checked_at = time.monotonic()
+        if region.generation != generation:
+            region.index.built = False
+
+def _on_hero_changed(sender, hero_id, action, **extra):
+    # Writes run in the region they changed
+    regions = [live._regions.get() for live in _live_indexes]
+    for region in regions:
+        region.generation += 1
+
+    built = [region.index for region in regions if region.index.built]
+    if not built:
+        return
+
+    if action == 'delete':
+        for index in built:
+            index.remove(hero_id)
+        return
+
+    try:
+        record = hero_repository.get_record(hero_id)
+    except Exception:
+        # The write is committed; rebuild on next use rather than fail it
+        for index in built:
+            index.built = False
+        return
+
+    for index in built:
+        if record is None:
+            index.remove(hero_id)
+        elif index.upsert(record) is False:
+            index.built = False
+
+hero_changed.connect(_on_hero_changed, weak=False)
+
+def _on_catalog_reloaded(sender, **extra):
+    for live in _live_indexes:
+        for region in live._regions.all():
+            region.index.built = False
+
+catalog_reloaded.connect(_on_catalog_reloaded, weak=False)
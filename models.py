@@ -0,0 +1,207 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+class Model:
+    """
+    Base class for compact row models.
+
+    Subclasses are slots dataclasses whose fields are named after the
+    selected columns, so a row costs one small object instead of a dict
+    repeating every column name. Rows from a tuple cursor are mapped by
+    column name when the SELECT does not list the fields in order.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row, description=None):
+        if row is None:
+            return None
+        return cls.from_rows([row], description)[0]
+
+    @classmethod
+    def from_rows(cls, rows, description=None):
+        """
+        Builds models from cursor rows.
+
+        Args:
+            rows: Tuples from a tuple cursor, or dicts from a DictCursor
+            description: cursor.description for tuple rows
+
+        Returns:
+            List of models
+        """
+        if not rows:
+            return []
+
+        fields = cls.__slots__
+
+        if isinstance(rows[0], Mapping):
+            return [cls(*[row.get(name) for name in fields]) for row in rows]
+
+        columns = tuple(column[0] for column in description) if description else fields
+        if columns == fields:
+            return [cls(*row) for row in rows]
+
+        positions = [columns.index(name) if name in columns else None for name in fields]
+        return [cls(*[row[i] if i is not None else None for i in positions]) for row in rows]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def project(self, model):
+        """Builds another model from this one's matching fields"""
+        return model(*[getattr(self, name, None) for name in model.__slots__])
+
+    # Read-only mapping access for code written against DictCursor rows
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+def to_plain(data):
+    """Recursively converts models to dicts (for serializers like dicttoxml)"""
+    if isinstance(data, Model):
+        return data.to_dict()
+    if isinstance(data, dict):
+        return {key: to_plain(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_plain(value) for value in data]
+    return data
+
+# ==================== HEROES ====================
+
+@dataclass(slots=True)
+class Hero(Model):
+    """A hero with its role, specialty and stats (HeroRepository.DETAIL_SELECT)"""
+    idHEROES: int
+    hero_name: str
+    origin: str
+    difficulty: str
+    role_name: str
+    role_description: str
+    specialty_name: str
+    hp: int
+    mana: int
+    attack: int
+    defense: int
+    movement_speed: int
+
+@dataclass(slots=True)
+class HeroRecord(Model):
+    """A Hero plus its role and specialty IDs (HeroRepository.RECORD_SELECT)"""
+    idHEROES: int
+    hero_name: str
+    origin: str
+    difficulty: str
+    role_id: int
+    role_name: str
+    role_description: str
+    specialty_id: int
+    specialty_name: str
+    hp: int
+    mana: int
+    attack: int
+    defense: int
+    movement_speed: int
+
+@dataclass(slots=True)
+class HeroSummary(Model):
+    """A hero as returned by search"""
+    idHEROES: int
+    hero_name: str
+    origin: str
+    difficulty: str
+    role_name: str
+    specialty_name: str
+
+@dataclass(slots=True)
+class HeroMatch(Model):
+    """A search result with its relevance score (search_index.py)"""
+    idHEROES: int
+    hero_name: str
+    origin: str
+    difficulty: str
+    role_name: str
+    specialty_name: str
+    score: float
+
+@dataclass(slots=True)
+class RoleHero(Model):
+    """A hero as listed under its role"""
+    idHEROES: int
+    hero_name: str
+    origin: str
+    difficulty: str
+    role_name: str
+
+@dataclass(slots=True)
+class SpecialtyHero(Model):
+    """A hero as listed under its specialty"""
+    idHEROES: int
+    hero_name: str
+    origin: str
+    difficulty: str
+    specialty_name: str
+
+@dataclass(slots=True)
+class HeroStatsRow(Model):
+    """A hero with role/specialty IDs and stats (StatsRepository.LIST_HERO_STATS)"""
+    idHEROES: int
+    hero_name: str
+    role_id: int
+    role_name: str
+    specialty_id: int
+    specialty_name: str
+    hp: int
+    mana: int
+    attack: int
+    defense: int
+    movement_speed: int
+
+# ==================== CHANGE FEED ====================
+
+@dataclass(slots=True)
+class Change(Model):
+    """One change feed entry (ChangeRepository.LIST_SINCE)"""
+    seq: int
+    entity: str
+    entity_id: int
+    action: str
+    changed_at: object
+
+# ==================== USERS ====================
+
+@dataclass(slots=True)
+class User(Model):
+    idUSERS: int
+    username: str
+    password_hash: str
+    is_admin: int
+
+# ==================== LOOKUP TABLES ====================
+
+@dataclass(slots=True)
+class Role(Model):
+    idROLES: int
+    role_name: str
+    description: str
+
+@dataclass(slots=True)
+class Specialty(Model):
+    idSPECIALTY: int
+    specialty_name: str
+    description: str
+
+@dataclass(slots=True)
+class HeroStats(Model):
+    idHERO_STATS: int
+    hp: int
+    mana: int
+    attack: int
+    defense: int
+    movement_speed: int
@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Leaf frames of threads that are blocked waiting, not working
+IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('socketserver.py', 'serve_forever'),
+    ('socket.py', 'accept'),
+    ('scheduler.py', '_loop'),
+    ('tracing.py', '_loop')
+}
+
+class Profile:
+    """Collapsed stacks counted by a StackSampler run"""
+
+    def __init__(self, stacks, samples, interval, started_at, duration):
+        self.stacks = stacks
+        self.samples = samples
+        self.interval = interval
+        self.started_at = started_at
+        self.duration = duration
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format: 'root;child;leaf count' per line (flamegraph.pl, speedscope)"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            lines.append(';'.join(frame[0] for frame in stack) + f' {count}')
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self, name='mlbb-api'):
+        """A speedscope sampled profile (https://www.speedscope.app/file-format-schema.json)"""
+        frames = []
+        index = {}
+        samples = []
+        weights = []
+        interval_ms = self.interval * 1000
+
+        for stack, count in self.stacks.items():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    label, file, line = frame
+                    frames.append({'name': label, 'file': file, 'line': line} if file else {'name': label})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(round(count * interval_ms, 3))
+
+        total = round(sum(weights), 3)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'mlbb-api profiler',
+            'activeProfileIndex': 0,
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': f'{name} pid {os.getpid()} ({self.samples} samples every {interval_ms:g} ms)',
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': total,
+                'samples': samples,
+                'weights': weights
+            }]
+        }
+
+class StackSampler:
+    """
+    Statistical profiler sampling every thread's Python stack.
+
+    A background thread reads sys._current_frames() every `interval`
+    seconds and counts each distinct stack, so the profiled code runs
+    unmodified and the overhead depends on the sample rate, not on how
+    many calls the code makes. Only one capture runs at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    def _frame(self, code):
+        frame = self._labels.get(code)
+        if frame is None:
+            file = os.path.basename(code.co_filename)
+            frame = self._labels[code] = (f'{code.co_name} ({file}:{code.co_firstlineno})', code.co_filename, code.co_firstlineno)
+        return frame
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(self._frame(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _idle(self, frame):
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+    def capture(self, seconds, interval=0.01, include_idle=False, exclude=()):
+        """
+        Samples all threads for `seconds`.
+
+        Args:
+            seconds: How long to sample
+            interval: Seconds between samples
+            include_idle: Keep stacks of threads blocked in waits/selects
+            exclude: Thread idents to skip (e.g. the requesting thread)
+
+        Returns:
+            Profile, or None if another capture is already running
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        try:
+            stacks = Counter()
+            samples = 0
+            me = threading.get_ident()
+            skip = set(exclude) | {me}
+            started_at = time.time()
+            ends_at = time.monotonic() + seconds
+
+            while time.monotonic() < ends_at:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident in skip or (not include_idle and self._idle(frame)):
+                        continue
+                    thread = (f'thread {names.get(ident, ident)}', None, None)
+                    stacks[(thread, *self._stack(frame))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            return Profile(stacks, samples, interval, started_at, time.time() - started_at)
+        finally:
+            self._lock.release()
+
+stack_sampler = StackSampler()
+
+def write_profile(directory, seconds, interval):
+    """
+    Captures a profile and writes it to `directory` as collapsed stacks.
+
+    Returns:
+        Path of the written file, or None if a capture was already running
+    """
+    profile = stack_sampler.capture(seconds, interval)
+    if profile is None:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    timestamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(profile.started_at))
+    path = os.path.join(directory, f'profile-{timestamp}-{os.getpid()}.collapsed')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(profile.collapsed())
+    return path
@@ -0,0 +1,374 @@
+import json
+from repositories import query_repository
+
+# ==================== SCHEMA ====================
+
+class Relation:
+    """A nested object or list resolved with one batched query per level"""
+
+    def __init__(self, entity, local, remote, many=False):
+        self.entity = entity
+        self.local = local
+        self.remote = remote
+        self.many = many
+
+class Entity:
+    """
+    A queryable root or nested type.
+
+    `fields` maps output names to (column, join); a field whose join is
+    not None is only selectable when that LEFT JOIN is added, so the
+    planner joins exactly the tables the requested fields live in.
+    """
+
+    def __init__(self, table, fields, key, joins=None, relations=None, default_fields=None):
+        self.table = table
+        self.fields = fields
+        self.key = key
+        self.joins = joins or {}
+        self.relations = relations or {}
+        self.default_fields = default_fields or [key]
+
+ENTITIES = {
+    'heroes': Entity(
+        'heroes h',
+        {
+            'idHEROES': ('h.idHEROES', None),
+            'hero_name': ('h.hero_name', None),
+            'origin': ('h.origin', None),
+            'difficulty': ('h.difficulty', None),
+            'role_id': ('h.ROLES_idROLES', None),
+            'specialty_id': ('h.SPECIALTY_idSPECIALTY', None),
+            'hero_stats_id': ('h.HERO_STATS_idHERO_STATS', None),
+            'role_name': ('r.role_name', 'role'),
+            'role_description': ('r.description', 'role'),
+            'specialty_name': ('s.specialty_name', 'specialty'),
+            'hp': ('hs.hp', 'stats'),
+            'mana': ('hs.mana', 'stats'),
+            'attack': ('hs.attack', 'stats'),
+            'defense': ('hs.defense', 'stats'),
+            'movement_speed': ('hs.movement_speed', 'stats')
+        },
+        key='idHEROES',
+        joins={
+            'role': 'LEFT JOIN roles r ON h.ROLES_idROLES = r.idROLES',
+            'specialty': 'LEFT JOIN specialty s ON h.SPECIALTY_idSPECIALTY = s.idSPECIALTY',
+            'stats': 'LEFT JOIN hero_stats hs ON h.HERO_STATS_idHERO_STATS = hs.idHERO_STATS'
+        },
+        relations={
+            'role': Relation('roles', 'role_id', 'idROLES'),
+            'specialty': Relation('specialties', 'specialty_id', 'idSPECIALTY'),
+            'stats': Relation('hero_stats', 'hero_stats_id', 'idHERO_STATS')
+        },
+        default_fields=['idHEROES', 'hero_name']
+    ),
+    'roles': Entity(
+        'roles r',
+        {
+            'idROLES': ('r.idROLES', None),
+            'role_name': ('r.role_name', None),
+            'description': ('r.description', None)
+        },
+        key='idROLES',
+        relations={'heroes': Relation('heroes', 'idROLES', 'role_id', many=True)},
+        default_fields=['idROLES', 'role_name']
+    ),
+    'specialties': Entity(
+        'specialty s',
+        {
+            'idSPECIALTY': ('s.idSPECIALTY', None),
+            'specialty_name': ('s.specialty_name', None),
+            'description': ('s.description', None)
+        },
+        key='idSPECIALTY',
+        relations={'heroes': Relation('heroes', 'idSPECIALTY', 'specialty_id', many=True)},
+        default_fields=['idSPECIALTY', 'specialty_name']
+    ),
+    'hero_stats': Entity(
+        'hero_stats hs',
+        {
+            'idHERO_STATS': ('hs.idHERO_STATS', None),
+            'hp': ('hs.hp', None),
+            'mana': ('hs.mana', None),
+            'attack': ('hs.attack', None),
+            'defense': ('hs.defense', None),
+            'movement_speed': ('hs.movement_speed', None)
+        },
+        key='idHERO_STATS',
+        default_fields=['idHERO_STATS', 'hp', 'mana', 'attack', 'defense', 'movement_speed']
+    )
+}
+
+MAX_DEPTH = 3
+MAX_LIMIT = 500
+DEFAULT_LIMIT = 100
+
+OPERATORS = {
+    'eq': '{} = %s',
+    'ne': '{} <> %s',
+    'gt': '{} > %s',
+    'gte': '{} >= %s',
+    'lt': '{} < %s',
+    'lte': '{} <= %s',
+    'contains': '{} LIKE %s',
+    'in': '{} IN %s'
+}
+
+SPEC_KEYS = {'fields', 'where', 'order_by', 'limit', 'offset', 'include'}
+
+class QueryError(ValueError):
+    """An invalid query document (reported as 400)"""
+
+# ==================== PLANNER ====================
+
+def _scalar(value):
+    return value is None or isinstance(value, (str, int, float, bool))
+
+def _condition(entity, name, value):
+    if name not in entity.fields:
+        raise QueryError(f"Unknown field '{name}' in where")
+    column, join = entity.fields[name]
+
+    operators = value if isinstance(value, dict) else {'eq': value}
+    clauses = []
+    params = []
+
+    for op, operand in operators.items():
+        if op not in OPERATORS:
+            raise QueryError(f"Unknown operator '{op}' for '{name}'")
+        if op == 'in':
+            if not isinstance(operand, list) or not operand or not all(_scalar(v) for v in operand):
+                raise QueryError(f"'in' for '{name}' needs a non-empty list of values")
+            operand = tuple(operand)
+        elif not _scalar(operand):
+            raise QueryError(f"'{op}' for '{name}' needs a single value")
+        elif op == 'contains':
+            operand = f'%{operand}%'
+
+        if operand is None and op in ('eq', 'ne'):
+            clauses.append(f"{column} IS {'NOT ' if op == 'ne' else ''}NULL")
+            continue
+
+        clauses.append(OPERATORS[op].format(column))
+        params.append(operand)
+
+    return clauses, params, join
+
+def plan(entity_name, spec, extra_fields=(), extra_where=None):
+    """
+    Plans one SELECT for an entity.
+
+    Only the joins that a selected, filtered or sorted field needs are
+    added, so `{"fields": ["hero_name"]}` reads the heroes table alone.
+
+    Args:
+        entity_name: Key of ENTITIES
+        spec: Query spec with fields, where, order_by, limit and offset
+        extra_fields: Fields needed internally (e.g. relation keys)
+        extra_where: (column, values) batch condition for nested loads
+
+    Returns:
+        (sql, params, selected field names)
+
+    Raises:
+        QueryError: If the spec names unknown fields or operators
+    """
+    entity = ENTITIES[entity_name]
+
+    fields = spec.get('fields') or entity.default_fields
+    if not isinstance(fields, list) or not all(isinstance(name, str) for name in fields):
+        raise QueryError(f"'fields' for {entity_name} must be a list of names")
+    unknown = [name for name in fields if name not in entity.fields]
+    if unknown:
+        raise QueryError(f"Unknown fields for {entity_name}: {', '.join(unknown)}")
+
+    selected = list(dict.fromkeys(list(fields) + list(extra_fields)))
+    joins = {entity.fields[name][1] for name in selected}
+
+    where = spec.get('where') or {}
+    if not isinstance(where, dict):
+        raise QueryError("'where' must be an object")
+    clauses = []
+    params = []
+    for name, value in where.items():
+        field_clauses, field_params, join = _condition(entity, name, value)
+        clauses += field_clauses
+        params += field_params
+        joins.add(join)
+
+    if extra_where is not None:
+        column, values = extra_where
+        clauses.append(f"{column} IN %s")
+        params.append(tuple(values))
+
+    order_by = spec.get('order_by') or entity.key
+    if not isinstance(order_by, str):
+        raise QueryError("'order_by' must be a field name, optionally prefixed with '-'")
+    descending = order_by.startswith('-')
+    order_name = order_by[1:] if descending else order_by
+    if order_name not in entity.fields:
+        raise QueryError(f"Unknown order_by field '{order_name}'")
+    joins.add(entity.fields[order_name][1])
+
+    sql = "SELECT " + ", ".join(f"{entity.fields[name][0]} AS `{name}`" for name in selected)
+    sql += f" FROM {entity.table}"
+    for join_name, join_sql in entity.joins.items():
+        if join_name in joins:
+            sql += f" {join_sql}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {entity.fields[order_name][0]} {'DESC' if descending else 'ASC'}"
+
+    if extra_where is None:
+        limit = spec.get('limit', DEFAULT_LIMIT)
+        offset = spec.get('offset', 0)
+        if not isinstance(limit, int) or not 1 <= limit <= MAX_LIMIT:
+            raise QueryError(f"'limit' must be between 1 and {MAX_LIMIT}")
+        if not isinstance(offset, int) or offset < 0:
+            raise QueryError("'offset' must be a non-negative integer")
+        sql += " LIMIT %s OFFSET %s"
+        params += [limit, offset]
+
+    return sql, tuple(params), selected
+
+# ==================== BATCH LOADING ====================
+
+class BatchLoader:
+    """
+    DataLoader-style loading of nested relations.
+
+    All parents at one level are resolved with a single `IN (...)` query
+    per relation, so a page of 100 heroes with their role costs two
+    queries rather than 101. Results are memoized per request, so the
+    same keys requested again at another level are not fetched twice.
+    """
+
+    def __init__(self):
+        self._memo = {}
+        self.queries = 0
+
+    def load(self, relation, spec, keys, extra_fields):
+        """Returns {key: [rows]} for the given relation keys"""
+        entity = ENTITIES[relation.entity]
+        memo_key = (relation.entity, relation.remote, json.dumps(spec, sort_keys=True), tuple(extra_fields))
+        cached = self._memo.setdefault(memo_key, {})
+
+        missing = sorted({key for key in keys if key is not None and key not in cached}, key=repr)
+        if missing:
+            sql, params, selected = plan(
+                relation.entity, spec, extra_fields,
+                (entity.fields[relation.remote][0], missing)
+            )
+            self.queries += 1
+            for key in missing:
+                cached[key] = []
+            # Copies, since nested relations are attached to these rows
+            for row in query_repository.select(sql, params):
+                cached[row[relation.remote]].append(dict(row))
+
+        return {key: cached.get(key, []) for key in keys}
+
+def _validate_spec(entity_name, spec):
+    if not isinstance(spec, dict):
+        raise QueryError(f"Query for {entity_name} must be an object")
+    unknown = set(spec) - SPEC_KEYS
+    if unknown:
+        raise QueryError(f"Unknown keys for {entity_name}: {', '.join(sorted(unknown))}")
+    include = spec.get('include') or {}
+    if not isinstance(include, dict):
+        raise QueryError("'include' must be an object")
+    return include
+
+def _resolve(entity_name, spec, rows, loader, depth):
+    """Attaches the included relations to rows (breadth-first, one query per relation)"""
+    entity = ENTITIES[entity_name]
+    include = _validate_spec(entity_name, spec)
+
+    if include and depth >= MAX_DEPTH:
+        raise QueryError(f"Queries may nest at most {MAX_DEPTH} levels")
+
+    for name, child_spec in include.items():
+        relation = entity.relations.get(name)
+        if relation is None:
+            raise QueryError(f"Unknown relation '{name}' for {entity_name}")
+        child_spec = child_spec or {}
+        child_include = _validate_spec(relation.entity, child_spec)
+        child_keys = [ENTITIES[relation.entity].relations[child].local for child in child_include
+                      if child in ENTITIES[relation.entity].relations]
+
+        loaded = loader.load(relation, child_spec, [row[relation.local] for row in rows],
+                             [relation.remote] + child_keys)
+
+        children = [child for key in {row[relation.local] for row in rows} for child in loaded.get(key, [])]
+        _resolve(relation.entity, child_spec, children, loader, depth + 1)
+
+        # Each parent gets its own copies, so stripping one does not affect another
+        for row in rows:
+            matches = [dict(match) for match in loaded.get(row[relation.local], [])]
+            row[name] = matches if relation.many else (matches[0] if matches else None)
+
+def _strip(entity_name, spec, rows):
+    """Removes fields that were only selected to join relations"""
+    entity = ENTITIES[entity_name]
+    requested = set(spec.get('fields') or entity.default_fields)
+    include = spec.get('include') or {}
+
+    for row in rows:
+        for name in list(row):
+            if name not in requested and name not in include:
+                del row[name]
+
+    for name, child_spec in include.items():
+        relation = entity.relations[name]
+        children = []
+        for row in rows:
+            value = row.get(name)
+            if isinstance(value, list):
+                children += value
+            elif value is not None:
+                children.append(value)
+        _strip(relation.entity, child_spec or {}, children)
+
+def run_query(document):
+    """
+    Executes a query document.
+
+    Example:
+        {"heroes": {"fields": ["hero_name", "role_name"],
+                    "where": {"difficulty": "Hard"},
+                    "include": {"stats": {"fields": ["hp"]}},
+                    "limit": 20}}
+
+    Args:
+        document: Mapping of root entity name to query spec
+
+    Returns:
+        (result mapping, number of SQL queries run)
+
+    Raises:
+        QueryError: If the document is invalid
+    """
+    if not isinstance(document, dict) or not document:
+        raise QueryError('Query must be an object with at least one root, e.g. {"heroes": {}}')
+
+    loader = BatchLoader()
+    result = {}
+
+    for root, spec in document.items():
+        if root not in ENTITIES:
+            raise QueryError(f"Unknown root '{root}'; expected one of {', '.join(ENTITIES)}")
+        spec = spec or {}
+        include = _validate_spec(root, spec)
+
+        entity = ENTITIES[root]
+        relation_keys = [entity.relations[name].local for name in include if name in entity.relations]
+        sql, params, selected = plan(root, spec, relation_keys)
+        loader.queries += 1
+        # Copies, since rows may be shared with the result cache
+        rows = [dict(row) for row in query_repository.select(sql, params)]
+
+        _resolve(root, spec, rows, loader, 1)
+        _strip(root, spec, rows)
+        result[root] = rows
+
+    return result, loader.queries
@@ -0,0 +1,235 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response, g
+from utils import format_response
+
+# ==================== BUCKET STORES ====================
+
+def _refill(tokens, updated_at, now, capacity, rate):
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+def _take(states, buckets, cost, now):
+    """
+    Applies one request to a set of buckets, all or nothing.
+
+    Args:
+        states: Current (tokens, updated_at) per bucket, or None for a new bucket
+        buckets: (key, capacity, rate) per bucket
+        cost: Tokens the request costs
+        now: Current time in the store's clock
+
+    Returns:
+        (allowed, retry_after seconds, remaining tokens, new states)
+    """
+    levels = []
+    retry_after = 0.0
+
+    for state, (key, capacity, rate) in zip(states, buckets):
+        tokens = capacity if state is None else _refill(state[0], state[1], now, capacity, rate)
+        needed = min(cost, capacity)
+        if tokens < needed:
+            retry_after = max(retry_after, (needed - tokens) / rate)
+        levels.append((tokens, needed))
+
+    allowed = retry_after == 0.0
+    if allowed:
+        levels = [(tokens - needed, needed) for tokens, needed in levels]
+
+    remaining = min((tokens for tokens, needed in levels), default=0.0)
+    return allowed, retry_after, remaining, [(tokens, now) for tokens, needed in levels]
+
+class MemoryBucketStore:
+    """
+    Token buckets in a bounded in-process dict (one per worker process).
+
+    Each check is a constant number of dict operations. The least
+    recently used buckets are dropped past `max_entries`; a dropped
+    bucket simply starts full again.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets, cost):
+        now = time.monotonic()
+        with self._lock:
+            states = [self._buckets.get(key) for key, capacity, rate in buckets]
+            allowed, retry_after, remaining, new_states = _take(states, buckets, cost, now)
+
+            for (key, capacity, rate), state in zip(buckets, new_states):
+                self._buckets[key] = state
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+
+        return allowed, retry_after, remaining
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a local SQLite file shared by all workers on a host.
+
+    Each check is one IMMEDIATE transaction over primary-key lookups, so
+    concurrent worker processes see a single budget per client. If the
+    file is locked past `timeout` or otherwise fails, the request is let
+    through rather than failed. prune() deletes buckets idle for
+    `full_after` seconds, by which time any bucket has refilled.
+    """
+
+    def __init__(self, path, timeout=1.0, full_after=3600):
+        self.path = path
+        self.timeout = timeout
+        self.full_after = full_after
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(bucket_key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets, cost):
+        try:
+            return self._take(buckets, cost)
+        except sqlite3.Error as e:
+            # The limiter protects the API; it must not take it down
+            current_app.logger.warning('Rate limit store failed, allowing the request: %s', e)
+            return True, 0.0, min((capacity for key, capacity, rate in buckets), default=0.0)
+
+    def _take(self, buckets, cost):
+        conn = self._connection()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            states = [
+                conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE bucket_key = ?", (key,)
+                ).fetchone()
+                for key, capacity, rate in buckets
+            ]
+            allowed, retry_after, remaining, new_states = _take(states, buckets, cost, now)
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (bucket_key, tokens, updated_at) VALUES (?, ?, ?)",
+                [(key, tokens, updated_at) for (key, capacity, rate), (tokens, updated_at) in zip(buckets, new_states)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            raise
+
+        return allowed, retry_after, remaining
+
+    def prune(self):
+        """Deletes buckets that have been idle long enough to be full again"""
+        self._connection().execute("DELETE FROM buckets WHERE updated_at < ?", (time.time() - self.full_after,))
+
+# ==================== RATE LIMITER ====================
+
+class RateLimiter:
+    """
+    Per-client token buckets in separate pools.
+
+    A request is charged against a bucket for its JWT user and one for
+    its IP address. Expensive and cheap endpoints draw from different
+    pools, so a client exhausting the expensive pool can still make
+    cheap requests.
+    """
+
+    def __init__(self):
+        self.store = MemoryBucketStore()
+
+    def init_app(self, app):
+        if app.config.get('RATE_LIMIT_BACKEND') == 'sqlite':
+            # Seconds the slowest bucket takes to refill from empty
+            full_after = max(
+                capacity / rate
+                for limits in app.config['RATE_LIMITS'].values()
+                for capacity, rate in limits.values()
+            )
+            self.store = SQLiteBucketStore(app.config['RATE_LIMIT_SQLITE_PATH'], full_after=full_after)
+        else:
+            self.store = MemoryBucketStore(app.config.get('RATE_LIMIT_MAX_BUCKETS', 10000))
+
+    def _identities(self):
+        identities = [('ip', request.remote_addr or 'unknown')]
+        user = g.get('current_user')
+        if user:
+            identities.append(('user', user))
+        return identities
+
+    def check(self, pool, cost, identities=None):
+        """
+        Charges the current request against its buckets in `pool`.
+
+        Args:
+            pool: Key of RATE_LIMITS
+            cost: Tokens to take
+            identities: (kind, identity) pairs; defaults to the client IP
+                        and the authenticated JWT user
+
+        Returns:
+            (allowed, retry_after seconds, remaining tokens)
+        """
+        limits = current_app.config['RATE_LIMITS'][pool]
+        buckets = [
+            (f'{pool}:{kind}:{identity}', *limits[kind])
+            for kind, identity in (identities or self._identities())
+            if kind in limits
+        ]
+        return self.store.take(buckets, cost)
+
+rate_limiter = RateLimiter()
+
+def rate_limit(cost=1, pool='default'):
+    """
+    Decorator charging a request against the client's token buckets.
+
+    Requests over the limit get 429 with a Retry-After header; allowed
+    responses carry X-RateLimit-Remaining.
+
+    Usage: @rate_limit(cost=5, pool='expensive') below @token_required,
+    so the JWT user is known, and above @cached.
+
+    Args:
+        cost: Tokens the endpoint costs
+        pool: Key of RATE_LIMITS whose buckets the endpoint draws from
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not current_app.config.get('RATE_LIMIT_ENABLED'):
+                return f(*args, **kwargs)
+
+            allowed, retry_after, remaining = rate_limiter.check(pool, cost)
+
+            if not allowed:
+                seconds = max(1, math.ceil(retry_after))
+                response = make_response(format_response({
+                    'error': 'Rate limit exceeded',
+                    'retry_after': seconds
+                }, 429))
+                response.headers['Retry-After'] = str(seconds)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            response.headers['X-RateLimit-Remaining'] = str(int(remaining))
+            return response
+
+        return decorated
+
+    return decorator
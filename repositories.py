@@ -0,0 +1,703 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import MySQLdb
+from flask import current_app, g
+from MySQLdb import cursors
+from cache import result_cache
+from db_router import db_router
+from errors import classify, retry_read
+from models import Hero, HeroRecord, HeroSummary, RoleHero, HeroStatsRow, Role, Specialty, HeroStats, User, Change
+from signals import hero_changed, stats_changed, user_changed
+from singleflight import SingleFlight
+from shards import shard_router
+from snapshot import catalog_snapshot
+from statements import statements, define
+from tracing import span, KIND_CLIENT
+
+# MySQL will be initialized in app.py
+mysql = None
+
+def init_mysql(mysql_instance):
+    """Initialize MySQL connection for the data access layer"""
+    global mysql
+    mysql = mysql_instance
+
+def mysql_connection():
+    """Returns the primary MySQL connection for the current app context"""
+    return mysql.connection
+
+def discard_connection(connection):
+    """
+    Closes a broken connection so the next query opens a fresh one.
+
+    Replica, pooled primary and region shard connections go back to
+    their pool as broken; the Flask-MySQLdb connection is dropped from the
+    app context, so it reconnects on next use.
+    """
+    if db_router.discard(connection) or shard_router.discard(connection):
+        return
+
+    if g.get('mysql_db') is connection:
+        g.pop('mysql_db')
+    try:
+        connection.close()
+    except MySQLdb.Error:
+        pass
+
+@contextmanager
+def get_cursor(commit=False, read=False, tuples=False, region=None):
+    """
+    Opens a cursor on the current MySQL connection and always closes it.
+
+    The work is counted by the region's circuit breaker, which raises
+    DatabaseUnavailable without touching the server while it is open.
+    A connection that fails with a connection error is discarded.
+
+    Args:
+        commit: Commit the transaction when the block finishes without error
+        read: The statement only reads, so it may run on a replica
+        tuples: Return rows as plain tuples instead of MYSQL_CURSORCLASS rows
+        region: Region shard to use (default: the default region's primary)
+
+    Yields:
+        MySQL cursor
+    """
+    region = region or shard_router.default
+    with shard_router.breaker(region).guard():
+        connection = (
+            shard_router.connection(region)
+            or (read and db_router.read_connection())
+            or db_router.primary_connection()
+            or mysql.connection
+        )
+        cur = connection.cursor(cursors.Cursor) if tuples else connection.cursor()
+
+        try:
+            yield cur
+            if commit:
+                connection.commit()
+                g.db_commits = g.get('db_commits', 0) + 1
+        except Exception as e:
+            broken = classify(e) == 'connection'
+            if commit and not broken:
+                connection.rollback()
+            if broken:
+                discard_connection(connection)
+            raise
+        finally:
+            cur.close()
+
+def commit_count():
+    """Number of transactions committed so far in this app context"""
+    return g.get('db_commits', 0)
+
+# Identical concurrent reads share one query execution
+read_flight = SingleFlight()
+
+# Set while a background job refreshes cached results
+_refreshing = ContextVar('refreshing', default=False)
+
+@contextmanager
+def refresh_reads():
+    """Reads inside the block skip the result cache lookup and store fresh rows"""
+    token = _refreshing.set(True)
+    try:
+        yield
+    finally:
+        _refreshing.reset(token)
+
+def serving_snapshot():
+    """
+    Returns the memory-mapped catalog snapshot when SNAPSHOT_SERVING is on, else None.
+
+    The snapshot holds the default region's catalog, so other regions
+    always read their database.
+    """
+    config = current_app.config
+    if not config.get('SNAPSHOT_SERVING') or shard_router.current() != shard_router.default:
+        return None
+    return catalog_snapshot.current(config['SNAPSHOT_PATH'], config['SNAPSHOT_CHECK_SECONDS'])
+
+def _matches(value, search_term):
+    """Case-insensitive substring match, like LIKE '%term%' under the default collation"""
+    return value is not None and search_term.lower() in str(value).lower()
+
+# ==================== BASE REPOSITORY ====================
+
+class Repository:
+    """
+    Base class for table repositories.
+
+    Every query goes through the helpers below, so caching, batching
+    and metrics only have to be added here.
+
+    Queries run against the current region's shard (see shards.py);
+    repositories with `sharded = False` always use the default region.
+    """
+
+    sharded = True
+
+    def _region(self):
+        return shard_router.current() if self.sharded else shard_router.default
+
+    def _read(self, method, query, params, model, cache=True, primary=False):
+        """
+        Runs a read query, coalescing identical concurrent reads.
+
+        While a query with the same (query, params) is in flight, other
+        callers wait for it and share its rows instead of running their
+        own, so database load during spikes follows the number of distinct
+        queries rather than the number of requests.
+
+        Connection, overload and lock errors are retried with jittered
+        backoff (see retry_read); reads are safe to run twice.
+
+        With DB_RESULT_CACHE_ENABLED, results are also kept for
+        DB_RESULT_CACHE_SECONDS until a write clears them. Clients pinned
+        to the primary after a write always go to the database.
+
+        Rows come back from a tuple cursor and are built into `model`
+        instances, which avoids a dict per row. With `primary`, the read
+        skips the replicas and the result cache.
+        """
+        region = self._region()
+
+        def run():
+            with get_cursor(read=not primary, tuples=model is not None, region=region) as cur:
+                with span('db.query', KIND_CLIENT, **{'db.system': 'mysql', 'db.statement': query}):
+                    statements.execute(cur, query, params)
+                with span('db.fetch', **{'db.method': method}) as fetch:
+                    rows = cur.fetchall() if method == 'fetchall' else [cur.fetchone()]
+                    if model is not None and rows and rows[0] is not None:
+                        rows = model.from_rows(rows, cur.description)
+                    if fetch is not None:
+                        fetch.set('db.rows', len(rows) if method == 'fetchall' else int(rows[0] is not None))
+                return rows if method == 'fetchall' else rows[0]
+
+        config = current_app.config
+        primary = primary or db_router.must_read_primary()
+        # Clients pinned to the primary must not share a replica read
+        key = (method, query, params, model, primary, region)
+
+        def fetch():
+            # Taken by whoever runs the query, so callers that join it after a
+            # write's clear() cannot store its pre-write rows under the new generation
+            generation = result_cache.generation
+            return generation, retry_read(run)
+
+        def load():
+            if not config.get('DB_SINGLE_FLIGHT_ENABLED'):
+                return fetch()
+            return read_flight.do(key, fetch)
+
+        if not cache or primary or not config.get('DB_RESULT_CACHE_ENABLED'):
+            return load()[1]
+
+        if not _refreshing.get():
+            hit, rows = result_cache.get(key, config['DB_RESULT_CACHE_SECONDS'])
+            if hit:
+                return rows
+
+        generation, rows = load()
+        result_cache.set(key, rows, generation)
+        return rows
+
+    def _fetchall(self, query, params=None, model=None, cache=True):
+        return self._read('fetchall', query, params, model, cache)
+
+    def _fetchone(self, query, params=None, model=None, cache=True, primary=False):
+        return self._read('fetchone', query, params, model, cache, primary)
+
+    def _execute(self, query, params=None, change=None):
+        """
+        Runs a write statement and returns the last inserted row ID.
+
+        Args:
+            query: SQL statement
+            params: Statement parameters
+            change: Optional (entity, action, entity_id) appended to the
+                    change feed in the same transaction; an entity_id of
+                    None means the inserted row's ID
+        """
+        with get_cursor(commit=True, region=self._region()) as cur:
+            with span('db.execute', KIND_CLIENT, **{'db.system': 'mysql', 'db.statement': query}):
+                statements.execute(cur, query, params)
+            row_id = cur.lastrowid
+            if change is not None and current_app.config.get('CHANGE_FEED_ENABLED'):
+                entity, action, entity_id = change
+                ChangeRepository.append(cur, entity, row_id if entity_id is None else entity_id, action)
+
+        db_router.note_write()
+        return row_id
+
+# ==================== HEROES ====================
+
+# The heroes table with its role, specialty and stats
+HERO_JOINS = """
+    FROM heroes h
+    LEFT JOIN roles r ON h.ROLES_idROLES = r.idROLES
+    LEFT JOIN specialty s ON h.SPECIALTY_idSPECIALTY = s.idSPECIALTY
+    LEFT JOIN hero_stats hs ON h.HERO_STATS_idHERO_STATS = hs.idHERO_STATS
+"""
+
+class HeroRepository(Repository):
+    """Data access for the heroes table and its joined details"""
+
+    DETAIL_SELECT = define('heroes.list_all', """
+        SELECT
+            h.idHEROES,
+            h.hero_name,
+            h.origin,
+            h.difficulty,
+            r.role_name,
+            r.description as role_description,
+            s.specialty_name,
+            hs.hp,
+            hs.mana,
+            hs.attack,
+            hs.defense,
+            hs.movement_speed
+    """ + HERO_JOINS)
+
+    GET_BY_ID = define('heroes.get_by_id', DETAIL_SELECT + " WHERE h.idHEROES = %s")
+
+    GET_MANY = define('heroes.get_many', DETAIL_SELECT + " WHERE h.idHEROES IN %s")
+
+    RECORD_SELECT = define('heroes.list_records', """
+        SELECT
+            h.idHEROES,
+            h.hero_name,
+            h.origin,
+            h.difficulty,
+            h.ROLES_idROLES as role_id,
+            r.role_name,
+            r.description as role_description,
+            h.SPECIALTY_idSPECIALTY as specialty_id,
+            s.specialty_name,
+            hs.hp,
+            hs.mana,
+            hs.attack,
+            hs.defense,
+            hs.movement_speed
+    """ + HERO_JOINS)
+
+    GET_RECORD = define('heroes.get_record', RECORD_SELECT + " WHERE h.idHEROES = %s")
+
+    # Changes with any row or column list_records() returns
+    CATALOG_VERSION = define('heroes.catalog_version', """
+        SELECT
+            COUNT(*) AS hero_count,
+            BIT_XOR(CRC32(CONCAT_WS('|',
+                h.idHEROES, h.hero_name, h.origin, h.difficulty,
+                h.ROLES_idROLES, r.role_name, r.description,
+                h.SPECIALTY_idSPECIALTY, s.specialty_name,
+                hs.hp, hs.mana, hs.attack, hs.defense, hs.movement_speed
+            ))) AS checksum
+    """ + HERO_JOINS)
+
+    EXISTS = define('heroes.exists', "SELECT idHEROES FROM heroes WHERE idHEROES = %s")
+
+    SEARCH = define('heroes.search', """
+        SELECT
+            h.idHEROES,
+            h.hero_name,
+            h.origin,
+            h.difficulty,
+            r.role_name,
+            s.specialty_name
+        FROM heroes h
+        LEFT JOIN roles r ON h.ROLES_idROLES = r.idROLES
+        LEFT JOIN specialty s ON h.SPECIALTY_idSPECIALTY = s.idSPECIALTY
+        WHERE h.hero_name LIKE %s
+           OR h.origin LIKE %s
+           OR h.difficulty LIKE %s
+    """)
+
+    INSERT = define('heroes.insert', """
+        INSERT INTO heroes (hero_name, origin, difficulty, ROLES_idROLES,
+                          HERO_STATS_idHERO_STATS, SPECIALTY_idSPECIALTY)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """)
+
+    UPDATE = define('heroes.update', """
+        UPDATE heroes
+        SET hero_name = %s, origin = %s, difficulty = %s,
+            ROLES_idROLES = %s, HERO_STATS_idHERO_STATS = %s,
+            SPECIALTY_idSPECIALTY = %s
+        WHERE idHEROES = %s
+    """)
+
+    DELETE = define('heroes.delete', "DELETE FROM heroes WHERE idHEROES = %s")
+
+    def list_all(self):
+        """Returns all heroes with their role, specialty and stats"""
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            return [record.project(Hero) for record in snapshot.heroes()]
+        return self._fetchall(self.DETAIL_SELECT, model=Hero)
+
+    def list_records(self):
+        """Returns all heroes with details and role/specialty IDs, always from the database"""
+        return self._fetchall(self.RECORD_SELECT, model=HeroRecord, cache=False)
+
+    def catalog_version(self):
+        """Returns a row (hero_count, checksum) that changes with the list_records() rows, always from the database"""
+        return self._fetchone(self.CATALOG_VERSION, cache=False)
+
+    def get_record(self, hero_id):
+        """Returns one hero with details and role/specialty IDs, always from the database"""
+        return self._fetchone(self.GET_RECORD, (hero_id,), HeroRecord, cache=False)
+
+    def get(self, hero_id):
+        """Returns a single hero with details, or None"""
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            record = snapshot.hero(hero_id)
+            return record.project(Hero) if record is not None else None
+        return self._fetchone(self.GET_BY_ID, (hero_id,), Hero)
+
+    def get_many(self, hero_ids):
+        """Returns {hero_id: Hero} for the given IDs in one query"""
+        if not hero_ids:
+            return {}
+        heroes = self._fetchall(self.GET_MANY, (tuple(hero_ids),), Hero, cache=False)
+        return {hero.idHEROES: hero for hero in heroes}
+
+    def exists(self, hero_id):
+        # Guards writes, so always asks the database
+        return self._fetchone(self.EXISTS, (hero_id,), cache=False) is not None
+
+    def search(self, search_term):
+        """
+        Searches heroes by name, origin, or difficulty.
+
+        Args:
+            search_term: Text to match anywhere in the searched columns
+
+        Returns:
+            List of matching heroes
+        """
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            return [
+                record.project(HeroSummary) for record in snapshot.heroes()
+                if any(_matches(value, search_term) for value in (record.hero_name, record.origin, record.difficulty))
+            ]
+
+        search_pattern = f'%{search_term}%'
+        return self._fetchall(self.SEARCH, (search_pattern, search_pattern, search_pattern), HeroSummary)
+
+    def create(self, data):
+        """
+        Inserts a hero.
+
+        Args:
+            data: Request payload with hero_name, origin, difficulty,
+                  role_id, hero_stats_id and specialty_id
+
+        Returns:
+            ID of the new hero
+        """
+        hero_id = self._execute(self.INSERT, (
+            data.get('hero_name'),
+            data.get('origin', ''),
+            data.get('difficulty', ''),
+            data.get('role_id'),
+            data.get('hero_stats_id'),
+            data.get('specialty_id')
+        ), change=('hero', 'create', None))
+        hero_changed.send(self, hero_id=hero_id, action='create')
+        return hero_id
+
+    def update(self, hero_id, data):
+        self._execute(self.UPDATE, (
+            data.get('hero_name'),
+            data.get('origin'),
+            data.get('difficulty'),
+            data.get('role_id'),
+            data.get('hero_stats_id'),
+            data.get('specialty_id'),
+            hero_id
+        ), change=('hero', 'update', hero_id))
+        hero_changed.send(self, hero_id=hero_id, action='update')
+
+    def delete(self, hero_id):
+        self._execute(self.DELETE, (hero_id,), change=('hero', 'delete', hero_id))
+        hero_changed.send(self, hero_id=hero_id, action='delete')
+
+# ==================== ROLES ====================
+
+class RoleRepository(Repository):
+    """Data access for the roles table"""
+
+    LIST_ALL = define('roles.list_all', "SELECT * FROM roles")
+
+    LIST_HEROES = define('roles.list_heroes', """
+        SELECT h.idHEROES, h.hero_name, h.origin, h.difficulty, r.role_name
+        FROM heroes h
+        JOIN roles r ON h.ROLES_idROLES = r.idROLES
+        WHERE r.idROLES = %s
+    """)
+
+    def list_all(self):
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            return snapshot.roles()
+        return self._fetchall(self.LIST_ALL, model=Role)
+
+    def list_all_from_database(self):
+        return self._fetchall(self.LIST_ALL, model=Role, cache=False)
+
+    def list_heroes(self, role_id):
+        """Returns all heroes with the given role"""
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            return [
+                record.project(RoleHero) for record in snapshot.heroes()
+                if record.role_id == role_id and record.role_name is not None
+            ]
+        return self._fetchall(self.LIST_HEROES, (role_id,), RoleHero)
+
+# ==================== HERO STATS ====================
+
+class StatsRepository(Repository):
+    """Data access for the hero_stats table"""
+
+    GET_BY_ID = define('hero_stats.get_by_id', "SELECT * FROM hero_stats WHERE idHERO_STATS = %s")
+
+    GET_MANY = define('hero_stats.get_many', "SELECT * FROM hero_stats WHERE idHERO_STATS IN %s")
+
+    LIST_HERO_STATS = define('hero_stats.list_hero_stats', """
+        SELECT
+            h.idHEROES,
+            h.hero_name,
+            h.ROLES_idROLES as role_id,
+            r.role_name,
+            h.SPECIALTY_idSPECIALTY as specialty_id,
+            s.specialty_name,
+            hs.hp,
+            hs.mana,
+            hs.attack,
+            hs.defense,
+            hs.movement_speed
+    """ + HERO_JOINS)
+
+    GET_HERO_STATS = define('hero_stats.get_hero_stats', LIST_HERO_STATS + " WHERE h.idHEROES = %s")
+
+    INSERT = define('hero_stats.insert', """
+        INSERT INTO hero_stats (hp, mana, attack, defense, movement_speed)
+        VALUES (%s, %s, %s, %s, %s)
+    """)
+
+    def get(self, stats_id):
+        return self._fetchone(self.GET_BY_ID, (stats_id,), HeroStats)
+
+    def get_many(self, stats_ids):
+        """Returns {stats_id: HeroStats} for the given IDs in one query"""
+        if not stats_ids:
+            return {}
+        rows = self._fetchall(self.GET_MANY, (tuple(stats_ids),), HeroStats, cache=False)
+        return {row.idHERO_STATS: row for row in rows}
+
+    def list_hero_stats(self):
+        """Returns every hero with its role and specialty IDs and stats in one query"""
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            return [record.project(HeroStatsRow) for record in snapshot.heroes()]
+        return self._fetchall(self.LIST_HERO_STATS, model=HeroStatsRow)
+
+    def get_hero_stats(self, hero_id):
+        """Returns one hero in the list_hero_stats() shape, or None"""
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            record = snapshot.hero(hero_id)
+            return record.project(HeroStatsRow) if record is not None else None
+        return self._fetchone(self.GET_HERO_STATS, (hero_id,), HeroStatsRow)
+
+    def create(self, data):
+        """Inserts a hero stats row and returns its ID"""
+        stats_id = self._execute(self.INSERT, (
+            data.get('hp'),
+            data.get('mana'),
+            data.get('attack'),
+            data.get('defense'),
+            data.get('movement_speed')
+        ), change=('hero_stats', 'create', None))
+        stats_changed.send(self, stats_id=stats_id, action='create')
+        return stats_id
+
+# ==================== SPECIALTIES ====================
+
+class SpecialtyRepository(Repository):
+    """Data access for the specialty table"""
+
+    LIST_ALL = define('specialty.list_all', "SELECT * FROM specialty")
+
+    def list_all(self):
+        snapshot = serving_snapshot()
+        if snapshot is not None:
+            return snapshot.specialties()
+        return self._fetchall(self.LIST_ALL, model=Specialty)
+
+    def list_all_from_database(self):
+        return self._fetchall(self.LIST_ALL, model=Specialty, cache=False)
+
+# ==================== USERS ====================
+
+class UserRepository(Repository):
+    """Data access for the users table (API accounts with hashed passwords)"""
+
+    # Accounts are shared by every region
+    sharded = False
+
+    GET_BY_USERNAME = define('users.get_by_username', """
+        SELECT idUSERS, username, password_hash, is_admin
+        FROM users
+        WHERE username = %s
+    """)
+
+    INSERT = define('users.insert', "INSERT INTO users (username, password_hash, is_admin) VALUES (%s, %s, %s)")
+
+    UPDATE_PASSWORD = define('users.update_password', "UPDATE users SET password_hash = %s WHERE username = %s")
+
+    def get_by_username(self, username):
+        # Never cached, so a password change takes effect at once
+        return self._fetchone(self.GET_BY_USERNAME, (username,), User, cache=False)
+
+    def create(self, username, password_hash, is_admin=False):
+        user_id = self._execute(self.INSERT, (username, password_hash, int(is_admin)))
+        user_changed.send(self, username=username, action='create')
+        return user_id
+
+    def set_password(self, username, password_hash):
+        self._execute(self.UPDATE_PASSWORD, (password_hash, username))
+        user_changed.send(self, username=username, action='password')
+
+# ==================== CHANGE FEED ====================
+
+class ChangeRepository(Repository):
+    """
+    Data access for the change feed (changes and change_seq tables).
+
+    Sequence numbers come from the single change_seq row. Its row lock is
+    held until the write commits, so changes become visible in sequence
+    order and a client reading past seq N never misses a smaller one.
+    """
+
+    NEXT_SEQ = define('changes.next_seq', "UPDATE change_seq SET seq = LAST_INSERT_ID(seq + 1) WHERE id = 1")
+
+    INSERT = define('changes.insert', "INSERT INTO changes (seq, entity, entity_id, action) VALUES (LAST_INSERT_ID(), %s, %s, %s)")
+
+    LIST_SINCE = define('changes.list_since', """
+        SELECT seq, entity, entity_id, action, changed_at
+        FROM changes
+        WHERE seq > %s
+        ORDER BY seq
+        LIMIT %s
+    """)
+
+    HEAD = define('changes.head', "SELECT seq FROM change_seq WHERE id = 1")
+
+    OLDEST = define('changes.oldest', "SELECT MIN(seq) AS seq FROM changes")
+
+    PRUNE = define('changes.prune', "DELETE FROM changes WHERE changed_at < NOW() - INTERVAL %s DAY")
+
+    @classmethod
+    def append(cls, cur, entity, entity_id, action):
+        """Logs a change on the cursor of the write's own transaction"""
+        statements.execute(cur, cls.NEXT_SEQ)
+        statements.execute(cur, cls.INSERT, (entity, entity_id, action))
+
+    def list_since(self, since, limit):
+        """Returns up to `limit` changes after seq `since`, oldest first"""
+        return self._fetchall(self.LIST_SINCE, (since, limit), Change, cache=False)
+
+    def head(self):
+        """Returns the latest assigned sequence number"""
+        row = self._fetchone(self.HEAD, cache=False)
+        return row['seq'] if row else 0
+
+    def oldest(self):
+        """Returns the oldest retained sequence number, or None if the log is empty"""
+        row = self._fetchone(self.OLDEST, cache=False)
+        return row['seq'] if row else None
+
+    def prune(self, days):
+        """Deletes changes older than `days`"""
+        self._execute(self.PRUNE, (days,))
+
+# ==================== IDEMPOTENCY KEYS ====================
+
+class IdempotencyRepository(Repository):
+    """
+    Data access for the idempotency_keys table (stored responses of POSTs
+    sent with an Idempotency-Key, shared by all workers).
+
+    A row with a NULL status_code is a claim: the first request is still
+    running. Claims expire after a short time so a crashed worker does
+    not block the key for the whole TTL.
+    """
+
+    sharded = False
+
+    GET = define('idempotency_keys.get', """
+        SELECT fingerprint, status_code, content_type, body
+        FROM idempotency_keys
+        WHERE idem_key = %s AND expires_at > NOW()
+    """)
+
+    DELETE_EXPIRED_KEY = define('idempotency_keys.delete_expired_key', "DELETE FROM idempotency_keys WHERE idem_key = %s AND expires_at <= NOW()")
+
+    CLAIM = define('idempotency_keys.claim', """
+        INSERT IGNORE INTO idempotency_keys (idem_key, fingerprint, expires_at)
+        VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+    """)
+
+    COMPLETE = define('idempotency_keys.complete', """
+        UPDATE idempotency_keys
+        SET status_code = %s, content_type = %s, body = %s, expires_at = NOW() + INTERVAL %s SECOND
+        WHERE idem_key = %s
+    """)
+
+    RELEASE = define('idempotency_keys.release', "DELETE FROM idempotency_keys WHERE idem_key = %s")
+
+    PRUNE = define('idempotency_keys.prune', "DELETE FROM idempotency_keys WHERE expires_at <= NOW()")
+
+    def get(self, key):
+        # From the primary, so a retry on another worker sees a fresh claim
+        return self._fetchone(self.GET, (key,), cache=False, primary=True)
+
+    def claim(self, key, fingerprint, seconds):
+        """Inserts a claim row; returns False if the key is already taken"""
+        with get_cursor(commit=True) as cur:
+            statements.execute(cur, self.DELETE_EXPIRED_KEY, (key,))
+            statements.execute(cur, self.CLAIM, (key, fingerprint, seconds))
+            return cur.rowcount == 1
+
+    def complete(self, key, status_code, content_type, body, seconds):
+        self._execute(self.COMPLETE, (status_code, content_type, body, seconds, key))
+
+    def release(self, key):
+        self._execute(self.RELEASE, (key,))
+
+    def prune(self):
+        """Deletes expired keys"""
+        self._execute(self.PRUNE)
+
+# ==================== QUERY DSL ====================
+
+class QueryRepository(Repository):
+    """Runs the SELECTs planned by query.py, returning dict rows"""
+
+    def select(self, sql, params):
+        return self._fetchall(sql, params)
+
+# Shared repository instances used by the blueprints
+hero_repository = HeroRepository()
+role_repository = RoleRepository()
+stats_repository = StatsRepository()
+specialty_repository = SpecialtyRepository()
+user_repository = UserRepository()
+change_repository = ChangeRepository()
+query_repository = QueryRepository()
+idempotency_repository = IdempotencyRepository()
@@ -0,0 +1,41 @@
+import hashlib
+import json
+from flask import Blueprint
+from auth import token_required
+from ratelimit import rate_limit
+from utils import format_response
+from cache import cached
+from models import to_plain
+from repositories import hero_repository, role_repository, specialty_repository
+from shards import shard_router
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+def _digest(rows):
+    return hashlib.sha1(json.dumps(to_plain(rows), sort_keys=True, default=str).encode()).hexdigest()
+
+def _etag(*resources):
+    """One ETag for several resources, changing when any of them does"""
+    return hashlib.sha1(''.join(_digest(rows) for rows in resources).encode()).hexdigest()[:32]
+
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+@token_required
+@rate_limit(cost=4)
+@cached(max_age=60, stale_while_revalidate=300)
+def bootstrap():
+    """Heroes, roles and specialties in one response, queried in parallel"""
+    heroes, roles, specialties = shard_router.gather(
+        hero_repository.list_all,
+        role_repository.list_all,
+        specialty_repository.list_all
+    )
+
+    response, status = format_response({
+        'heroes': heroes,
+        'roles': roles,
+        'specialties': specialties,
+        'counts': {'heroes': len(heroes), 'roles': len(roles), 'specialties': len(specialties)}
+    })
+    # Weak, so the JSON and XML renderings of the same data share it
+    response.set_etag(_etag(heroes, roles, specialties), weak=True)
+    return response, status
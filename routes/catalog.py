@@ -0,0 +1,51 @@
+import datetime
+from flask import Blueprint, request, send_file
+from auth import token_required, admin_required
+from ratelimit import rate_limit
+from utils import format_response
+from catalog_io import export_to_tempfile, import_catalog, spool_stream, default_snapshot_type
+
+catalog_bp = Blueprint('catalog', __name__)
+
+@catalog_bp.route('/export', methods=['GET'])
+@token_required
+@admin_required
+@rate_limit(cost=20, pool='expensive')
+def export_snapshot():
+    """Download the whole catalog as a snapshot archive"""
+    try:
+        snapshot_type = request.args.get('type', default_snapshot_type()).lower()
+        snapshot = export_to_tempfile(snapshot_type)
+        timestamp = datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')
+        
+        return send_file(
+            snapshot,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=f'mlbb-catalog-{timestamp}-{snapshot_type}.zip'
+        )
+        
+    except ValueError as e:
+        return format_response({'error': str(e)}, 400)
+
+@catalog_bp.route('/import', methods=['POST'])
+@token_required
+@admin_required
+@rate_limit(cost=20, pool='expensive')
+def import_snapshot():
+    """Bulk-load a snapshot archive into the catalog"""
+    try:
+        upload = request.files.get('file')
+        truncate = request.args.get('truncate', 'false').lower() in ('1', 'true', 'yes')
+        
+        # Zip archives need a seekable file; the raw request body is not
+        with spool_stream(upload.stream if upload else request.stream) as snapshot:
+            counts = import_catalog(snapshot, truncate)
+        
+        return format_response({
+            'message': 'Catalog imported successfully',
+            'tables': counts
+        })
+        
+    except ValueError as e:
+        return format_response({'error': str(e)}, 400)
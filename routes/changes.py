@@ -0,0 +1,99 @@
+import time
+from flask import Blueprint, request, current_app, Response, stream_with_context
+from auth import token_required
+from ratelimit import rate_limit
+from utils import format_response
+from health import long_lived
+from repositories import change_repository
+from changefeed import wait_for_changes, with_data
+
+changes_bp = Blueprint('changes', __name__)
+
+@changes_bp.before_request
+def _require_feed():
+    # Without CHANGE_FEED_ENABLED the changes tables may not exist
+    if not current_app.config.get('CHANGE_FEED_ENABLED'):
+        return format_response({'error': 'Change feed is disabled'}, 404)
+
+def _int_arg(name, default, low, high):
+    """Parses an integer query parameter, returning None when it is invalid or out of range"""
+    try:
+        value = int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return None
+    return value if low <= value <= high else None
+
+def _pruned_response(since):
+    """410 response when changes after `since` were already pruned, else None"""
+    oldest = change_repository.oldest()
+    if oldest is not None and since < oldest - 1:
+        return format_response({
+            'error': 'Changes after this seq were pruned; reload /api/heroes and continue from last_seq',
+            'last_seq': change_repository.head()
+        }, 410)
+    return None
+
+@changes_bp.route('/changes', methods=['GET'])
+@long_lived
+@token_required
+@rate_limit(cost=1)
+def get_changes():
+    """Changes after a sequence number, optionally long-polling for new ones"""
+    since = _int_arg('since', 0, 0, 2 ** 63 - 1)
+    limit = _int_arg('limit', 100, 1, 1000)
+    wait = _int_arg('wait', 0, 0, current_app.config['CHANGES_MAX_WAIT_SECONDS'])
+
+    if since is None or limit is None or wait is None:
+        return format_response({'error': 'Invalid since, limit or wait'}, 400)
+
+    pruned = _pruned_response(since)
+    if pruned is not None:
+        return pruned
+
+    changes = wait_for_changes(since, limit, wait)
+
+    return format_response({
+        'changes': with_data(changes),
+        'last_seq': changes[-1].seq if changes else since,
+        'has_more': len(changes) == limit
+    })
+
+@changes_bp.route('/changes/stream', methods=['GET'])
+@long_lived
+@token_required
+@rate_limit(cost=1)
+def stream_changes():
+    """Server-Sent Events stream of changes (resumes from Last-Event-ID)"""
+    try:
+        since = max(0, int(request.headers.get('Last-Event-ID') or request.args.get('since', 0)))
+    except ValueError:
+        return format_response({'error': 'Invalid since'}, 400)
+
+    pruned = _pruned_response(since)
+    if pruned is not None:
+        return pruned
+
+    config = current_app.config
+    stream_seconds = config['CHANGES_STREAM_SECONDS']
+    heartbeat = config['CHANGES_MAX_WAIT_SECONDS']
+
+    def events():
+        last_seq = since
+        ends_at = time.monotonic() + stream_seconds
+        yield 'retry: 1000\n\n'
+
+        while time.monotonic() < ends_at:
+            changes = wait_for_changes(last_seq, 100, min(heartbeat, max(0, ends_at - time.monotonic())))
+            if not changes:
+                yield ': keep-alive\n\n'
+                continue
+            for entry in with_data(changes):
+                data = current_app.json.dumps(entry)
+                yield f"id: {entry['seq']}\nevent: change\ndata: {data}\n\n"
+            last_seq = changes[-1].seq
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,241 +1,200 @@
 from flask import Blueprint, request
-from flask_mysqldb import MySQL
 from auth import token_required
+from ratelimit import rate_limit
+from idempotency import idempotent
 from utils import format_response
+from cache import cached
+from repositories import hero_repository
+from similarity import similar_heroes
+from hero_index import filter_heroes
+import search_index
+import autocomplete
 
 # Create Blueprint
 heroes_bp = Blueprint('heroes', __name__)
 
-# MySQL will be initialized in app.py
-mysql = None
+# Largest page of search results
+MAX_SEARCH_LIMIT = 100
 
-def init_mysql(mysql_instance):
-    """Initialize MySQL connection for this blueprint"""
-    global mysql
-    mysql = mysql_instance
+# Most completions returned for a prefix
+MAX_AUTOCOMPLETE_LIMIT = 20
 
 # ==================== HEROES CRUD ====================
 
 @heroes_bp.route('/heroes', methods=['POST'])
 @token_required
+@rate_limit(cost=2)
+@idempotent
 def create_hero():
     """Create a new hero"""
-    try:
-        data = request.get_json()
-        
-        if not data or not data.get('hero_name'):
-            return format_response({'error': 'Hero name is required'}, 400)
-        
-        cur = mysql.connection.cursor()
-        
-        query = """
-            INSERT INTO heroes (hero_name, origin, difficulty, ROLES_idROLES, 
-                              HERO_STATS_idHERO_STATS, SPECIALTY_idSPECIALTY) 
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
-        cur.execute(query, (
-            data.get('hero_name'),
-            data.get('origin', ''),
-            data.get('difficulty', ''),
-            data.get('role_id'),
-            data.get('hero_stats_id'),
-            data.get('specialty_id')
-        ))
-        
-        mysql.connection.commit()
-        hero_id = cur.lastrowid
-        cur.close()
-        
-        return format_response({
-            'message': 'Hero created successfully',
-            'id': hero_id
-        }, 201)
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
+    data = request.get_json()
+    
+    if not data or not data.get('hero_name'):
+        return format_response({'error': 'Hero name is required'}, 400)
+    
+    hero_id = hero_repository.create(data)
+    
+    return format_response({
+        'message': 'Hero created successfully',
+        'id': hero_id
+    }, 201)
 
 @heroes_bp.route('/heroes', methods=['GET'])
 @token_required
+@rate_limit(cost=2)
+@cached(max_age=60, stale_while_revalidate=300)
 def get_heroes():
     """Get all heroes with their details"""
-    try:
-        cur = mysql.connection.cursor()
-        
-        query = """
-            SELECT 
-                h.idHEROES,
-                h.hero_name,
-                h.origin,
-                h.difficulty,
-                r.role_name,
-                r.description as role_description,
-                s.specialty_name,
-                hs.hp,
-                hs.mana,
-                hs.attack,
-                hs.defense,
-                hs.movement_speed
-            FROM heroes h
-            LEFT JOIN roles r ON h.ROLES_idROLES = r.idROLES
-            LEFT JOIN specialty s ON h.SPECIALTY_idSPECIALTY = s.idSPECIALTY
-            LEFT JOIN hero_stats hs ON h.HERO_STATS_idHERO_STATS = hs.idHERO_STATS
-        """
-        
-        cur.execute(query)
-        heroes = cur.fetchall()
-        cur.close()
-        
-        return format_response({
-            'heroes': heroes,
-            'count': len(heroes)
-        })
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
+    heroes = hero_repository.list_all()
+    
+    return format_response({
+        'heroes': heroes,
+        'count': len(heroes)
+    })
 
 @heroes_bp.route('/heroes/<int:hero_id>', methods=['GET'])
 @token_required
+@rate_limit(cost=1)
+@cached(max_age=60, stale_while_revalidate=300)
 def get_hero(hero_id):
     """Get a single hero by ID"""
-    try:
-        cur = mysql.connection.cursor()
-        
-        query = """
-            SELECT 
-                h.idHEROES,
-                h.hero_name,
-                h.origin,
-                h.difficulty,
-                r.role_name,
-                r.description as role_description,
-                s.specialty_name,
-                hs.hp,
-                hs.mana,
-                hs.attack,
-                hs.defense,
-                hs.movement_speed
-            FROM heroes h
-            LEFT JOIN roles r ON h.ROLES_idROLES = r.idROLES
-            LEFT JOIN specialty s ON h.SPECIALTY_idSPECIALTY = s.idSPECIALTY
-            LEFT JOIN hero_stats hs ON h.HERO_STATS_idHERO_STATS = hs.idHERO_STATS
-            WHERE h.idHEROES = %s
-        """
-        
-        cur.execute(query, (hero_id,))
-        hero = cur.fetchone()
-        cur.close()
-        
-        if not hero:
-            return format_response({'error': 'Hero not found'}, 404)
-        
-        return format_response({'hero': hero})
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
+    hero = hero_repository.get(hero_id)
+    
+    if not hero:
+        return format_response({'error': 'Hero not found'}, 404)
+    
+    return format_response({'hero': hero})
+
+@heroes_bp.route('/heroes/<int:hero_id>/similar', methods=['GET'])
+@token_required
+@rate_limit(cost=2, pool='expensive')
+@cached(max_age=300, stale_while_revalidate=600)
+def get_similar_heroes(hero_id):
+    """Get the heroes closest to a hero in normalized stat space"""
+    k = request.args.get('k', 5, type=int)
+    
+    if k < 1 or k > 50:
+        return format_response({'error': 'k must be between 1 and 50'}, 400)
+    
+    similar = similar_heroes(hero_id, k)
+    
+    if similar is None:
+        return format_response({'error': 'Hero not found'}, 404)
+    
+    return format_response({
+        'hero_id': hero_id,
+        'similar': similar,
+        'count': len(similar)
+    })
 
 @heroes_bp.route('/heroes/<int:hero_id>', methods=['PUT'])
 @token_required
+@rate_limit(cost=2)
 def update_hero(hero_id):
     """Update a hero"""
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return format_response({'error': 'No data provided'}, 400)
-        
-        cur = mysql.connection.cursor()
-        
-        cur.execute("SELECT * FROM heroes WHERE idHEROES = %s", (hero_id,))
-        if not cur.fetchone():
-            cur.close()
-            return format_response({'error': 'Hero not found'}, 404)
-        
-        query = """
-            UPDATE heroes 
-            SET hero_name = %s, origin = %s, difficulty = %s, 
-                ROLES_idROLES = %s, HERO_STATS_idHERO_STATS = %s, 
-                SPECIALTY_idSPECIALTY = %s 
-            WHERE idHEROES = %s
-        """
-        
-        cur.execute(query, (
-            data.get('hero_name'),
-            data.get('origin'),
-            data.get('difficulty'),
-            data.get('role_id'),
-            data.get('hero_stats_id'),
-            data.get('specialty_id'),
-            hero_id
-        ))
-        
-        mysql.connection.commit()
-        cur.close()
-        
-        return format_response({'message': 'Hero updated successfully'})
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
+    data = request.get_json()
+    
+    if not data:
+        return format_response({'error': 'No data provided'}, 400)
+    
+    if not hero_repository.exists(hero_id):
+        return format_response({'error': 'Hero not found'}, 404)
+    
+    hero_repository.update(hero_id, data)
+    
+    return format_response({'message': 'Hero updated successfully'})
 
 @heroes_bp.route('/heroes/<int:hero_id>', methods=['DELETE'])
 @token_required
+@rate_limit(cost=2)
 def delete_hero(hero_id):
     """Delete a hero"""
-    try:
-        cur = mysql.connection.cursor()
-        
-        cur.execute("SELECT * FROM heroes WHERE idHEROES = %s", (hero_id,))
-        if not cur.fetchone():
-            cur.close()
-            return format_response({'error': 'Hero not found'}, 404)
-        
-        cur.execute("DELETE FROM heroes WHERE idHEROES = %s", (hero_id,))
-        mysql.connection.commit()
-        cur.close()
-        
-        return format_response({'message': 'Hero deleted successfully'})
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
+    if not hero_repository.exists(hero_id):
+        return format_response({'error': 'Hero not found'}, 404)
+    
+    hero_repository.delete(hero_id)
+    
+    return format_response({'message': 'Hero deleted successfully'})
 
 @heroes_bp.route('/heroes/search', methods=['GET'])
 @token_required
+@rate_limit(cost=5, pool='expensive')
+@cached(max_age=30, stale_while_revalidate=60)
 def search_heroes():
-    """Search heroes by name, origin, or difficulty"""
+    """Search heroes by name, origin, or difficulty, most relevant first, tolerating typos"""
+    search_term = request.args.get('q', '')
+    limit = request.args.get('limit', 20, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
+    if not search_term.strip():
+        return format_response({'error': 'Search term required'}, 400)
+    
+    if not 1 <= limit <= MAX_SEARCH_LIMIT or offset < 0:
+        return format_response({'error': f'limit must be between 1 and {MAX_SEARCH_LIMIT} and offset non-negative'}, 400)
+    
+    total, heroes = search_index.search_heroes(search_term, limit, offset)
+    
+    return format_response({
+        'heroes': heroes,
+        'count': len(heroes),
+        'total': total,
+        'limit': limit,
+        'offset': offset
+    })
+
+@heroes_bp.route('/heroes/autocomplete', methods=['GET'])
+@token_required
+@rate_limit(cost=1)
+@cached(max_age=600, stale_while_revalidate=86400)
+def autocomplete_heroes():
+    """Hero name and origin completions for a typed prefix, served from memory"""
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', 10, type=int)
+
+    if not 1 <= limit <= MAX_AUTOCOMPLETE_LIMIT:
+        return format_response({'error': f'limit must be between 1 and {MAX_AUTOCOMPLETE_LIMIT}'}, 400)
+
+    completions = autocomplete.complete(prefix, limit) if prefix.strip() else []
+
+    return format_response({
+        'prefix': prefix,
+        'completions': completions,
+        'count': len(completions)
+    })
+
+def _id_list(name):
+    """
+    Parses repeated or comma-separated integer IDs from the query string.
+
+    Returns:
+        List of IDs, or None if the parameter is absent
+
+    Raises:
+        ValueError: If a value is not an integer
+    """
+    values = request.args.getlist(name)
+    if not values:
+        return None
+    return [int(value) for param in values for value in param.split(',') if value.strip()]
+
+@heroes_bp.route('/heroes/filter', methods=['GET'])
+@token_required
+@rate_limit(cost=1)
+@cached(max_age=300, stale_while_revalidate=600)
+def filter_heroes_by_ids():
+    """Heroes matching any of the given roles AND any of the given specialties"""
     try:
-        search_term = request.args.get('q', '')
-        
-        if not search_term:
-            return format_response({'error': 'Search term required'}, 400)
-        
-        cur = mysql.connection.cursor()
-        
-        query = """
-            SELECT 
-                h.idHEROES,
-                h.hero_name,
-                h.origin,
-                h.difficulty,
-                r.role_name,
-                s.specialty_name
-            FROM heroes h
-            LEFT JOIN roles r ON h.ROLES_idROLES = r.idROLES
-            LEFT JOIN specialty s ON h.SPECIALTY_idSPECIALTY = s.idSPECIALTY
-            WHERE h.hero_name LIKE %s 
-               OR h.origin LIKE %s 
-               OR h.difficulty LIKE %s
-        """
-        
-        search_pattern = f'%{search_term}%'
-        cur.execute(query, (search_pattern, search_pattern, search_pattern))
-        
-        heroes = cur.fetchall()
-        cur.close()
-        
-        return format_response({
-            'heroes': heroes,
-            'count': len(heroes)
-        })
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
\ No newline at end of file
+        role_ids = _id_list('role_id')
+        specialty_ids = _id_list('specialty_id')
+    except ValueError:
+        return format_response({'error': 'role_id and specialty_id must be integers'}, 400)
+    
+    if role_ids is None and specialty_ids is None:
+        return format_response({'error': 'role_id or specialty_id required'}, 400)
+    
+    heroes = filter_heroes(role_ids, specialty_ids)
+    
+    return format_response({
+        'heroes': heroes,
+        'count': len(heroes)
+    })
@@ -0,0 +1,16 @@
+from flask import Blueprint
+from auth import token_required, admin_required
+from utils import format_response
+from scheduler import scheduler
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs', methods=['GET'])
+@token_required
+@admin_required
+def get_jobs():
+    """Background job runs and durations"""
+    return format_response({
+        'warmed_up': scheduler.warmed_up(),
+        'jobs': scheduler.stats()
+    })
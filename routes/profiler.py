@@ -0,0 +1,51 @@
+import datetime
+import threading
+from flask import Blueprint, request, current_app, Response
+from auth import token_required, admin_required
+from ratelimit import rate_limit
+from utils import format_response
+from profiler import stack_sampler
+
+profiler_bp = Blueprint('profiler', __name__)
+
+@profiler_bp.route('/admin/profile', methods=['GET'])
+@token_required
+@admin_required
+@rate_limit(cost=20, pool='expensive')
+def capture_profile():
+    """Sample every thread of this worker for N seconds and return the stacks"""
+    config = current_app.config
+    seconds = request.args.get('seconds', 10, type=float)
+    interval_ms = request.args.get('interval_ms', config['PROFILER_INTERVAL_MS'], type=float)
+    output = request.args.get('output', 'collapsed').lower()
+    include_idle = request.args.get('idle', 'false').lower() in ('1', 'true', 'yes')
+    
+    if not 0 < seconds <= config['PROFILER_MAX_SECONDS']:
+        return format_response({'error': f"seconds must be between 0 and {config['PROFILER_MAX_SECONDS']}"}, 400)
+    
+    if not 1 <= interval_ms <= 1000:
+        return format_response({'error': 'interval_ms must be between 1 and 1000'}, 400)
+    
+    if output not in ('collapsed', 'speedscope'):
+        return format_response({'error': 'output must be collapsed or speedscope'}, 400)
+    
+    profile = stack_sampler.capture(
+        seconds,
+        interval_ms / 1000,
+        include_idle=include_idle,
+        exclude=[threading.get_ident()]
+    )
+    
+    if profile is None:
+        return format_response({'error': 'A profile is already being captured'}, 409)
+    
+    timestamp = datetime.datetime.utcfromtimestamp(profile.started_at).strftime('%Y%m%d%H%M%S')
+    
+    if output == 'speedscope':
+        response = current_app.json.response(profile.speedscope())
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{timestamp}.speedscope.json'
+    else:
+        response = Response(profile.collapsed(), mimetype='text/plain')
+    
+    response.headers['X-Profile-Samples'] = str(profile.samples)
+    return response
@@ -0,0 +1,27 @@
+from flask import Blueprint, request
+from auth import token_required
+from ratelimit import rate_limit
+from utils import format_response
+from query import run_query, QueryError
+
+query_bp = Blueprint('query', __name__)
+
+@query_bp.route('/query', methods=['POST'])
+@token_required
+@rate_limit(cost=3, pool='expensive')
+def query():
+    """Run a JSON query selecting only the requested fields and relations"""
+    try:
+        document = request.get_json(silent=True)
+        
+        if document is None:
+            return format_response({'error': 'JSON query document required'}, 400)
+        
+        result, queries = run_query(document)
+        
+        response = format_response(result)
+        response[0].headers['X-Query-Count'] = str(queries)
+        return response
+        
+    except QueryError as e:
+        return format_response({'error': str(e)}, 400)
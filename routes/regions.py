@@ -0,0 +1,98 @@
+from flask import Blueprint, request
+from auth import token_required
+from ratelimit import rate_limit
+from utils import format_response
+from cache import cached
+from repositories import stats_repository
+from shards import shard_router
+
+regions_bp = Blueprint('regions', __name__)
+
+# Balance stats compared across regions
+STAT_FIELDS = ('hp', 'mana', 'attack', 'defense', 'movement_speed')
+
+def _regions():
+    """Regions from ?regions=a,b (repeatable), or None for all"""
+    values = request.args.getlist('regions')
+    regions = [value.strip() for param in values for value in param.split(',') if value.strip()]
+    return regions or None
+
+def _compare(hero_rows):
+    """
+    Merges one hero's stats rows from several regions.
+
+    Args:
+        hero_rows: {region: HeroStatsRow}
+
+    Returns:
+        Dict with the hero's name, its stats per region and, for every
+        stat that differs between regions, the min and max
+    """
+    first = next(iter(hero_rows.values()))
+    differences = {}
+    for field in STAT_FIELDS:
+        values = [row[field] for row in hero_rows.values() if row[field] is not None]
+        if values and min(values) != max(values):
+            differences[field] = {'min': min(values), 'max': max(values)}
+
+    return {
+        'idHEROES': first['idHEROES'],
+        'hero_name': first['hero_name'],
+        'regions': {region: {field: row[field] for field in STAT_FIELDS} for region, row in hero_rows.items()},
+        'differences': differences
+    }
+
+@regions_bp.route('/regions', methods=['GET'])
+@token_required
+def list_regions():
+    """Configured game regions and the one this request uses"""
+    return format_response({
+        'regions': shard_router.regions,
+        'default': shard_router.default,
+        'current': shard_router.current()
+    })
+
+@regions_bp.route('/regions/heroes/<int:hero_id>', methods=['GET'])
+@token_required
+@rate_limit(cost=2)
+@cached(max_age=60, stale_while_revalidate=300)
+def compare_hero(hero_id):
+    """One hero's stats in every region, queried in parallel"""
+    rows, unavailable = shard_router.fan_out(lambda: stats_repository.get_hero_stats(hero_id), _regions())
+    found = {region: row for region, row in rows.items() if row is not None}
+
+    if not found:
+        if unavailable:
+            return format_response({'error': 'Hero not found', 'unavailable': unavailable}, 503)
+        return format_response({'error': 'Hero not found'}, 404)
+
+    return format_response({
+        'hero': _compare(found),
+        'missing_in': sorted(region for region, row in rows.items() if row is None),
+        'unavailable': unavailable
+    })
+
+@regions_bp.route('/regions/heroes', methods=['GET'])
+@token_required
+@rate_limit(cost=5, pool='expensive')
+@cached(max_age=60, stale_while_revalidate=300)
+def compare_heroes():
+    """Every hero's stats across regions; ?differing=true keeps heroes balanced differently"""
+    differing = request.args.get('differing', 'false').lower() in ('1', 'true', 'yes')
+    rows, unavailable = shard_router.fan_out(stats_repository.list_hero_stats, _regions())
+
+    by_hero = {}
+    for region, region_rows in rows.items():
+        for row in region_rows:
+            by_hero.setdefault(row['idHEROES'], {})[region] = row
+
+    heroes = [_compare(by_hero[hero_id]) for hero_id in sorted(by_hero)]
+    if differing:
+        heroes = [hero for hero in heroes if hero['differences'] or len(hero['regions']) < len(rows)]
+
+    return format_response({
+        'heroes': heroes,
+        'count': len(heroes),
+        'regions': sorted(rows),
+        'unavailable': unavailable
+    })
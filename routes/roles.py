@@ -1,55 +1,35 @@
 from flask import Blueprint
-from flask_mysqldb import MySQL
 from auth import token_required
+from ratelimit import rate_limit
 from utils import format_response
+from cache import cached
+from repositories import role_repository
+from hero_index import role_heroes
 
 roles_bp = Blueprint('roles', __name__)
-mysql = None
-
-def init_mysql(mysql_instance):
-    global mysql
-    mysql = mysql_instance
 
 @roles_bp.route('/roles', methods=['GET'])
 @token_required
+@rate_limit(cost=1)
+@cached(max_age=3600, stale_while_revalidate=86400)
 def get_roles():
     """Get all roles"""
-    try:
-        cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM roles")
-        roles = cur.fetchall()
-        cur.close()
-        
-        return format_response({
-            'roles': roles,
-            'count': len(roles)
-        })
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
+    roles = role_repository.list_all()
+    
+    return format_response({
+        'roles': roles,
+        'count': len(roles)
+    })
 
 @roles_bp.route('/roles/<int:role_id>/heroes', methods=['GET'])
 @token_required
+@rate_limit(cost=1)
+@cached(max_age=300, stale_while_revalidate=600)
 def get_heroes_by_role(role_id):
-    """Get all heroes with a specific role"""
-    try:
-        cur = mysql.connection.cursor()
-        
-        query = """
-            SELECT h.idHEROES, h.hero_name, h.origin, h.difficulty, r.role_name
-            FROM heroes h
-            JOIN roles r ON h.ROLES_idROLES = r.idROLES
-            WHERE r.idROLES = %s
-        """
-        
-        cur.execute(query, (role_id,))
-        heroes = cur.fetchall()
-        cur.close()
-        
-        return format_response({
-            'heroes': heroes,
-            'count': len(heroes)
-        })
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
\ No newline at end of file
+    """Get all heroes with a specific role (from the in-memory hero index)"""
+    heroes = role_heroes(role_id)
+    
+    return format_response({
+        'heroes': heroes,
+        'count': len(heroes)
+    })
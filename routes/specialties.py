@@ -1,29 +1,35 @@
 from flask import Blueprint
-from flask_mysqldb import MySQL
 from auth import token_required
+from ratelimit import rate_limit
 from utils import format_response
+from cache import cached
+from repositories import specialty_repository
+from hero_index import specialty_heroes
 
 specialties_bp = Blueprint('specialties', __name__)
-mysql = None
-
-def init_mysql(mysql_instance):
-    global mysql
-    mysql = mysql_instance
 
 @specialties_bp.route('/specialties', methods=['GET'])
 @token_required
+@rate_limit(cost=1)
+@cached(max_age=3600, stale_while_revalidate=86400)
 def get_specialties():
     """Get all specialties"""
-    try:
-        cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM specialty")
-        specialties = cur.fetchall()
-        cur.close()
-        
-        return format_response({
-            'specialties': specialties,
-            'count': len(specialties)
-        })
-        
-    except Exception as e:
-        return format_response({'error': str(e)}, 500)
\ No newline at end of file
+    specialties = specialty_repository.list_all()
+    
+    return format_response({
+        'specialties': specialties,
+        'count': len(specialties)
+    })
+
+@specialties_bp.route('/specialties/<int:specialty_id>/heroes', methods=['GET'])
+@token_required
+@rate_limit(cost=1)
+@cached(max_age=300, stale_while_revalidate=600)
+def get_heroes_by_specialty(specialty_id):
+    """Get all heroes with a specific specialty (from the in-memory hero index)"""
+    heroes = specialty_heroes(specialty_id)
+    
+    return format_response({
+        'heroes': heroes,
+        'count': len(heroes)
+    })
@@ -0,0 +1,24 @@
+from flask import Blueprint
+from auth import token_required, admin_required
+from utils import format_response
+from statements import statements
+
+statements_bp = Blueprint('statements', __name__)
+
+@statements_bp.route('/admin/statements', methods=['GET'])
+@token_required
+@admin_required
+def get_statement_stats():
+    """Execution counts and timings per named SQL statement in this worker"""
+    return format_response({
+        'defined': len(statements.names()),
+        'statements': statements.stats()
+    })
+
+@statements_bp.route('/admin/statements', methods=['DELETE'])
+@token_required
+@admin_required
+def reset_statement_stats():
+    """Start counting from zero, e.g. before a load test"""
+    statements.reset()
+    return format_response({'message': 'Statement stats reset'})
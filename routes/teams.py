@@ -0,0 +1,48 @@
+from flask import Blueprint, request
+from auth import token_required
+from ratelimit import rate_limit
+from utils import format_response
+from repositories import stats_repository
+from analytics import StatMatrix, compare_teams, TEAM_SIZE
+
+teams_bp = Blueprint('teams', __name__)
+
+def _lineup(data, key):
+    """Returns the lineup's hero IDs, or None if it is not five distinct IDs"""
+    lineup = data.get(key)
+    
+    if not isinstance(lineup, list) or len(lineup) != TEAM_SIZE:
+        return None
+    if not all(isinstance(hero_id, int) for hero_id in lineup) or len(set(lineup)) != TEAM_SIZE:
+        return None
+    
+    return lineup
+
+@teams_bp.route('/teams/compare', methods=['POST'])
+@token_required
+@rate_limit(cost=3, pool='expensive')
+def compare():
+    """Compare two five-hero lineups and rank counter picks"""
+    data = request.get_json()
+    
+    if not data:
+        return format_response({'error': 'Lineups required'}, 400)
+    
+    team_a = _lineup(data, 'team_a')
+    team_b = _lineup(data, 'team_b')
+    
+    if team_a is None or team_b is None:
+        return format_response({'error': f'team_a and team_b must each be {TEAM_SIZE} distinct hero IDs'}, 400)
+    
+    counters = data.get('counters', 5)
+    if not isinstance(counters, int) or counters < 0:
+        return format_response({'error': 'counters must be a non-negative integer'}, 400)
+    
+    matrix = StatMatrix(stats_repository.list_hero_stats())
+    team_a_index, missing_a = matrix.positions(team_a)
+    team_b_index, missing_b = matrix.positions(team_b)
+    
+    if missing_a or missing_b:
+        return format_response({'error': 'Heroes not found', 'missing': missing_a + missing_b}, 404)
+    
+    return format_response(compare_teams(matrix, team_a_index, team_b_index, counters))
@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class Job:
+    """A named background task, run once or every `interval` seconds"""
+
+    def __init__(self, name, fn, interval=None, delay=0, warmup=False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.warmup = warmup
+        self.next_run = time.monotonic() + delay
+        self.running = False
+        self.queued_at = None
+        self.runs = 0
+        self.failures = 0
+        self.last_duration_ms = None
+        self.max_duration_ms = None
+        self.last_error = None
+        self.last_finished_at = None
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'warmup': self.warmup,
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_duration_ms': self.last_duration_ms,
+            'max_duration_ms': self.max_duration_ms,
+            'last_error': self.last_error,
+            'last_finished_at': self.last_finished_at
+        }
+
+class Scheduler:
+    """
+    Runs warm-up and periodic jobs in the background.
+
+    A dispatcher thread hands due jobs to a pool of
+    SCHEDULER_MAX_CONCURRENT_JOBS threads, so background work never holds
+    more database connections than that. A job never overlaps itself.
+    Each run is timed, logged and kept in stats().
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.app = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def add_job(self, name, fn, interval=None, delay=0, warmup=False):
+        """
+        Registers a job.
+
+        Args:
+            name: Unique job name
+            fn: Zero-argument callable, run inside an app context
+            interval: Seconds between runs, or None to run once
+            delay: Seconds to wait before the first run
+            warmup: The job fills caches, so warmed_up() waits for it
+        """
+        with self._lock:
+            self.jobs[name] = Job(name, fn, interval, delay, warmup)
+        self._wakeup.set()
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Starts the dispatcher thread (once)"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.app.config.get('SCHEDULER_MAX_CONCURRENT_JOBS', 2),
+            thread_name_prefix='scheduler-job'
+        )
+        self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._thread = None
+        self._executor = None
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    job for job in self.jobs.values()
+                    if not job.running and job.next_run is not None and job.next_run <= now
+                ]
+                for job in due:
+                    job.running = True
+                    job.queued_at = now
+                    job.next_run = None
+                upcoming = [job.next_run for job in self.jobs.values() if job.next_run is not None]
+
+            for job in due:
+                self._executor.submit(self.run_job, job.name)
+
+            timeout = max(0.0, min(upcoming) - time.monotonic()) if upcoming else None
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def run_job(self, name):
+        """Runs a job now in the calling thread and records its duration"""
+        job = self.jobs[name]
+        with self._lock:
+            job.running = True
+            job.queued_at = None
+        started = time.perf_counter()
+        error = None
+
+        try:
+            with self.app.app_context():
+                job.fn()
+        except Exception as e:
+            error = e
+            self.app.logger.exception('Job %s failed', name)
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        with self._lock:
+            job.runs += 1
+            job.last_duration_ms = duration_ms
+            job.max_duration_ms = max(job.max_duration_ms or 0, duration_ms)
+            job.last_error = str(error) if error is not None else None
+            job.failures += error is not None
+            job.last_finished_at = time.time()
+            job.next_run = time.monotonic() + job.interval if job.interval else None
+            job.running = False
+        self._wakeup.set()
+
+        self.app.logger.info('Job %s finished in %.2f ms', name, duration_ms)
+
+    def warmed_up(self):
+        """True once every warm-up job has succeeded at least once"""
+        with self._lock:
+            return all(job.runs > job.failures for job in self.jobs.values() if job.warmup)
+
+    def queue_depth(self):
+        """
+        Jobs that are due but still waiting for a free worker.
+
+        Returns:
+            (number of waiting jobs, seconds the oldest has waited)
+        """
+        now = time.monotonic()
+        with self._lock:
+            waits = [now - job.queued_at for job in self.jobs.values() if job.queued_at is not None]
+        return len(waits), round(max(waits, default=0.0), 3)
+
+    def stats(self):
+        with self._lock:
+            return [job.stats() for job in self.jobs.values()]
+
+scheduler = Scheduler()
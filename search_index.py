@@ -0,0 +1,234 @@
+import threading
+from live_index import LiveIndex
+from models import HeroMatch
+
+# A match in the hero name counts most, then origin, then difficulty
+NAME_WEIGHT = 1.0
+ORIGIN_WEIGHT = 0.6
+DIFFICULTY_WEIGHT = 0.4
+
+def normalize(text):
+    """Lowercases and collapses whitespace"""
+    return ' '.join(str(text).lower().split()) if text else ''
+
+def trigrams(word):
+    """Trigrams of a word, padded so its first letters get their own ('  c', ' ch')"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def max_typos(word):
+    """Edits tolerated in a query word: none up to 2 letters, 1 up to 5, then 2"""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance: insertions, deletions,
+    substitutions and swaps of adjacent letters each cost 1.
+
+    Returns limit + 1 as soon as the distance is known to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1])
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+def _word_score(word, field_words):
+    """Best match of one query word against a field's words (0 = no match)"""
+    typos = max_typos(word)
+    best = 0.0
+    for field_word in field_words:
+        if field_word == word:
+            return 1.0
+        if field_word.startswith(word):
+            best = max(best, 0.85)
+        elif word in field_word:
+            best = max(best, 0.6)
+        elif typos:
+            # A typo in the whole word, or (scoring a little lower) in a word still being typed
+            distance = edit_distance(word, field_word, typos)
+            weight = 0.7
+            if distance > typos and len(field_word) > len(word):
+                distance = edit_distance(word, field_word[:len(word)], typos)
+                weight = 0.63
+            if distance <= typos:
+                best = max(best, weight * (1 - distance / (len(word) + 1)))
+    return best
+
+def _substring_score(query, field):
+    """Relevance of a field containing the query anywhere, as SQL LIKE '%query%' matched"""
+    if not field or query not in field:
+        return 0.0
+    if field == query:
+        return 1.0
+    return 0.95 if field.startswith(query) else 0.5
+
+def _field_score(query, words, field, field_words):
+    """Relevance of a field for the query, from 0 to 1"""
+    substring = _substring_score(query, field)
+    if substring >= 0.95 or not field:
+        return substring
+
+    total = 0.0
+    for word in words:
+        score = _word_score(word, field_words)
+        if not score:
+            return substring
+        total += score
+    return max(0.9 * total / len(words), substring)
+
+class _Entry:
+    __slots__ = ('record', 'name', 'name_words', 'origin', 'origin_words', 'difficulty')
+
+    def __init__(self, record):
+        self.record = record
+        self.name = normalize(record.hero_name)
+        self.name_words = self.name.split()
+        self.origin = normalize(record.origin)
+        self.origin_words = self.origin.split()
+        self.difficulty = normalize(record.difficulty)
+
+    def words(self):
+        return {*self.name_words, *self.origin_words, *self.difficulty.split()}
+
+class SearchIndex:
+    """
+    Typo-tolerant search over hero names, origins and difficulties.
+
+    Every word of those fields is indexed by its trigrams. A query word
+    looks up the words sharing a trigram with it (its candidates), and
+    the heroes owning them are scored: exact and prefix matches first,
+    then substrings, then words within a small edit distance, so "chu"
+    still finds Chou. Names weigh more than origins. Every hero whose
+    name, origin or difficulty contains the query still matches, as it
+    did with SQL LIKE.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built = False
+        self._entries = {}
+        self._heroes = {}
+        self._trigrams = {}
+
+    def _add(self, entry):
+        hero_id = entry.record.idHEROES
+        self._entries[hero_id] = entry
+        for word in entry.words():
+            heroes = self._heroes.get(word)
+            if heroes is None:
+                heroes = self._heroes[word] = set()
+                for trigram in trigrams(word):
+                    self._trigrams.setdefault(trigram, set()).add(word)
+            heroes.add(hero_id)
+
+    def _drop(self, hero_id):
+        entry = self._entries.pop(hero_id, None)
+        if entry is None:
+            return
+        for word in entry.words():
+            heroes = self._heroes[word]
+            heroes.discard(hero_id)
+            if not heroes:
+                del self._heroes[word]
+                for trigram in trigrams(word):
+                    self._trigrams[trigram].discard(word)
+
+    def build(self, records):
+        """
+        Builds the index from catalog records.
+
+        Args:
+            records: HeroRecord rows (HeroRepository.list_records())
+        """
+        with self._lock:
+            self._entries = {}
+            self._heroes = {}
+            self._trigrams = {}
+            for record in records:
+                self._add(_Entry(record))
+            self.built = True
+
+    def upsert(self, record):
+        with self._lock:
+            self._drop(record.idHEROES)
+            self._add(_Entry(record))
+
+    def remove(self, hero_id):
+        with self._lock:
+            self._drop(hero_id)
+
+    def _candidates(self, words):
+        # Trigrams of a word under 3 letters cannot find it inside longer words
+        if any(len(word) < 3 for word in words):
+            return set(self._entries)
+
+        found = set()
+        for word in words:
+            for trigram in trigrams(word):
+                for candidate in self._trigrams.get(trigram, ()):
+                    found |= self._heroes[candidate]
+        return found
+
+    def search(self, text, limit=20, offset=0):
+        """
+        Returns heroes matching `text`, most relevant first.
+
+        Args:
+            text: Search text, one or more words
+            limit: Page size
+            offset: Matches to skip
+
+        Returns:
+            (total, page): the number of matches and a list of HeroMatch
+        """
+        query = normalize(text)
+        words = query.split()
+        if not words:
+            return 0, []
+
+        scored = []
+        with self._lock:
+            for hero_id in self._candidates(words):
+                entry = self._entries[hero_id]
+                score = max(
+                    NAME_WEIGHT * _field_score(query, words, entry.name, entry.name_words),
+                    ORIGIN_WEIGHT * _field_score(query, words, entry.origin, entry.origin_words),
+                    DIFFICULTY_WEIGHT * _substring_score(query, entry.difficulty)
+                )
+                if score > 0:
+                    scored.append((-score, entry.name, hero_id, entry.record))
+
+        scored.sort(key=lambda match: match[:3])
+        page = []
+        for negative_score, name, hero_id, record in scored[offset:offset + limit]:
+            match = record.project(HeroMatch)
+            match.score = round(-negative_score, 3)
+            page.append(match)
+        return len(scored), page
+
+_live = LiveIndex(SearchIndex)
+# The default region's index
+search_index = _live.default
+ensure_built = _live.ensure_built
+rebuild = _live.rebuild
+
+def search_heroes(text, limit=20, offset=0):
+    """Ranked, paginated hero search served from memory; see SearchIndex.search()"""
+    return ensure_built().search(text, limit, offset)
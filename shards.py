@@ -0,0 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request, current_app, has_request_context
+from db_router import ConnectionPool, connect_kwargs, db_router
+from errors import CircuitBreaker, circuit_breaker, is_unavailable
+from utils import format_response
+
+# Request parameter and JWT claim naming the region
+REGION_PARAM = 'region'
+REGION_CLAIM = 'region'
+
+# Region pinned by ShardRouter.use() (fan-out workers); otherwise the request decides
+_pinned = ContextVar('region', default=None)
+
+class UnknownRegion(Exception):
+    """A request or token names a region that is not configured"""
+
+    def __init__(self, region):
+        super().__init__(f'Unknown region: {region}')
+        self.region = region
+
+class Shard:
+    """One region's catalog database with its own pool and circuit breaker"""
+
+    def __init__(self, region, connect_kwargs, pool_size):
+        self.region = region
+        self.pool = ConnectionPool(connect_kwargs, pool_size)
+        self.breaker = CircuitBreaker()
+
+class ShardRouter:
+    """
+    Selects the catalog database of a game region.
+
+    The default region (SHARD_DEFAULT_REGION) is the MYSQL_* primary with
+    its replicas, so without SHARD_REGIONS nothing changes. Every region
+    in SHARD_REGIONS is a separate database with its own connection pool
+    and circuit breaker. A request uses the region in its `region`
+    parameter, else the `region` claim of its JWT, else the default.
+    Cached results, cached responses and the hero and similarity indexes
+    are kept per region.
+    """
+
+    def __init__(self):
+        self.default = 'default'
+        self.shards = {}
+        self._executor = None
+
+    def init_app(self, app):
+        """Configures region shards from app.config and hooks app context teardown"""
+        config = app.config
+        self.default = config.get('SHARD_DEFAULT_REGION', 'default')
+
+        self.shards = {}
+        for region, server in config.get('SHARD_REGIONS', {}).items():
+            if region == self.default:
+                raise ValueError(f'SHARD_REGIONS must not list the default region {region!r}; it uses MYSQL_*')
+            self.shards[region] = Shard(region, connect_kwargs(config, server), config.get('DB_POOL_SIZE', 10))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.get('SHARD_FANOUT_MAX_WORKERS', 4),
+            thread_name_prefix='shard-fanout'
+        )
+
+        app.teardown_appcontext(self.release)
+        app.register_error_handler(UnknownRegion, self._unknown_region)
+
+    @property
+    def regions(self):
+        return [self.default, *self.shards]
+
+    def check(self, region):
+        """Raises UnknownRegion unless `region` is configured"""
+        if region != self.default and region not in self.shards:
+            raise UnknownRegion(region)
+        return region
+
+    def current(self):
+        """The region the current context reads and writes"""
+        region = _pinned.get()
+        if region is not None:
+            return region
+
+        if not has_request_context():
+            return self.default
+
+        region = request.args.get(REGION_PARAM) or g.get('jwt_claims', {}).get(REGION_CLAIM)
+        return self.check(region) if region else self.default
+
+    @contextmanager
+    def use(self, region):
+        """Pins the block to `region`, whatever the request asks for"""
+        token = _pinned.set(self.check(region))
+        try:
+            yield
+        finally:
+            _pinned.reset(token)
+
+    # -------------------- connections --------------------
+
+    def breaker(self, region):
+        shard = self.shards.get(region)
+        return shard.breaker if shard is not None else circuit_breaker
+
+    def connection(self, region):
+        """
+        Returns this app context's connection to `region`, or None for the default region.
+
+        The connection is checked out once per app context and returned to
+        the region's pool at teardown.
+        """
+        shard = self.shards.get(region)
+        if shard is None:
+            return None
+
+        held = g.setdefault('shard_connections', {})
+        if region not in held:
+            held[region] = (shard, shard.pool.acquire())
+        return held[region][1]
+
+    def discard(self, conn):
+        """
+        Closes `conn` if it is one of this app context's shard connections.
+
+        Returns:
+            True if `conn` belonged to a shard
+        """
+        held = g.get('shard_connections') or {}
+        for region, (shard, held_conn) in held.items():
+            if held_conn is conn:
+                del held[region]
+                shard.pool.release(conn, broken=True)
+                return True
+        return False
+
+    def release(self, exc=None):
+        held = g.pop('shard_connections', None) or {}
+        for shard, conn in held.values():
+            shard.pool.release(conn, broken=exc is not None)
+
+    # -------------------- fan-out --------------------
+
+    def fan_out(self, fn, regions=None):
+        """
+        Calls `fn` once per region, in parallel.
+
+        Each call runs on a worker thread in its own app context, pinned to
+        its region, so it uses that region's connections and caches.
+
+        Args:
+            fn: Zero-argument callable doing the per-region work
+            regions: Regions to query (default: all)
+
+        Returns:
+            (results, errors): {region: fn() result} and {region: message}
+            for regions whose database was unavailable
+        """
+        regions = [self.check(region) for region in (regions or self.regions)]
+        futures = {region: self._submit(fn, region) for region in regions}
+
+        results = {}
+        errors = {}
+        for region, future in futures.items():
+            try:
+                results[region] = future.result()
+            except Exception as e:
+                # One region being down must not fail the others
+                if not is_unavailable(e):
+                    raise
+                errors[region] = 'Database unavailable'
+        return results, errors
+
+    def gather(self, *fns):
+        """
+        Calls each of `fns` in parallel in the current region.
+
+        Each call runs on a worker thread in its own app context, so it
+        checks out its own database connection.
+
+        Returns:
+            List of the results, in the order of `fns`
+        """
+        region = self.current()
+        futures = [self._submit(fn, region) for fn in fns]
+        return [future.result() for future in futures]
+
+    def _submit(self, fn, region):
+        app = current_app._get_current_object()
+        read_primary = db_router.must_read_primary()
+
+        def run():
+            with app.app_context(), self.use(region), db_router.worker(read_primary):
+                return fn()
+
+        return self._executor.submit(run)
+
+    def _unknown_region(self, error):
+        return format_response({'error': str(error), 'regions': self.regions}, 400)
+
+shard_router = ShardRouter()
+
+class RegionLocal:
+    """
+    Keeps one instance of some in-memory state (e.g. an index) per region.
+
+    `default` is the default region's instance; the others are created by
+    `factory` the first time their region asks for one.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.default = factory()
+        self._regions = {}
+
+    def get(self):
+        """The current region's instance"""
+        region = shard_router.current()
+        if region == shard_router.default:
+            return self.default
+        instance = self._regions.get(region)
+        if instance is None:
+            instance = self._regions.setdefault(region, self.factory())
+        return instance
+
+    def all(self):
+        return [self.default, *self._regions.values()]
@@ -0,0 +1,17 @@
+from blinker import Namespace
+
+# Signals sent by the data access layer after a successful write.
+# Caches and in-memory indexes subscribe to these to stay fresh.
+_signals = Namespace()
+
+# Sent with hero_id and action ('create', 'update' or 'delete')
+hero_changed = _signals.signal('hero-changed')
+
+# Sent with stats_id and action ('create')
+stats_changed = _signals.signal('stats-changed')
+
+# Sent with tables (row counts per table) after a bulk catalog import
+catalog_reloaded = _signals.signal('catalog-reloaded')
+
+# Sent with username and action ('create' or 'password') after a user write
+user_changed = _signals.signal('user-changed')
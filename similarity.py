@@ -0,0 +1,186 @@
+import threading
+import numpy as np
+from live_index import LiveIndex
+
+# Stat columns of the feature vector, standardized across the catalog
+STAT_FIELDS = ('hp', 'mana', 'attack', 'defense', 'movement_speed')
+
+# Weight of the one-hot role and specialty features relative to one stat
+ROLE_WEIGHT = 1.0
+SPECIALTY_WEIGHT = 0.5
+
+# Rebuild from scratch once this share of rows changed incrementally,
+# so the standardization does not drift too far from the catalog
+REBUILD_RATIO = 0.1
+
+class SimilarityIndex:
+    """
+    Nearest-neighbor index over hero feature vectors.
+
+    Each hero becomes a compact float32 row: z-scored stats followed by
+    weighted one-hot role and specialty columns. A query is one
+    matrix-vector product (squared Euclidean distance via dot products)
+    plus a top-k partition, so no database work happens per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built = False
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, len(STAT_FIELDS)), dtype=np.float32)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self.heroes = []
+        self._positions = {}
+        self._roles = {}
+        self._specialties = {}
+        self._mean = np.zeros(len(STAT_FIELDS))
+        self._std = np.ones(len(STAT_FIELDS))
+        self._updates = 0
+
+    def build(self, rows):
+        """
+        Builds the index from catalog rows.
+
+        Args:
+            rows: HeroRecord rows (HeroRepository.list_records())
+        """
+        stats = np.array(
+            [[row.get(field) for field in STAT_FIELDS] for row in rows],
+            dtype=np.float64
+        ).reshape(len(rows), len(STAT_FIELDS))
+        stats = np.nan_to_num(stats)
+
+        mean = stats.mean(axis=0) if rows else np.zeros(len(STAT_FIELDS))
+        std = stats.std(axis=0) if rows else np.ones(len(STAT_FIELDS))
+        std[std == 0] = 1
+
+        roles = sorted({row['role_id'] for row in rows if row.get('role_id')})
+        specialties = sorted({row['specialty_id'] for row in rows if row.get('specialty_id')})
+
+        with self._lock:
+            self._mean = mean
+            self._std = std
+            self._roles = {role_id: i for i, role_id in enumerate(roles)}
+            self._specialties = {specialty_id: i for i, specialty_id in enumerate(specialties)}
+
+            dimensions = len(STAT_FIELDS) + len(roles) + len(specialties)
+            matrix = np.zeros((len(rows), dimensions), dtype=np.float32)
+            for i, row in enumerate(rows):
+                matrix[i] = self._encode(row)
+
+            self.ids = np.array([row['idHEROES'] for row in rows], dtype=np.int64)
+            self.matrix = matrix
+            self.sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+            self.heroes = [self._summary(row) for row in rows]
+            self._positions = {int(hero_id): i for i, hero_id in enumerate(self.ids)}
+            self._updates = 0
+            self.built = True
+
+    def _encode(self, row):
+        stats = np.array([row.get(field) for field in STAT_FIELDS], dtype=np.float64)
+        vector = np.zeros(len(STAT_FIELDS) + len(self._roles) + len(self._specialties), dtype=np.float32)
+        vector[:len(STAT_FIELDS)] = (np.nan_to_num(stats) - self._mean) / self._std
+
+        if row.get('role_id') in self._roles:
+            vector[len(STAT_FIELDS) + self._roles[row['role_id']]] = ROLE_WEIGHT
+        if row.get('specialty_id') in self._specialties:
+            vector[len(STAT_FIELDS) + len(self._roles) + self._specialties[row['specialty_id']]] = SPECIALTY_WEIGHT
+
+        return vector
+
+    def _summary(self, row):
+        return {
+            'idHEROES': row['idHEROES'],
+            'hero_name': row.get('hero_name'),
+            'role_name': row.get('role_name'),
+            'specialty_name': row.get('specialty_name')
+        }
+
+    def _is_encodable(self, row):
+        return (
+            (not row.get('role_id') or row['role_id'] in self._roles)
+            and (not row.get('specialty_id') or row['specialty_id'] in self._specialties)
+        )
+
+    def upsert(self, row):
+        """
+        Adds or replaces one hero's row in place.
+
+        Returns:
+            False when the row introduces a new role or specialty, or
+            enough rows changed that the index should be rebuilt
+        """
+        with self._lock:
+            if not self._is_encodable(row):
+                return False
+
+            vector = self._encode(row)
+            position = self._positions.get(row['idHEROES'])
+
+            if position is None:
+                self.ids = np.append(self.ids, row['idHEROES'])
+                self.matrix = np.vstack([self.matrix, vector])
+                self.sq_norms = np.append(self.sq_norms, np.float32(vector @ vector))
+                self.heroes.append(self._summary(row))
+                self._positions[row['idHEROES']] = len(self.ids) - 1
+            else:
+                self.matrix[position] = vector
+                self.sq_norms[position] = vector @ vector
+                self.heroes[position] = self._summary(row)
+
+            self._updates += 1
+            return self._updates <= REBUILD_RATIO * max(len(self.ids), 1)
+
+    def remove(self, hero_id):
+        with self._lock:
+            position = self._positions.get(hero_id)
+            if position is None:
+                return
+
+            self.ids = np.delete(self.ids, position)
+            self.matrix = np.delete(self.matrix, position, axis=0)
+            self.sq_norms = np.delete(self.sq_norms, position)
+            del self.heroes[position]
+            self._positions = {int(hero_id): i for i, hero_id in enumerate(self.ids)}
+
+    def query(self, hero_id, k=5):
+        """
+        Finds the k heroes closest to a hero.
+
+        Args:
+            hero_id: Hero to find neighbors for
+            k: Number of neighbors
+
+        Returns:
+            List of hero summaries with a similarity in (0, 1], closest
+            first, or None if the hero is not in the index
+        """
+        with self._lock:
+            position = self._positions.get(hero_id)
+            if position is None:
+                return None
+
+            target = self.matrix[position]
+            distances = self.sq_norms - 2 * (self.matrix @ target) + self.sq_norms[position]
+            distances[position] = np.inf
+
+            k = min(k, len(self.ids) - 1)
+            if k <= 0:
+                return []
+
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest])]
+
+            return [
+                dict(self.heroes[i], similarity=round(1 / (1 + float(np.sqrt(max(distances[i], 0)))), 4))
+                for i in nearest
+            ]
+
+_live = LiveIndex(SimilarityIndex)
+# The default region's index
+similarity_index = _live.default
+ensure_built = _live.ensure_built
+rebuild = _live.rebuild
+
+def similar_heroes(hero_id, k=5):
+    return ensure_built().query(hero_id, k)
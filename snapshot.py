@@ -0,0 +1,197 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from models import HeroRecord, Role, Specialty
+from signals import catalog_reloaded
+
+# ==================== FILE FORMAT ====================
+#
+# header   magic, format version, snapshot version (ns timestamp), section count
+# sections name, offset, length, record count (one table entry per section)
+# heroes   one JSON array per line, columns listed in the meta section
+# index    fixed-width (hero_id, offset, length) entries sorted by hero_id
+# roles, specialties, meta   JSON documents
+
+MAGIC = b'MLBBSNAP'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<8sIqI')
+SECTION = struct.Struct('<16sQQI')
+INDEX_ENTRY = struct.Struct('<QQI')
+
+def write_snapshot(path, heroes, roles, specialties):
+    """
+    Writes an immutable catalog snapshot and publishes it atomically.
+
+    The file is written next to `path`, fsynced and renamed over it, so
+    readers only ever see a complete old or a complete new snapshot.
+
+    Args:
+        path: Destination file
+        heroes: HeroRecord models
+        roles: Role models
+        specialties: Specialty models
+
+    Returns:
+        Snapshot version (nanosecond timestamp)
+    """
+    version = time.time_ns()
+    fields = HeroRecord.__slots__
+
+    lines = []
+    index = []
+    offset = 0
+    for hero in sorted(heroes, key=lambda hero: hero.idHEROES):
+        line = json.dumps([getattr(hero, name) for name in fields], separators=(',', ':')).encode('utf-8') + b'\n'
+        index.append(INDEX_ENTRY.pack(hero.idHEROES, offset, len(line) - 1))
+        lines.append(line)
+        offset += len(line)
+
+    sections = [
+        ('meta', json.dumps({'hero_fields': fields, 'version': version}).encode('utf-8'), 1),
+        ('heroes', b''.join(lines), len(lines)),
+        ('index', b''.join(index), len(index)),
+        ('roles', json.dumps([role.to_dict() for role in roles]).encode('utf-8'), len(roles)),
+        ('specialties', json.dumps([specialty.to_dict() for specialty in specialties]).encode('utf-8'), len(specialties))
+    ]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, len(sections)))
+            position = HEADER.size + SECTION.size * len(sections)
+            for name, data, count in sections:
+                f.write(SECTION.pack(name.encode('ascii'), position, len(data), count))
+                position += len(data)
+            for name, data, count in sections:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return version
+
+# ==================== READER ====================
+
+class CatalogSnapshot:
+    """
+    A memory-mapped snapshot file.
+
+    The mapping is read-only and shared, so every worker process on the
+    host reads the same page-cache pages. Single-hero lookups binary
+    search the fixed-width index in place and decode only that hero; the
+    full hero list is decoded once and reused.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, self.version, section_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} catalog snapshot')
+
+        self._sections = {}
+        for i in range(section_count):
+            name, offset, length, count = SECTION.unpack_from(self._mmap, HEADER.size + i * SECTION.size)
+            self._sections[name.rstrip(b'\0').decode('ascii')] = (offset, length, count)
+
+        self._hero_fields = tuple(self._json('meta')['hero_fields'])
+        self._heroes = None
+
+    def _bytes(self, name):
+        offset, length, count = self._sections[name]
+        return self._mmap[offset:offset + length]
+
+    def _json(self, name):
+        return json.loads(self._bytes(name))
+
+    def _hero_records(self, lines):
+        description = [(name,) for name in self._hero_fields]
+        return HeroRecord.from_rows([json.loads(line) for line in lines], description)
+
+    def heroes(self):
+        """Returns every hero as HeroRecord models"""
+        if self._heroes is None:
+            # The file never changes once published, so neither do its records
+            self._heroes = self._hero_records(self._bytes('heroes').splitlines())
+        return list(self._heroes)
+
+    def hero(self, hero_id):
+        """Returns one HeroRecord, or None, without decoding the other heroes"""
+        index_offset, index_length, count = self._sections['index']
+        heroes_offset = self._sections['heroes'][0]
+
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, offset, length = INDEX_ENTRY.unpack_from(self._mmap, index_offset + middle * INDEX_ENTRY.size)
+            if entry_id < hero_id:
+                low = middle + 1
+            elif entry_id > hero_id:
+                high = middle
+            else:
+                start = heroes_offset + offset
+                return self._hero_records([self._mmap[start:start + length]])[0]
+
+        return None
+
+    def roles(self):
+        return Role.from_rows(self._json('roles'))
+
+    def specialties(self):
+        return Specialty.from_rows(self._json('specialties'))
+
+class SnapshotStore:
+    """
+    Holds the current snapshot and swaps in newly published files.
+
+    The file's inode and mtime are checked at most every
+    `check_seconds`. When the builder renames a new file into place, the
+    next check maps it and sends catalog_reloaded so caches built from
+    the old data are dropped. Requests that are still using the old
+    mapping keep it alive until they finish. While the file is missing
+    or unreadable there is no snapshot, and reads go to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._identity = None
+        self._checked_at = 0.0
+
+    def current(self, path, check_seconds=5):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < check_seconds:
+            return self._snapshot
+
+        with self._lock:
+            try:
+                stat = os.stat(path)
+                identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                swapped = self._snapshot is not None and identity != self._identity
+                if identity != self._identity:
+                    self._snapshot = CatalogSnapshot(path)
+                    self._identity = identity
+            except OSError:
+                # Missing or mid-rotation: fall back to the database until it is back
+                swapped = self._snapshot is not None
+                self._snapshot = None
+                self._identity = None
+            self._checked_at = now
+            snapshot = self._snapshot
+
+        if swapped:
+            catalog_reloaded.send(self, tables=None)
+        return snapshot
+
+catalog_snapshot = SnapshotStore()
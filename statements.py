@@ -0,0 +1,113 @@
+import threading
+import time
+
+# Stats key for SQL built at runtime (query.py) rather than defined here
+UNREGISTERED = 'unregistered'
+
+def compact(sql):
+    """Collapses whitespace runs; statement text keeps literals in parameters, so this is safe"""
+    return ' '.join(sql.split())
+
+class Statement(str):
+    """
+    SQL text defined once under a name.
+
+    A str subclass, so it goes anywhere a query string does (cursor
+    execute, cache keys, span attributes) and carries its name to the
+    execution stats.
+    """
+
+    def __new__(cls, name, sql):
+        statement = super().__new__(cls, compact(sql))
+        statement.name = name
+        return statement
+
+class StatementStats:
+    """Execution counts and timings of one statement"""
+    __slots__ = ('count', 'errors', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+class StatementRegistry:
+    """
+    The named SQL statements of the repositories, with per-statement stats.
+
+    Statements are compacted once when defined, so no execution sends
+    the indentation of the source. Every execution through execute() is
+    counted and timed under the statement's name; a statement missing
+    from the stats never ran.
+    """
+
+    def __init__(self):
+        self._statements = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def define(self, name, sql):
+        """
+        Registers a statement.
+
+        Raises:
+            ValueError: `name` is already defined with different SQL
+        """
+        statement = Statement(name, sql)
+        existing = self._statements.get(name)
+        if existing is not None and existing != statement:
+            raise ValueError(f'Statement {name!r} is already defined with different SQL')
+        self._statements[name] = statement
+        return statement
+
+    def get(self, name):
+        return self._statements[name]
+
+    def names(self):
+        return sorted(self._statements)
+
+    def execute(self, cur, query, params=None):
+        """Runs `query` on `cur`, timed under the statement's name"""
+        name = getattr(query, 'name', UNREGISTERED)
+        started = time.perf_counter()
+        try:
+            cur.execute(query, params)
+        except Exception:
+            self._record(name, time.perf_counter() - started, failed=True)
+            raise
+        self._record(name, time.perf_counter() - started)
+
+    def _record(self, name, seconds, failed=False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = StatementStats()
+            stats.count += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            if failed:
+                stats.errors += 1
+
+    def stats(self):
+        """Returns {name: stats dict} for every executed statement, most total time first"""
+        with self._lock:
+            ordered = sorted(self._stats.items(), key=lambda item: item[1].total, reverse=True)
+            return {name: stats.as_dict() for name, stats in ordered}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+statements = StatementRegistry()
+define = statements.define
@@ -10,6 +10,9 @@ from unittest.mock import MagicMock, patch
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Never start background jobs in the test process
+os.environ['SCHEDULER_ENABLED'] = 'false'
+
 from app import app, mysql
 from config import Config
 
@@ -23,6 +26,16 @@ class TestConfig(Config):
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'root')
     MYSQL_DB = 'mlbbdb'  # Use actual production database
     MYSQL_CURSORCLASS = 'DictCursor'
+    # Mocked tests reuse URLs with different data, so never serve cached responses
+    RESPONSE_CACHE_ENABLED = False
+    DB_RESULT_CACHE_ENABLED = False
+    SCHEDULER_ENABLED = False
+    # Visual tests fire many requests as one user; rate limit tests enable it themselves
+    RATE_LIMIT_ENABLED = False
+    # Sampled traces would be written to traces.jsonl; tracing tests enable it themselves
+    TRACING_ENABLED = False
+    # Tests build the in-memory indexes themselves; the version check test enables it
+    LIVE_INDEX_CHECK_SECONDS = 0
 
 
 @pytest.fixture
@@ -48,12 +61,16 @@ def runner(app_context):
 @pytest.fixture
 def mock_mysql():
     """Mock MySQL connection"""
+    from db_router import db_router
     with patch('app.mysql') as mock:
         # Setup mock cursor
         mock_cursor = MagicMock()
         mock.connection.cursor.return_value = mock_cursor
         
-        yield mock
+        # Worker threads take the primary connection from a pool
+        with patch.object(db_router.primary, 'acquire', return_value=mock.connection), \
+                patch.object(db_router.primary, 'release'):
+            yield mock
 
 
 @pytest.fixture
@@ -72,6 +89,16 @@ def headers_with_token(valid_jwt_token):
     }
 
 
+@pytest.fixture
+def headers_with_admin_token():
+    """Headers with a JWT token carrying the admin claim"""
+    from auth import create_token
+    return {
+        'Content-Type': 'application/json',
+        'Authorization': f"Bearer {create_token('admin', admin=True)}"
+    }
+
+
 @pytest.fixture
 def headers_without_token():
     """Headers without JWT token"""
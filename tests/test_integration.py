@@ -200,3 +200,37 @@ class TestIntegrationFormatting:
         
         assert response.status_code == 200
         assert b'<?xml' in response.data or b'<response>' in response.data
+
+
+class TestIntegrationReplicaRouting:
+    """Read-replica routing against a second local MariaDB instance
+    
+    Set MYSQL_REPLICA_PORT (and optionally MYSQL_REPLICA_HOST) to run.
+    """
+    
+    @pytest.fixture
+    def replica_router(self, integration_client):
+        import os
+        from db_router import ReplicaRouter
+        
+        port = os.getenv('MYSQL_REPLICA_PORT')
+        if not port:
+            pytest.skip("MYSQL_REPLICA_PORT not set")
+        
+        app = integration_client.application
+        app.config['MYSQL_REPLICAS'] = [{'host': os.getenv('MYSQL_REPLICA_HOST', '127.0.0.1'), 'port': int(port)}]
+        router = ReplicaRouter()
+        router.init_app(app)
+        
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('repositories.db_router', router)
+            yield router
+        
+        app.config['MYSQL_REPLICAS'] = []
+    
+    def test_reads_use_replica_pool(self, integration_client, headers_with_token, replica_router):
+        """Test that GET traffic is served through the replica pool"""
+        response = integration_client.get('/api/roles', headers=headers_with_token)
+        
+        assert response.status_code == 200
+        assert replica_router.replicas[0].pool.idle_count() == 1
@@ -57,7 +57,137 @@ class TestVisualAuthentication:
         print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
         assert response.status_code == 401
     
-    def test_03_health_check(self, client):
+    def test_03_login_reuses_recent_token(self, client):
+        """Show that a repeat login returns the token issued moments ago"""
+        from auth import issued_tokens
+        
+        print("\n" + "="*80)
+        print("🔐 ENDPOINT: POST /api/login - Repeat Login")
+        print("="*80)
+        
+        issued_tokens.clear()
+        request_data = json.dumps({'username': 'admin', 'password': 'password'})
+        first = client.post('/api/login', data=request_data, headers={'Content-Type': 'application/json'})
+        second = client.post('/api/login', data=request_data, headers={'Content-Type': 'application/json'})
+        
+        print(f"\n✅ STATUS: {first.status_code}, {second.status_code}")
+        assert first.status_code == 200
+        assert second.get_json()['token'] == first.get_json()['token']
+    
+    def test_04_login_database_user(self, client, mock_mysql):
+        """Show login for a user stored in the users table with a bcrypt hash"""
+        import jwt
+        from unittest.mock import patch
+        from auth import hash_password
+        from config import Config
+        
+        print("\n" + "="*80)
+        print("🔐 ENDPOINT: POST /api/login - Database User")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchone.return_value = {
+                'idUSERS': 2, 'username': 'analyst',
+                'password_hash': hash_password('s3cret', rounds=4), 'is_admin': 0
+            }
+            
+            response = client.post(
+                '/api/login',
+                data=json.dumps({'username': 'analyst', 'password': 's3cret'}),
+                headers={'Content-Type': 'application/json'}
+            )
+            wrong = client.post(
+                '/api/login',
+                data=json.dumps({'username': 'analyst', 'password': 'nope'}),
+                headers={'Content-Type': 'application/json'}
+            )
+        
+        claims = jwt.decode(response.get_json()['token'], Config.SECRET_KEY, algorithms=['HS256'])
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 CLAIMS:\n{json.dumps({k: v for k, v in claims.items() if k != 'exp'}, indent=2)}")
+        assert response.status_code == 200
+        assert claims['user'] == 'analyst'
+        assert claims['admin'] is False
+        assert wrong.status_code == 401
+    
+    def test_05_login_unknown_user(self, client, mock_mysql):
+        """Show that an unknown username costs one bcrypt check and no new hash"""
+        import bcrypt
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔐 ENDPOINT: POST /api/login - Unknown User")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql), \
+                patch.object(bcrypt, 'hashpw', wraps=bcrypt.hashpw) as hashpw, \
+                patch.object(bcrypt, 'checkpw', wraps=bcrypt.checkpw) as checkpw:
+            mock_mysql.connection.cursor.return_value.fetchone.return_value = None
+            
+            response = client.post(
+                '/api/login',
+                data=json.dumps({'username': 'nobody', 'password': 'guess'}),
+                headers={'Content-Type': 'application/json'}
+            )
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"🔑 bcrypt: {hashpw.call_count} hash(es), {checkpw.call_count} check(s)")
+        assert response.status_code == 401
+        assert hashpw.call_count == 0
+        assert checkpw.call_count == 1
+    
+    def test_06_login_rejects_non_string_credentials(self, client):
+        """Show that a non-string username or password gets 400, not a server error"""
+        print("\n" + "="*80)
+        print("🔐 ENDPOINT: POST /api/login - Non-String Credentials")
+        print("="*80)
+        
+        bodies = [
+            {'username': 'admin', 'password': 123},
+            {'username': ['admin'], 'password': 'password'},
+            {'username': 'admin', 'password': 'password', 'region': 7},
+            ['admin', 'password']
+        ]
+        statuses = [
+            client.post('/api/login', data=json.dumps(body), headers={'Content-Type': 'application/json'}).status_code
+            for body in bodies
+        ]
+        
+        print(f"\n❌ STATUSES: {statuses}")
+        assert statuses == [400, 400, 400, 400]
+    
+    def test_07_password_change_elsewhere_ends_token_reuse(self, client, mock_mysql):
+        """Show that a password changed by another process (the users CLI) is not bypassed by token reuse"""
+        from unittest.mock import patch
+        from auth import hash_password, issued_tokens
+        
+        print("\n" + "="*80)
+        print("🔐 ENDPOINT: POST /api/login - Password Changed Elsewhere")
+        print("="*80)
+        
+        def user(password):
+            return {'idUSERS': 2, 'username': 'analyst', 'password_hash': hash_password(password, rounds=4), 'is_admin': 0}
+        
+        issued_tokens.clear()
+        request_data = json.dumps({'username': 'analyst', 'password': 's3cret'})
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = user('s3cret')
+                first = client.post('/api/login', data=request_data, headers={'Content-Type': 'application/json'})
+                
+                # `flask users set-password` runs in its own process; this one gets no signal
+                mock_cursor.fetchone.return_value = user('n3w')
+                after_change = client.post('/api/login', data=request_data, headers={'Content-Type': 'application/json'})
+        finally:
+            issued_tokens.clear()
+        
+        print(f"\n✅ BEFORE: {first.status_code}  ❌ AFTER CHANGE: {after_change.status_code}")
+        assert first.status_code == 200
+        assert after_change.status_code == 401
+    
+    def test_08_health_check(self, client):
         """Show health check endpoint"""
         print("\n" + "="*80)
         print("💚 ENDPOINT: GET /api/health - Health Check")
@@ -70,6 +200,97 @@ class TestVisualAuthentication:
         print(f"\n✅ STATUS: {response.status_code}")
         print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
         assert response.status_code == 200
+    
+    def test_09_liveness(self, client):
+        """Liveness probe answers without touching the database"""
+        print("\n" + "="*80)
+        print("💚 ENDPOINT: GET /api/health/live - Liveness")
+        print("="*80)
+        
+        response = client.get('/api/health/live')
+        response_data = response.get_json()
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert response_data['status'] == 'alive'
+    
+    def test_10_readiness(self, client, mock_mysql):
+        """Readiness probe checks the database once and reuses the result"""
+        from unittest.mock import patch
+        from health import health_monitor
+        
+        print("\n" + "="*80)
+        print("💚 ENDPOINT: GET /api/health/ready - Readiness")
+        print("="*80)
+        
+        health_monitor.reset()
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchone.return_value = {'1': 1}
+            
+            response = client.get('/api/health/ready')
+            again = client.get('/api/health/ready')
+            response_data = response.get_json()
+        health_monitor.reset()
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert response_data['status'] == 'ready'
+        assert response_data['checks']['database']['latency_ms'] >= 0
+        assert again.status_code == 200
+        assert mock_cursor.execute.call_count == 1
+    
+    def test_11_readiness_database_down(self, client, mock_mysql):
+        """Readiness probe answers 503 so the load balancer drains the node"""
+        import MySQLdb
+        from unittest.mock import patch
+        from errors import circuit_breaker
+        from health import health_monitor
+        
+        print("\n" + "="*80)
+        print("💚 ENDPOINT: GET /api/health/ready - Database Down")
+        print("="*80)
+        
+        health_monitor.reset()
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.execute.side_effect = MySQLdb.OperationalError(2003, "Can't connect to MySQL server")
+                
+                response = client.get('/api/health/ready')
+                response_data = response.get_json()
+        finally:
+            health_monitor.reset()
+            circuit_breaker.reset()
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 503
+        assert response_data['status'] == 'not_ready'
+        assert response_data['checks']['database']['ok'] is False
+        assert 'Retry-After' in response.headers
+    
+    def test_12_long_polls_not_in_flight(self, app_context):
+        """Held-open change feed requests are not counted as queued work"""
+        from health import health_monitor
+        
+        print("\n" + "="*80)
+        print("💚 READINESS: requests in flight during long-polls and SSE streams")
+        print("="*80)
+        
+        before = health_monitor.in_flight
+        counted = {}
+        for path in ('/api/changes?wait=30', '/api/changes/stream', '/api/heroes'):
+            with app_context.test_request_context(path):
+                health_monitor._request_started()
+                counted[path] = health_monitor.in_flight - before
+                health_monitor._request_finished()
+        
+        print(f"\n✅ COUNTED: {counted}")
+        assert counted == {'/api/changes?wait=30': 0, '/api/changes/stream': 0, '/api/heroes': 1}
+        assert health_monitor.in_flight == before
 
 
 # ============================================================================
@@ -91,7 +312,7 @@ class TestVisualHeroes:
         print("  GET /api/heroes?format=json")
         print("  Header: Authorization: Bearer <token>")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchall.return_value = [
                 {'idHEROES': 1, 'hero_name': 'Alucard', 'origin': 'House of Torment', 'difficulty': 'Hard'},
@@ -117,7 +338,7 @@ class TestVisualHeroes:
         print("  GET /api/heroes?format=xml")
         print("  Header: Authorization: Bearer <token>")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchall.return_value = [
                 {'idHEROES': 1, 'hero_name': 'Alucard'}
@@ -142,7 +363,7 @@ class TestVisualHeroes:
         print("  GET /api/heroes/1")
         print("  Header: Authorization: Bearer <token>")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchone.return_value = {
                 'idHEROES': 1,
@@ -174,7 +395,7 @@ class TestVisualHeroes:
         print(f"  Header: Authorization: Bearer <token>")
         print(f"  Body:\n{json.dumps(sample_hero_data, indent=2)}")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.lastrowid = 5
             
@@ -204,7 +425,7 @@ class TestVisualHeroes:
         print(f"  Header: Authorization: Bearer <token>")
         print(f"  Body:\n{json.dumps(update_data, indent=2)}")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchone.return_value = {'idHEROES': 1}
             
@@ -231,7 +452,7 @@ class TestVisualHeroes:
         print(f"  DELETE /api/heroes/1")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchone.return_value = {'idHEROES': 1}
             
@@ -245,6 +466,7 @@ class TestVisualHeroes:
     def test_07_search_heroes(self, client, headers_with_token, mock_mysql):
         """GET - Search heroes"""
         from unittest.mock import patch
+        from search_index import search_index
         
         print("\n" + "="*80)
         print("🔍 ENDPOINT: GET /api/heroes/search - Search Heroes")
@@ -254,7 +476,7 @@ class TestVisualHeroes:
         print(f"  GET /api/heroes/search?q=mage")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchall.return_value = [
                 {'idHEROES': 1, 'hero_name': 'Eudora', 'difficulty': 'Medium'}
@@ -262,6 +484,7 @@ class TestVisualHeroes:
             
             response = client.get('/api/heroes/search?q=mage', headers=headers_with_token)
             response_data = response.get_json()
+            search_index.built = False
             
             print(f"\n✅ STATUS: {response.status_code}")
             print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
@@ -288,7 +511,7 @@ class TestVisualHeroStats:
         print(f"  Header: Authorization: Bearer <token>")
         print(f"  Body:\n{json.dumps(sample_hero_stats_data, indent=2)}")
         
-        with patch('routes.hero_stats.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.lastrowid = 3
             
@@ -315,7 +538,7 @@ class TestVisualHeroStats:
         print(f"  GET /api/hero-stats/1")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.hero_stats.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchone.return_value = {
                 'idHERO_STATS': 1,
@@ -353,7 +576,7 @@ class TestVisualRoles:
         print(f"  GET /api/roles")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.roles.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchall.return_value = [
                 {'idROLES': 1, 'role_name': 'Tank', 'description': 'Defense'},
@@ -372,6 +595,7 @@ class TestVisualRoles:
     def test_02_get_heroes_by_role(self, client, headers_with_token, mock_mysql):
         """GET - Get heroes by specific role"""
         from unittest.mock import patch
+        from hero_index import hero_index
         
         print("\n" + "="*80)
         print("🎭 ENDPOINT: GET /api/roles/:id/heroes - Heroes by Role")
@@ -381,10 +605,12 @@ class TestVisualRoles:
         print(f"  GET /api/roles/1/heroes")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.roles.mysql', mock_mysql):
+        hero_index.built = False
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchall.return_value = [
-                {'idHEROES': 1, 'hero_name': 'Uranus', 'role_name': 'Tank'}
+                {'idHEROES': 1, 'hero_name': 'Uranus', 'role_id': 1, 'role_name': 'Tank'},
+                {'idHEROES': 2, 'hero_name': 'Eudora', 'role_id': 2, 'role_name': 'Mage'}
             ]
             
             response = client.get('/api/roles/1/heroes', headers=headers_with_token)
@@ -393,6 +619,62 @@ class TestVisualRoles:
             print(f"\n✅ STATUS: {response.status_code}")
             print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
             assert response.status_code == 200
+            assert [hero['hero_name'] for hero in response_data['heroes']] == ['Uranus']
+        hero_index.built = False
+    
+    def test_03_other_process_writes_reach_index(self, client, headers_with_token, mock_mysql):
+        """GET - Heroes written by another worker show up once the catalog version changes"""
+        from unittest.mock import patch
+        import hero_index as hero_index_module
+        from hero_index import hero_index
+        from jobs import warm_hero_index
+        
+        print("\n" + "="*80)
+        print("🎭 ENDPOINT: GET /api/roles/:id/heroes - Writes From Another Process")
+        print("="*80)
+        
+        region = hero_index_module._live._regions.default
+        uranus = {'idHEROES': 2, 'hero_name': 'Uranus', 'role_id': 1, 'role_name': 'Tank'}
+        tigreal = {'idHEROES': 1, 'hero_name': 'Tigreal', 'role_id': 1, 'role_name': 'Tank'}
+        
+        hero_index.built = False
+        client.application.config.update(LIVE_INDEX_CHECK_SECONDS=15)
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = {'hero_count': 1, 'checksum': 111}
+                mock_cursor.fetchall.return_value = [uranus]
+                before = client.get('/api/roles/1/heroes', headers=headers_with_token).get_json()
+                
+                # Another worker creates Tigreal; this process gets no signal
+                mock_cursor.fetchone.return_value = {'hero_count': 2, 'checksum': 222}
+                mock_cursor.fetchall.return_value = [uranus, tigreal]
+                within_interval = client.get('/api/roles/1/heroes', headers=headers_with_token).get_json()
+                
+                region.checked_at -= 15
+                after_check = client.get('/api/roles/1/heroes', headers=headers_with_token).get_json()
+                
+                region.checked_at -= 15
+                queries = mock_cursor.execute.call_count
+                client.get('/api/roles/1/heroes', headers=headers_with_token)
+                unchanged_queries = mock_cursor.execute.call_count - queries
+                
+                # The warm-up job rebuilds whatever the version says
+                mock_cursor.fetchall.return_value = [uranus]
+                warm_hero_index()
+                after_job = client.get('/api/roles/1/heroes', headers=headers_with_token).get_json()
+        finally:
+            client.application.config.update(LIVE_INDEX_CHECK_SECONDS=0)
+            hero_index.built = False
+        
+        print(f"\n✅ BEFORE: {[hero['hero_name'] for hero in before['heroes']]}")
+        print(f"✅ AFTER VERSION CHECK: {[hero['hero_name'] for hero in after_check['heroes']]}")
+        assert [hero['hero_name'] for hero in before['heroes']] == ['Uranus']
+        assert [hero['hero_name'] for hero in within_interval['heroes']] == ['Uranus']
+        assert [hero['hero_name'] for hero in after_check['heroes']] == ['Tigreal', 'Uranus']
+        # An unchanged version costs one query and no rebuild
+        assert unchanged_queries == 1
+        assert [hero['hero_name'] for hero in after_job['heroes']] == ['Uranus']
 
 
 # ============================================================================
@@ -414,7 +696,7 @@ class TestVisualSpecialties:
         print(f"  GET /api/specialties")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.specialties.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchall.return_value = [
                 {'idSPECIALTY': 1, 'specialty_name': 'Crowd Control'},
@@ -428,7 +710,1929 @@ class TestVisualSpecialties:
             print(f"\n✅ STATUS: {response.status_code}")
             print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
             assert response.status_code == 200
+    
+    def test_02_heroes_by_specialty_and_filter(self, client, headers_with_token, mock_mysql):
+        """GET - Specialty listings and role AND specialty filters from the in-memory index"""
+        from unittest.mock import patch
+        from hero_index import hero_index
+        
+        print("\n" + "="*80)
+        print("✨ ENDPOINT: GET /api/specialties/:id/heroes and /api/heroes/filter")
+        print("="*80)
+        
+        hero_index.built = False
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchall.return_value = [
+                {'idHEROES': 1, 'hero_name': 'Tigreal', 'role_id': 1, 'role_name': 'Tank',
+                 'specialty_id': 1, 'specialty_name': 'Crowd Control'},
+                {'idHEROES': 2, 'hero_name': 'Eudora', 'role_id': 2, 'role_name': 'Mage',
+                 'specialty_id': 2, 'specialty_name': 'Burst'},
+                {'idHEROES': 3, 'hero_name': 'Aurora', 'role_id': 2, 'role_name': 'Mage',
+                 'specialty_id': 1, 'specialty_name': 'Crowd Control'}
+            ]
+            
+            control = client.get('/api/specialties/1/heroes', headers=headers_with_token).get_json()
+            both = client.get('/api/heroes/filter?role_id=2&specialty_id=1', headers=headers_with_token).get_json()
+            either = client.get('/api/heroes/filter?role_id=1,2&specialty_id=2', headers=headers_with_token).get_json()
+            invalid = client.get('/api/heroes/filter?role_id=tank', headers=headers_with_token)
+            queries = mock_cursor.execute.call_count
+        hero_index.built = False
+        
+        print(f"\n✅ CROWD CONTROL: {[hero['hero_name'] for hero in control['heroes']]}")
+        print(f"📥 MAGE AND CROWD CONTROL:\n{json.dumps(both, indent=2)}")
+        assert [hero['hero_name'] for hero in control['heroes']] == ['Tigreal', 'Aurora']
+        assert control['heroes'][0]['specialty_name'] == 'Crowd Control'
+        assert [hero['hero_name'] for hero in both['heroes']] == ['Aurora']
+        assert [hero['hero_name'] for hero in either['heroes']] == ['Eudora']
+        assert invalid.status_code == 400
+        assert queries == 2
+
+
+# ============================================================================
+# RESPONSE CACHING
+# ============================================================================
+
+class TestVisualCaching:
+    """Visual tests for HTTP cache headers and the shared response cache"""
+    
+    def test_01_cache_control_header(self, client, headers_with_token, mock_mysql):
+        """GET responses carry a per-endpoint Cache-Control policy"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🗄️  CACHE POLICY: GET /api/roles - Cache-Control Header")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchall.return_value = [{'idROLES': 1, 'role_name': 'Tank'}]
+            
+            response = client.get('/api/roles', headers=headers_with_token)
+            
+            print(f"\n✅ STATUS: {response.status_code}")
+            print(f"📥 Cache-Control: {response.headers.get('Cache-Control')}")
+            assert response.status_code == 200
+            assert response.headers['Cache-Control'].startswith('private, max-age=3600')
+    
+    def test_02_shared_cache_hit(self, client, headers_with_token, mock_mysql):
+        """Second identical GET is served from the shared cache without a query"""
+        from unittest.mock import patch
+        from cache import response_cache
+        
+        print("\n" + "="*80)
+        print("🗄️  SHARED CACHE: GET /api/specialties twice - One DB Query")
+        print("="*80)
+        
+        client.application.config['RESPONSE_CACHE_ENABLED'] = True
+        response_cache.clear()
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [{'idSPECIALTY': 1, 'specialty_name': 'Burst'}]
+                
+                first = client.get('/api/specialties', headers=headers_with_token)
+                second = client.get('/api/specialties', headers=headers_with_token)
+                
+                print(f"\n✅ X-Cache: {first.headers.get('X-Cache')} then {second.headers.get('X-Cache')}")
+                assert first.headers['X-Cache'] == 'MISS'
+                assert second.headers['X-Cache'] == 'HIT'
+                assert second.get_json() == first.get_json()
+                assert mock_cursor.execute.call_count == 1
+        finally:
+            client.application.config['RESPONSE_CACHE_ENABLED'] = False
+            response_cache.clear()
+    
+    def test_03_render_racing_write_not_cached(self, client, headers_with_token, mock_mysql):
+        """A response rendered while a write cleared the cache is served but not stored"""
+        from unittest.mock import patch
+        from cache import response_cache
+        
+        print("\n" + "="*80)
+        print("🗄️  SHARED CACHE: GET /api/specialties while a write clears the cache")
+        print("="*80)
+        
+        client.application.config['RESPONSE_CACHE_ENABLED'] = True
+        response_cache.clear()
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [{'idSPECIALTY': 1, 'specialty_name': 'Burst'}]
+                # A write in another thread lands while the first render queries
+                mock_cursor.execute.side_effect = lambda query, params=None: response_cache.clear()
+                
+                first = client.get('/api/specialties', headers=headers_with_token)
+                cached = len(response_cache)
+                mock_cursor.execute.side_effect = None
+                second = client.get('/api/specialties', headers=headers_with_token)
+        finally:
+            client.application.config['RESPONSE_CACHE_ENABLED'] = False
+            response_cache.clear()
+        
+        print(f"\n✅ X-Cache: {first.headers.get('X-Cache')} then {second.headers.get('X-Cache')}")
+        assert first.status_code == 200
+        assert cached == 0
+        assert second.headers['X-Cache'] == 'MISS'
+
+
+class TestVisualSingleFlight:
+    """Visual tests for coalescing identical concurrent reads"""
+    
+    def _run_together(self, flight, fn, count=8):
+        """Calls flight.do('key', fn) from `count` threads at once; fn runs until every thread has called"""
+        import threading
+        import time
+        
+        started = threading.Semaphore(0)
+        outcomes = []
+        
+        def call():
+            started.release()
+            try:
+                outcomes.append(('result', flight.do('key', fn)))
+            except Exception as e:
+                outcomes.append(('error', e))
+        
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for _ in threads:
+            started.acquire()
+        # Followers reach do() right after announcing themselves
+        time.sleep(0.05)
+        return threads, outcomes
+    
+    def test_01_one_execution_for_concurrent_callers(self):
+        """N threads asking for the same key share one run of the function"""
+        import threading
+        from singleflight import SingleFlight
+        
+        print("\n" + "="*80)
+        print("🧵 SINGLE FLIGHT: 8 concurrent callers, one execution")
+        print("="*80)
+        
+        flight = SingleFlight()
+        release = threading.Event()
+        runs = []
+        
+        def fn():
+            runs.append(1)
+            release.wait(5)
+            return ['row']
+        
+        threads, outcomes = self._run_together(flight, fn)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        print(f"\n✅ RUNS: {len(runs)}, RESULTS: {len(outcomes)}")
+        assert len(runs) == 1
+        assert outcomes == [('result', ['row'])] * 8
+        assert flight.in_flight() == 0
+    
+    def test_02_error_reaches_every_waiter(self):
+        """The leader's exception is raised in every caller, and the next call runs again"""
+        import threading
+        from singleflight import SingleFlight
+        
+        print("\n" + "="*80)
+        print("🧵 SINGLE FLIGHT: a failed run fails all of its waiters")
+        print("="*80)
+        
+        flight = SingleFlight()
+        release = threading.Event()
+        error = RuntimeError('query failed')
+        
+        def fn():
+            release.wait(5)
+            raise error
+        
+        threads, outcomes = self._run_together(flight, fn)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        print(f"\n✅ OUTCOMES: {[kind for kind, value in outcomes]}")
+        assert outcomes == [('error', error)] * 8
+        assert flight.do('key', lambda: 'fresh') == 'fresh'
+    
+    def test_03_joined_read_not_cached_after_write(self, app_context, mock_mysql):
+        """A caller joining a read that started before a write's cache clear does not cache its rows"""
+        import threading
+        import time
+        from unittest.mock import patch
+        from cache import result_cache
+        from repositories import role_repository
+        
+        print("\n" + "="*80)
+        print("🧵 SINGLE FLIGHT: a read racing a write stays out of the result cache")
+        print("="*80)
+        
+        started = threading.Event()
+        release = threading.Event()
+        outcomes = []
+        
+        def execute(query, params=None):
+            started.set()
+            release.wait(5)
+        
+        def list_roles():
+            with app_context.app_context():
+                outcomes.append(role_repository.list_all())
+        
+        app_context.config.update(DB_RESULT_CACHE_ENABLED=True)
+        result_cache.clear()
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.execute.side_effect = execute
+                mock_cursor.fetchall.return_value = [(1, 'Tank (before write)', None)]
+                
+                leader = threading.Thread(target=list_roles)
+                leader.start()
+                started.wait(5)
+                
+                # A write clears the cache while the read is running, then a second caller joins it
+                result_cache.clear()
+                follower = threading.Thread(target=list_roles)
+                follower.start()
+                time.sleep(0.05)
+                
+                release.set()
+                leader.join(5)
+                follower.join(5)
+                cached = len(result_cache)
+        finally:
+            app_context.config.update(DB_RESULT_CACHE_ENABLED=False)
+            result_cache.clear()
+        
+        print(f"\n✅ CALLERS: {len(outcomes)}, CACHED ENTRIES: {cached}")
+        assert len(outcomes) == 2
+        assert mock_cursor.execute.call_count == 1
+        assert cached == 0
+
+
+# ============================================================================
+# TEAM ANALYTICS ENDPOINTS
+# ============================================================================
+
+class TestVisualTeams:
+    """Visual tests for team comparison analytics"""
+    
+    def test_01_compare_teams(self, client, headers_with_token, mock_mysql):
+        """POST - Compare two lineups"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("⚔️  ENDPOINT: POST /api/teams/compare - Compare Lineups")
+        print("="*80)
+        
+        request_data = {'team_a': [1, 2, 3, 4, 5], 'team_b': [6, 7, 8, 9, 10], 'counters': 2}
+        print(f"\n📤 REQUEST:\n{json.dumps(request_data, indent=2)}")
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchall.return_value = [
+                {'idHEROES': i, 'hero_name': f'Hero {i}', 'role_id': i % 4 + 1, 'role_name': f'Role {i % 4 + 1}',
+                 'specialty_id': i % 3 + 1, 'hp': 2400 + i * 50, 'mana': 400, 'attack': 100 + i * 5,
+                 'defense': 60 + i, 'movement_speed': 240 + i}
+                for i in range(1, 13)
+            ]
+            
+            response = client.post(
+                '/api/teams/compare',
+                data=json.dumps(request_data),
+                headers=headers_with_token
+            )
+            response_data = response.get_json()
+            
+            print(f"\n✅ STATUS: {response.status_code}")
+            print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+            assert response.status_code == 200
+            assert response_data['winner'] in ('team_a', 'team_b', 'draw')
+            assert [c['idHEROES'] for c in response_data['counters']['team_a']] == [12, 11]
+    
+    def test_02_compare_teams_bad_lineup(self, client, headers_with_token):
+        """POST - Lineups must be five distinct heroes"""
+        print("\n" + "="*80)
+        print("⚔️  ENDPOINT: POST /api/teams/compare - Invalid Lineup")
+        print("="*80)
+        
+        response = client.post(
+            '/api/teams/compare',
+            data=json.dumps({'team_a': [1, 1, 2], 'team_b': [3, 4, 5, 6, 7]}),
+            headers=headers_with_token
+        )
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response.get_json(), indent=2)}")
+        assert response.status_code == 400
+
+
+# ============================================================================
+# SIMILAR HEROES ENDPOINT
+# ============================================================================
+
+class TestVisualSimilarHeroes:
+    """Visual tests for similar-hero recommendations"""
+    
+    def test_01_get_similar_heroes(self, client, headers_with_token, mock_mysql):
+        """GET - Heroes closest in stat space"""
+        from unittest.mock import patch
+        from similarity import similarity_index
+        
+        print("\n" + "="*80)
+        print("🧭 ENDPOINT: GET /api/heroes/:id/similar - Similar Heroes")
+        print("="*80)
+        
+        print("\n📤 REQUEST:")
+        print("  GET /api/heroes/1/similar?k=2")
+        print("  Header: Authorization: Bearer <token>")
+        
+        similarity_index.built = False
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchall.return_value = [
+                {'idHEROES': 1, 'hero_name': 'Tigreal', 'role_id': 1, 'specialty_id': 1,
+                 'hp': 2800, 'mana': 450, 'attack': 115, 'defense': 30, 'movement_speed': 260},
+                {'idHEROES': 2, 'hero_name': 'Franco', 'role_id': 1, 'specialty_id': 1,
+                 'hp': 2750, 'mana': 440, 'attack': 118, 'defense': 29, 'movement_speed': 255},
+                {'idHEROES': 3, 'hero_name': 'Eudora', 'role_id': 2, 'specialty_id': 2,
+                 'hp': 2300, 'mana': 500, 'attack': 110, 'defense': 16, 'movement_speed': 245},
+                {'idHEROES': 4, 'hero_name': 'Miya', 'role_id': 3, 'specialty_id': 3,
+                 'hp': 2400, 'mana': 430, 'attack': 125, 'defense': 17, 'movement_speed': 245}
+            ]
+            
+            response = client.get('/api/heroes/1/similar?k=2', headers=headers_with_token)
+            response_data = response.get_json()
+            
+            print(f"\n✅ STATUS: {response.status_code}")
+            print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+            assert response.status_code == 200
+            assert response_data['similar'][0]['hero_name'] == 'Franco'
+            assert response_data['count'] == 2
+        similarity_index.built = False
+    
+    def test_02_failed_reread_does_not_fail_write(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - The hero is created even if refreshing the index fails; the index rebuilds later"""
+        import MySQLdb
+        from unittest.mock import patch
+        from similarity import similarity_index
+        
+        print("\n" + "="*80)
+        print("🧭 POST /api/heroes - Similarity Re-read Fails After Commit")
+        print("="*80)
+        
+        def execute(query, params=None):
+            if getattr(query, 'name', None) == 'heroes.get_record':
+                raise MySQLdb.OperationalError(2013, 'Lost connection to MySQL server')
+        
+        similarity_index.build([
+            {'idHEROES': 1, 'hero_name': 'Alucard', 'role_id': 1, 'specialty_id': 1,
+             'hp': 2800, 'mana': 450, 'attack': 115, 'defense': 30, 'movement_speed': 260}
+        ])
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.execute.side_effect = execute
+                mock_cursor.lastrowid = 7
+                
+                response = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                rebuilt = similarity_index.built
+        finally:
+            similarity_index.built = False
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        assert response.status_code == 201
+        assert rebuilt is False
+    
+    def test_03_other_process_stat_changes(self, client, headers_with_token, mock_mysql):
+        """GET - Neighbours follow stat changes made by another worker once the catalog version changes"""
+        from unittest.mock import patch
+        import similarity
+        from similarity import similarity_index
+        from jobs import warm_similarity
+        
+        print("\n" + "="*80)
+        print("🧭 ENDPOINT: GET /api/heroes/:id/similar - Writes From Another Process")
+        print("="*80)
+        
+        def hero(hero_id, name, hp, attack):
+            return {'idHEROES': hero_id, 'hero_name': name, 'role_id': 1, 'specialty_id': 1,
+                    'hp': hp, 'mana': 450, 'attack': attack, 'defense': 30, 'movement_speed': 260}
+        
+        def nearest():
+            found = client.get('/api/heroes/1/similar?k=1', headers=headers_with_token).get_json()
+            return found['similar'][0]['hero_name']
+        
+        similarity_index.built = False
+        client.application.config.update(LIVE_INDEX_CHECK_SECONDS=15)
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = {'hero_count': 3, 'checksum': 111}
+                mock_cursor.fetchall.return_value = [
+                    hero(1, 'Tigreal', 2800, 115), hero(2, 'Franco', 2750, 118), hero(3, 'Eudora', 2300, 90)
+                ]
+                before = nearest()
+                
+                # Another worker rebalances Franco and Eudora; this process gets no signal
+                mock_cursor.fetchone.return_value = {'hero_count': 3, 'checksum': 222}
+                mock_cursor.fetchall.return_value = [
+                    hero(1, 'Tigreal', 2800, 115), hero(2, 'Franco', 2300, 90), hero(3, 'Eudora', 2750, 118)
+                ]
+                similarity._live._regions.default.checked_at -= 15
+                after_check = nearest()
+                
+                # The warm-up job rebuilds whatever the version says
+                mock_cursor.fetchall.return_value = [
+                    hero(1, 'Tigreal', 2800, 115), hero(2, 'Franco', 2750, 118), hero(3, 'Eudora', 2300, 90)
+                ]
+                warm_similarity()
+                after_job = nearest()
+        finally:
+            client.application.config.update(LIVE_INDEX_CHECK_SECONDS=0)
+            similarity_index.built = False
+        
+        print(f"\n✅ BEFORE: {before}  AFTER CHECK: {after_check}  AFTER JOB: {after_job}")
+        assert before == 'Franco'
+        assert after_check == 'Eudora'
+        assert after_job == 'Franco'
+
 
+# ============================================================================
+# READ REPLICAS
+# ============================================================================
+
+class TestVisualReadReplicas:
+    """Visual tests for routing reads to replicas and writes to the primary"""
+    
+    def _with_replica(self):
+        """Configures one replica whose pool hands out a mock connection"""
+        from unittest.mock import MagicMock
+        from db_router import db_router, Endpoint
+        
+        replica = Endpoint('replica-1', {}, 2)
+        connection = MagicMock()
+        connection.cursor.return_value.fetchall.return_value = [{'idROLES': 1, 'role_name': 'Tank (replica)'}]
+        db_router.replicas = [replica]
+        return replica, connection
+    
+    def _reset(self):
+        from db_router import db_router
+        db_router.replicas = []
+        db_router._recent_writes.clear()
+    
+    def test_01_reads_go_to_replica(self, client, headers_with_token, mock_mysql):
+        """GET - A read runs on a replica connection, not the primary"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🪞 ENDPOINT: GET /api/roles - Read From Replica")
+        print("="*80)
+        
+        replica, connection = self._with_replica()
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(replica.pool, 'acquire', return_value=connection):
+                response = client.get('/api/roles', headers=headers_with_token)
+        finally:
+            self._reset()
+        
+        print(f"\n✅ RESPONSE: {response.get_json()}")
+        assert response.get_json()['roles'][0]['role_name'] == 'Tank (replica)'
+        assert connection.cursor.return_value.execute.called
+        assert not mock_mysql.connection.cursor.return_value.execute.called
+    
+    def test_02_reads_after_write_use_primary(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """PUT then GET - A client that just wrote reads its own write from the primary"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🪞 PUT /api/heroes/:id then GET /api/roles - Read Your Writes")
+        print("="*80)
+        
+        replica, connection = self._with_replica()
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(replica.pool, 'acquire', return_value=connection):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [{'idROLES': 1, 'role_name': 'Tank (primary)'}]
+                
+                write = client.put('/api/heroes/7', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                replica_reads = connection.cursor.return_value.execute.call_count
+                response = client.get('/api/roles', headers=headers_with_token)
+        finally:
+            self._reset()
+        
+        print(f"\n✅ WRITE: {write.status_code}, READ: {response.get_json()}")
+        assert write.status_code == 200
+        assert response.get_json()['roles'][0]['role_name'] == 'Tank (primary)'
+        assert connection.cursor.return_value.execute.call_count == replica_reads
+    
+    def test_03_failed_replica_falls_back_to_primary(self, client, headers_with_token, mock_mysql):
+        """GET - A replica that cannot be reached is skipped and the read uses the primary"""
+        import MySQLdb
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🪞 ENDPOINT: GET /api/roles - Replica Down, Primary Fallback")
+        print("="*80)
+        
+        replica, connection = self._with_replica()
+        refused = MySQLdb.OperationalError(2003, "Can't connect to MySQL server")
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(replica.pool, 'acquire', side_effect=refused):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [{'idROLES': 1, 'role_name': 'Tank (primary)'}]
+                
+                response = client.get('/api/roles', headers=headers_with_token)
+                healthy = replica.is_healthy()
+        finally:
+            self._reset()
+        
+        print(f"\n✅ RESPONSE: {response.get_json()}")
+        assert response.status_code == 200
+        assert response.get_json()['roles'][0]['role_name'] == 'Tank (primary)'
+        assert healthy is False
+
+    
+    def test_04_workers_after_write_use_primary(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """PUT then GET - Parallel worker reads follow the request to the pooled primary"""
+        from unittest.mock import patch
+        from db_router import db_router
+        
+        print("\n" + "="*80)
+        print("🪞 PUT /api/heroes/:id then GET /api/bootstrap - Workers Read Your Writes")
+        print("="*80)
+        
+        replica, connection = self._with_replica()
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(replica.pool, 'acquire', return_value=connection):
+                mock_mysql.connection.cursor.return_value.fetchall.return_value = []
+                
+                write = client.put('/api/heroes/7', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                replica_reads = connection.cursor.return_value.execute.call_count
+                pooled = db_router.primary.acquire.call_count
+                response = client.get('/api/bootstrap', headers=headers_with_token)
+        finally:
+            self._reset()
+        
+        print(f"\n✅ WRITE: {write.status_code}, BOOTSTRAP: {response.status_code}")
+        print(f"🔌 PRIMARY POOL CHECKOUTS: {db_router.primary.acquire.call_count - pooled}")
+        assert response.status_code == 200
+        assert connection.cursor.return_value.execute.call_count == replica_reads
+        assert db_router.primary.acquire.call_count - pooled == 3
+    
+    def test_05_expired_write_pins_pruned(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """PUT - Writing prunes the expired read-your-writes pins of clients that never came back"""
+        import time
+        from unittest.mock import patch
+        from db_router import db_router
+        
+        print("\n" + "="*80)
+        print("🪞 PUT /api/heroes/:id - Expired Read-Your-Writes Pins Pruned")
+        print("="*80)
+        
+        replica, connection = self._with_replica()
+        now = time.monotonic()
+        db_router._recent_writes.update({f'10.0.0.{i}': now - 1 for i in range(100)})
+        db_router._next_prune = 0.0
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(replica.pool, 'acquire', return_value=connection):
+                write = client.put('/api/heroes/7', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                pinned = set(db_router._recent_writes)
+        finally:
+            self._reset()
+        
+        print(f"\n✅ WRITE: {write.status_code}, PINNED CLIENTS: {pinned}")
+        assert write.status_code == 200
+        assert pinned == {'admin'}
+
+
+# ============================================================================
+# ROW MODELS
+# ============================================================================
+
+class TestVisualRowModels:
+    """Visual tests for compact row models and their JSON serialization"""
+    
+    def test_01_rows_round_trip(self):
+        """Dict rows, positional tuples and reordered tuples all build the same model"""
+        from models import Role, HeroSummary
+        
+        print("\n" + "="*80)
+        print("🧱 ROW MODELS: from_rows() for every cursor shape")
+        print("="*80)
+        
+        from_dict = Role.from_rows([{'idROLES': 1, 'role_name': 'Tank', 'description': 'Frontline'}])[0]
+        positional = Role.from_rows([(1, 'Tank', 'Frontline')])[0]
+        # SELECT * with columns in another order, plus one the model does not have
+        reordered = Role.from_rows(
+            [('Frontline', 'x', 1, 'Tank')],
+            [('description',), ('extra',), ('idROLES',), ('role_name',)]
+        )[0]
+        partial = HeroSummary.from_rows([{'idHEROES': 3, 'hero_name': 'Miya'}])[0]
+        
+        print(f"\n✅ MODEL: {from_dict!r}")
+        assert from_dict == positional == reordered
+        assert from_dict.to_dict() == {'idROLES': 1, 'role_name': 'Tank', 'description': 'Frontline'}
+        assert Role.from_rows([tuple(from_dict.to_dict().values())])[0] == from_dict
+        assert from_dict['role_name'] == from_dict.get('role_name') == 'Tank'
+        assert partial.origin is None
+        assert Role.from_rows([]) == [] and Role.from_row(None) is None
+    
+    def test_02_json_provider_output(self, app_context):
+        """The JSON provider writes models like json.dumps() of their dicts"""
+        import datetime
+        from decimal import Decimal
+        from models import Role
+        
+        print("\n" + "="*80)
+        print("🧱 ROW MODELS: ModelJSONProvider output")
+        print("="*80)
+        
+        roles = [Role(1, 'Tank', 'Frontline "wall"'), Role(2, 'Mage', 'Burst ✨')]
+        data = {'roles': roles, 'count': 2, 'at': datetime.date(2024, 1, 2), 'ratio': Decimal('0.5'), 'by_id': {7: None}}
+        plain = {'roles': [role.to_dict() for role in roles], 'count': 2, 'at': 'Tue, 02 Jan 2024 00:00:00 GMT', 'ratio': '0.5', 'by_id': {'7': None}}
+        
+        provider = app_context.json
+        compact = provider.dumps(data, separators=(',', ':'))
+        default = provider.dumps(data)
+        pretty = provider.dumps(data, indent=2)
+        
+        print(f"\n✅ COMPACT: {compact}")
+        assert compact == json.dumps(plain, sort_keys=True, separators=(',', ':'))
+        assert default == json.dumps(plain, sort_keys=True)
+        assert json.loads(pretty) == plain
+        assert provider.loads(provider.response(data).get_data()) == plain
+
+
+# ============================================================================
+# CATALOG SNAPSHOT ENDPOINTS
+# ============================================================================
+
+class TestVisualCatalogSnapshots:
+    """Visual tests for catalog export and import"""
+    
+    def test_01_export_csv_snapshot(self, client, headers_with_admin_token):
+        """GET - Export the catalog as a CSV snapshot"""
+        import io
+        import zipfile
+        from unittest.mock import MagicMock, patch
+        
+        print("\n" + "="*80)
+        print("📦 ENDPOINT: GET /api/export?type=csv - Export Catalog")
+        print("="*80)
+        
+        connection = MagicMock()
+        cursor = connection.cursor.return_value
+        cursor.description = [('id', 3), ('name', 253)]
+        cursor.fetchmany.side_effect = [[(1, 'Tank')], []] * 4
+        
+        with patch('catalog_io.mysql_connection', return_value=connection):
+            response = client.get('/api/export?type=csv', headers=headers_with_admin_token)
+        
+        archive = zipfile.ZipFile(io.BytesIO(response.data))
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 ARCHIVE: {archive.namelist()}")
+        assert response.status_code == 200
+        assert 'heroes.csv' in archive.namelist()
+        assert json.loads(archive.read('manifest.json'))['tables']['roles'] == 1
+    
+    def test_02_import_rejects_non_archive(self, client, headers_with_admin_token):
+        """POST - Import requires a zip snapshot"""
+        from unittest.mock import MagicMock, patch
+        
+        print("\n" + "="*80)
+        print("📦 ENDPOINT: POST /api/import - Invalid Snapshot")
+        print("="*80)
+        
+        with patch('catalog_io.mysql_connection', return_value=MagicMock()):
+            response = client.post('/api/import', data=b'not a zip', headers=headers_with_admin_token)
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response.get_json(), indent=2)}")
+        assert response.status_code == 400
+    
+    def test_03_import_and_export_need_admin(self, client, headers_with_token):
+        """POST/GET - Tokens without the admin claim get 403 and the catalog is untouched"""
+        from unittest.mock import MagicMock, patch
+        
+        print("\n" + "="*80)
+        print("📦 ENDPOINTS: POST /api/import?truncate=true, GET /api/export - Non-Admin Token")
+        print("="*80)
+        
+        connection = MagicMock()
+        with patch('catalog_io.mysql_connection', return_value=connection):
+            imported = client.post('/api/import?truncate=true', data=b'PK', headers=headers_with_token)
+            exported = client.get('/api/export?type=csv', headers=headers_with_token)
+        
+        print(f"\n❌ STATUS: {imported.status_code}, {exported.status_code}")
+        assert imported.status_code == 403
+        assert exported.status_code == 403
+        assert not connection.cursor.called
+    
+    def test_04_serve_from_mmap_snapshot(self, client, headers_with_token, tmp_path):
+        """GET - Catalog reads served from the memory-mapped snapshot, no database"""
+        from unittest.mock import patch
+        from models import HeroRecord, Role, Specialty
+        from snapshot import write_snapshot
+        from hero_index import hero_index
+        from search_index import search_index
+        
+        print("\n" + "="*80)
+        print("🗺️  SNAPSHOT_SERVING - Heroes from the mmap'd snapshot")
+        print("="*80)
+        
+        path = str(tmp_path / 'catalog.snapshot')
+        write_snapshot(
+            path,
+            [HeroRecord(1, 'Tigreal', 'Moniyan', 'Easy', 1, 'Tank', 'Frontline', 1, 'Crowd Control',
+                        2800, 450, 115, 30, 260),
+             HeroRecord(2, 'Eudora', 'Moniyan', 'Easy', 2, 'Mage', 'Burst', 2, 'Burst',
+                        2300, 500, 110, 16, 245)],
+            [Role(1, 'Tank', 'Frontline'), Role(2, 'Mage', 'Burst')],
+            [Specialty(1, 'Crowd Control', 'Disables'), Specialty(2, 'Burst', 'Damage')]
+        )
+        client.application.config.update(SNAPSHOT_SERVING=True, SNAPSHOT_PATH=path)
+        hero_index.built = False
+        search_index.built = False
+        
+        try:
+            with patch('repositories.mysql') as mock_mysql:
+                hero = client.get('/api/heroes/2', headers=headers_with_token).get_json()
+                tanks = client.get('/api/roles/1/heroes', headers=headers_with_token).get_json()
+                found = client.get('/api/heroes/search?q=tig', headers=headers_with_token).get_json()
+                missing = client.get('/api/heroes/99', headers=headers_with_token)
+                assert not mock_mysql.connection.cursor.called
+        finally:
+            client.application.config.update(SNAPSHOT_SERVING=False)
+            hero_index.built = False
+            search_index.built = False
+        
+        print(f"📥 HERO:\n{json.dumps(hero, indent=2)}")
+        assert hero['hero']['hero_name'] == 'Eudora'
+        assert 'role_id' not in hero['hero']
+        assert [h['hero_name'] for h in tanks['heroes']] == ['Tigreal']
+        assert [h['hero_name'] for h in found['heroes']] == ['Tigreal']
+        assert missing.status_code == 404
+    
+    def test_05_missing_snapshot_falls_back_to_database(self, client, headers_with_token, tmp_path, mock_mysql):
+        """GET - Heroes decode once per snapshot; with the file gone, reads go to MySQL instead of failing"""
+        import os
+        from unittest.mock import patch
+        from models import HeroRecord
+        from snapshot import write_snapshot, CatalogSnapshot
+        
+        print("\n" + "="*80)
+        print("🗺️  SNAPSHOT_SERVING - Snapshot File Missing")
+        print("="*80)
+        
+        path = str(tmp_path / 'catalog.snapshot')
+        write_snapshot(
+            path,
+            [HeroRecord(1, 'Tigreal', 'Moniyan', 'Easy', 1, 'Tank', 'Frontline', 1, 'Crowd Control',
+                        2800, 450, 115, 30, 260)],
+            [], []
+        )
+        snapshot = CatalogSnapshot(path)
+        decoded_once = snapshot.heroes()[0] is snapshot.heroes()[0]
+        
+        client.application.config.update(SNAPSHOT_SERVING=True, SNAPSHOT_PATH=path, SNAPSHOT_CHECK_SECONDS=0)
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_mysql.connection.cursor.return_value.fetchone.return_value = {'idHEROES': 1, 'hero_name': 'Tigreal (database)'}
+                from_snapshot = client.get('/api/heroes/1', headers=headers_with_token).get_json()
+                os.remove(path)
+                from_database = client.get('/api/heroes/1', headers=headers_with_token)
+        finally:
+            client.application.config.update(SNAPSHOT_SERVING=False, SNAPSHOT_CHECK_SECONDS=5)
+        
+        print(f"\n✅ SNAPSHOT: {from_snapshot['hero']['hero_name']}  AFTER REMOVAL: {from_database.status_code}")
+        assert decoded_once
+        assert from_snapshot['hero']['hero_name'] == 'Tigreal'
+        assert from_database.status_code == 200
+        assert from_database.get_json()['hero']['hero_name'] == 'Tigreal (database)'
+
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class TestVisualRateLimiting:
+    """Visual tests for token-bucket rate limiting"""
+    
+    def test_01_expensive_pool_exhausted(self, client, headers_with_token, mock_mysql):
+        """GET - Search is throttled with Retry-After while cheap reads keep working"""
+        from unittest.mock import patch
+        from config import Config
+        from ratelimit import rate_limiter, MemoryBucketStore
+        from search_index import search_index
+        
+        print("\n" + "="*80)
+        print("🚦 ENDPOINT: GET /api/heroes/search - Rate Limited")
+        print("="*80)
+        
+        rate_limiter.store = MemoryBucketStore()
+        client.application.config.update(
+            RATE_LIMIT_ENABLED=True,
+            RATE_LIMITS={
+                'default': {'user': (10, 1.0), 'ip': (10, 1.0)},
+                'expensive': {'user': (5, 0.1), 'ip': (50, 1.0)}
+            }
+        )
+        
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = []
+                mock_cursor.fetchone.return_value = {'idHEROES': 1, 'hero_name': 'Tigreal'}
+                
+                first = client.get('/api/heroes/search?q=a', headers=headers_with_token)
+                throttled = client.get('/api/heroes/search?q=b', headers=headers_with_token)
+                cheap = client.get('/api/heroes/1', headers=headers_with_token)
+        finally:
+            client.application.config.update(RATE_LIMIT_ENABLED=False, RATE_LIMITS=Config.RATE_LIMITS)
+            rate_limiter.store = MemoryBucketStore()
+            search_index.built = False
+        
+        print(f"\n❌ STATUS: {throttled.status_code}  Retry-After: {throttled.headers.get('Retry-After')}")
+        print(f"📥 RESPONSE:\n{json.dumps(throttled.get_json(), indent=2)}")
+        assert first.status_code == 200
+        assert first.headers['X-RateLimit-Remaining'] == '0'
+        assert throttled.status_code == 429
+        assert throttled.headers['Retry-After'] == '50'
+        assert cheap.status_code == 200
+    
+    def test_02_sqlite_store_prunes_and_fails_open(self, client, headers_with_token, mock_mysql, tmp_path):
+        """GET - Idle full buckets are pruned; a locked SQLite file lets requests through"""
+        import sqlite3
+        import time
+        from unittest.mock import patch
+        from ratelimit import rate_limiter, SQLiteBucketStore, MemoryBucketStore
+        
+        print("\n" + "="*80)
+        print("🚦 SQLITE BUCKETS: Pruning and a Locked Database")
+        print("="*80)
+        
+        path = str(tmp_path / 'ratelimit.sqlite3')
+        store = SQLiteBucketStore(path, timeout=0.05, full_after=100)
+        store.take([('default:ip:10.0.0.1', 10, 1.0)], 1)
+        store.take([('default:ip:10.0.0.2', 10, 1.0)], 1)
+        store._connection().execute("UPDATE buckets SET updated_at = ? WHERE bucket_key = 'default:ip:10.0.0.1'", (time.time() - 101,))
+        store.prune()
+        kept = [row[0] for row in store._connection().execute("SELECT bucket_key FROM buckets")]
+        
+        # Another worker holds the write lock past the timeout
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        rate_limiter.store = store
+        client.application.config.update(RATE_LIMIT_ENABLED=True)
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_mysql.connection.cursor.return_value.fetchall.return_value = []
+                response = client.get('/api/roles', headers=headers_with_token)
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+            client.application.config.update(RATE_LIMIT_ENABLED=False)
+            rate_limiter.store = MemoryBucketStore()
+        
+        print(f"\n✅ KEPT: {kept}  STATUS WHILE LOCKED: {response.status_code}")
+        assert kept == ['default:ip:10.0.0.2']
+        assert response.status_code == 200
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+class TestVisualBackgroundJobs:
+    """Visual tests for cache warm-up jobs"""
+    
+    def test_01_warm_catalog_job(self, client, headers_with_token, headers_with_admin_token, mock_mysql):
+        """GET - Heroes served from results preloaded by the warm-up job"""
+        from unittest.mock import patch
+        from cache import result_cache
+        from scheduler import scheduler
+        
+        print("\n" + "="*80)
+        print("🔥 JOB: warm-catalog, then GET /api/heroes and GET /api/jobs")
+        print("="*80)
+        
+        result_cache.clear()
+        client.application.config.update(DB_RESULT_CACHE_ENABLED=True)
+        
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [
+                    {'idHEROES': 1, 'hero_name': 'Tigreal', 'role_name': 'Tank', 'hp': 2800}
+                ]
+                
+                scheduler.run_job('warm-catalog')
+                queries = mock_cursor.execute.call_count
+                
+                response = client.get('/api/heroes', headers=headers_with_token)
+                assert mock_cursor.execute.call_count == queries
+            
+            jobs = client.get('/api/jobs', headers=headers_with_admin_token).get_json()
+            forbidden = client.get('/api/jobs', headers=headers_with_token)
+        finally:
+            client.application.config.update(DB_RESULT_CACHE_ENABLED=False)
+            result_cache.clear()
+        
+        warm = next(job for job in jobs['jobs'] if job['name'] == 'warm-catalog')
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 JOB STATS:\n{json.dumps(warm, indent=2)}")
+        assert response.status_code == 200
+        assert response.get_json()['heroes'][0]['hero_name'] == 'Tigreal'
+        assert warm['runs'] >= 1
+        assert warm['failures'] == 0
+        assert warm['last_duration_ms'] is not None
+        assert forbidden.status_code == 403
+
+
+# ============================================================================
+# CHANGE FEED
+# ============================================================================
+
+class TestVisualChangeFeed:
+    """Visual tests for the incremental sync change feed"""
+    
+    @pytest.fixture(autouse=True)
+    def feed_enabled(self, app_context):
+        """The feed is off by default; these tests turn it on"""
+        app_context.config['CHANGE_FEED_ENABLED'] = True
+        yield
+        app_context.config['CHANGE_FEED_ENABLED'] = False
+    
+    def test_01_get_changes_since(self, client, headers_with_token, mock_mysql):
+        """GET - Changes after a sequence number with current hero data"""
+        import datetime
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔁 ENDPOINT: GET /api/changes?since=41 - Change Feed")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchone.return_value = {'seq': 1}
+            mock_cursor.fetchall.side_effect = [
+                [{'seq': 42, 'entity': 'hero', 'entity_id': 7, 'action': 'update',
+                  'changed_at': datetime.datetime(2025, 1, 1, 12, 0)},
+                 {'seq': 43, 'entity': 'hero', 'entity_id': 8, 'action': 'delete',
+                  'changed_at': datetime.datetime(2025, 1, 1, 12, 1)}],
+                [{'idHEROES': 7, 'hero_name': 'Layla', 'role_name': 'Marksman'}]
+            ]
+            
+            response = client.get('/api/changes?since=41', headers=headers_with_token)
+            response_data = response.get_json()
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert response_data['last_seq'] == 43
+        assert response_data['changes'][0]['data']['hero_name'] == 'Layla'
+        assert response_data['changes'][1]['data'] is None
+        assert response_data['has_more'] is False
+    
+    def test_02_writes_append_to_change_log(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - Creating a hero logs a change in the same transaction"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔁 POST /api/heroes - Appends to the Change Log")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.lastrowid = 9
+            
+            response = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers_with_token)
+            statements = [call.args[0] for call in mock_cursor.execute.call_args_list]
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 STATEMENTS: {len(statements)}")
+        assert response.status_code == 201
+        assert any('change_seq' in statement for statement in statements)
+        assert mock_cursor.execute.call_args_list[-1].args[1] == ('hero', 9, 'create')
+        assert mock_mysql.connection.commit.call_count == 1
+    
+    def test_03_invalid_since(self, client, headers_with_token):
+        """GET - since must be a non-negative integer"""
+        print("\n" + "="*80)
+        print("🔁 ENDPOINT: GET /api/changes?since=abc - Bad Request")
+        print("="*80)
+        
+        response = client.get('/api/changes?since=abc', headers=headers_with_token)
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        assert response.status_code == 400
+    
+    def test_04_feed_disabled(self, client, headers_with_token, sample_hero_data, mock_mysql, app_context):
+        """POST/GET - With the feed off, writes skip the change log and /api/changes is 404"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔁 CHANGE_FEED_ENABLED = False")
+        print("="*80)
+        
+        app_context.config['CHANGE_FEED_ENABLED'] = False
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.lastrowid = 9
+            
+            created = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers_with_token)
+            statements = [call.args[0] for call in mock_cursor.execute.call_args_list]
+            response = client.get('/api/changes?since=0', headers=headers_with_token)
+        
+        print(f"\n✅ POST: {created.status_code}, GET /api/changes: {response.status_code}")
+        assert created.status_code == 201
+        assert not any('change' in statement for statement in statements)
+        assert response.status_code == 404
+
+
+class TestVisualQuery:
+    """Visual tests for the JSON query endpoint"""
+    
+    def test_01_selected_fields_skip_joins(self, client, headers_with_token, mock_mysql):
+        """POST - Only the requested columns are selected, without joins"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🧩 ENDPOINT: POST /api/query - Hero Names Only")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchall.return_value = [{'hero_name': 'Tigreal'}, {'hero_name': 'Layla'}]
+            
+            response = client.post('/api/query', data=json.dumps({
+                'heroes': {'fields': ['hero_name'], 'limit': 10}
+            }), headers=headers_with_token)
+            response_data = response.get_json()
+            sql = mock_cursor.execute.call_args.args[0]
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"🗄️  SQL: {sql}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert response_data['heroes'] == [{'hero_name': 'Tigreal'}, {'hero_name': 'Layla'}]
+        assert 'JOIN' not in sql
+        assert response.headers['X-Query-Count'] == '1'
+    
+    def test_02_nested_relation_batched(self, client, headers_with_token, mock_mysql):
+        """POST - A nested relation is loaded with one IN query"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🧩 ENDPOINT: POST /api/query - Heroes with Their Role")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchall.side_effect = [
+                [{'idHEROES': 1, 'hero_name': 'Tigreal', 'role_id': 1},
+                 {'idHEROES': 2, 'hero_name': 'Franco', 'role_id': 1},
+                 {'idHEROES': 3, 'hero_name': 'Eudora', 'role_id': 2}],
+                [{'idROLES': 1, 'role_name': 'Tank'}, {'idROLES': 2, 'role_name': 'Mage'}]
+            ]
+            
+            response = client.post('/api/query', data=json.dumps({
+                'heroes': {'fields': ['hero_name'], 'include': {'role': {'fields': ['role_name']}}}
+            }), headers=headers_with_token)
+            response_data = response.get_json()
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert response.headers['X-Query-Count'] == '2'
+        assert response_data['heroes'][2] == {'hero_name': 'Eudora', 'role': {'role_name': 'Mage'}}
+        assert 'role_id' not in response_data['heroes'][0]
+    
+    def test_03_unknown_field(self, client, headers_with_token):
+        """POST - Unknown fields are rejected before any query runs"""
+        print("\n" + "="*80)
+        print("🧩 ENDPOINT: POST /api/query - Unknown Field")
+        print("="*80)
+        
+        response = client.post('/api/query', data=json.dumps({
+            'heroes': {'fields': ['password']}
+        }), headers=headers_with_token)
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE: {response.get_json()}")
+        assert response.status_code == 400
+
+
+class TestVisualDatabaseFailures:
+    """Visual tests for retries, connection eviction and the circuit breaker"""
+    
+    def test_01_read_retried_after_gone_away(self, client, headers_with_token, mock_mysql):
+        """GET - A read that loses its connection is retried on a fresh one"""
+        import MySQLdb
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🛟 ENDPOINT: GET /api/roles - MySQL Server Has Gone Away, Then Retry")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.execute.side_effect = [MySQLdb.OperationalError(2006, 'MySQL server has gone away'), None]
+            mock_cursor.fetchall.return_value = [{'idROLES': 1, 'role_name': 'Tank'}]
+            
+            response = client.get('/api/roles', headers=headers_with_token)
+            response_data = response.get_json()
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert mock_cursor.execute.call_count == 2
+        assert mock_mysql.connection.close.called
+    
+    def test_02_writes_are_not_retried(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - A write that loses its connection answers 503 instead of running twice"""
+        import MySQLdb
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🛟 ENDPOINT: POST /api/heroes - Lost Connection During a Write")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.execute.side_effect = MySQLdb.OperationalError(2013, 'Lost connection to MySQL server')
+            
+            response = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers_with_token)
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE: {response.get_json()}")
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert mock_cursor.execute.call_count == 1
+    
+    def test_03_circuit_opens_when_saturated(self, client, headers_with_token, mock_mysql):
+        """GET - Repeated 'too many connections' errors shed load without querying"""
+        import MySQLdb
+        from unittest.mock import patch
+        from errors import circuit_breaker
+        
+        print("\n" + "="*80)
+        print("🛟 ENDPOINT: GET /api/roles - Circuit Breaker Opens")
+        print("="*80)
+        
+        threshold = client.application.config['DB_CIRCUIT_FAILURE_THRESHOLD']
+        circuit_breaker.reset()
+        try:
+            with patch('repositories.mysql', mock_mysql), patch('errors.time.sleep'):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.execute.side_effect = MySQLdb.OperationalError(1040, 'Too many connections')
+                
+                statuses = [client.get('/api/roles', headers=headers_with_token).status_code for _ in range(3)]
+                queries = mock_cursor.execute.call_count
+                response = client.get('/api/roles', headers=headers_with_token)
+            
+            print(f"\n📊 STATUSES: {statuses} after {queries} queries")
+            print(f"❌ STATUS: {response.status_code}, Retry-After: {response.headers.get('Retry-After')}")
+            assert statuses == [503, 503, 503]
+            assert queries == threshold
+            assert mock_cursor.execute.call_count == queries
+            assert response.status_code == 503
+            assert int(response.headers['Retry-After']) >= 1
+        finally:
+            circuit_breaker.reset()
+
+
+class TestVisualIdempotency:
+    """Visual tests for Idempotency-Key replay on create endpoints"""
+    
+    def test_01_retry_replays_original_response(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - A retried create returns the first response without inserting again"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔂 ENDPOINT: POST /api/heroes - Retry with Idempotency-Key")
+        print("="*80)
+        
+        headers = dict(headers_with_token, **{'Idempotency-Key': 'create-hero-7f3a'})
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.lastrowid = 11
+            
+            first = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+            inserts = mock_cursor.execute.call_count
+            retry = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+        
+        print(f"\n✅ FIRST: {first.status_code} {first.get_json()}")
+        print(f"🔂 RETRY: {retry.status_code} {retry.get_json()} (Idempotent-Replayed: {retry.headers.get('Idempotent-Replayed')})")
+        assert first.status_code == 201
+        assert retry.status_code == 201
+        assert retry.get_json() == first.get_json()
+        assert retry.headers['Idempotent-Replayed'] == 'true'
+        assert 'Idempotent-Replayed' not in first.headers
+        assert mock_cursor.execute.call_count == inserts
+    
+    def test_02_key_reused_for_different_request(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - Reusing a key with a different body is rejected"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔂 ENDPOINT: POST /api/heroes - Idempotency-Key Reused")
+        print("="*80)
+        
+        headers = dict(headers_with_token, **{'Idempotency-Key': 'create-hero-91bc'})
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.lastrowid = 12
+            
+            client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+            response = client.post('/api/heroes', data=json.dumps(dict(sample_hero_data, hero_name='Other')), headers=headers)
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE: {response.get_json()}")
+        assert response.status_code == 422
+    
+    def test_03_failure_after_commit_is_not_rerun(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - A create that committed and then failed is replayed, not inserted again"""
+        import MySQLdb
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔂 ENDPOINT: POST /api/heroes - Failure After Commit, Then Retry")
+        print("="*80)
+        
+        headers = dict(headers_with_token, **{'Idempotency-Key': 'create-hero-c0ff'})
+        lost = MySQLdb.OperationalError(2013, 'Lost connection to MySQL server')
+        
+        with patch('repositories.mysql', mock_mysql), patch('repositories.hero_changed.send', side_effect=lost):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.lastrowid = 13
+            
+            first = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+            inserts = mock_cursor.execute.call_count
+            retry = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+        
+        print(f"\n❌ FIRST: {first.status_code}")
+        print(f"🔂 RETRY: {retry.status_code} {retry.get_json()}")
+        assert first.status_code == 503
+        assert retry.status_code == 500
+        assert retry.headers['Idempotent-Replayed'] == 'true'
+        assert mock_cursor.execute.call_count == inserts
+    
+    def test_04_failure_before_commit_can_retry(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """POST - A create that failed before committing runs again on retry"""
+        import MySQLdb
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🔂 ENDPOINT: POST /api/heroes - Failure Before Commit, Then Retry")
+        print("="*80)
+        
+        headers = dict(headers_with_token, **{'Idempotency-Key': 'create-hero-5eed'})
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.lastrowid = 14
+            mock_cursor.execute.side_effect = MySQLdb.OperationalError(2013, 'Lost connection to MySQL server')
+            
+            first = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+            mock_cursor.execute.side_effect = None
+            retry = client.post('/api/heroes', data=json.dumps(sample_hero_data), headers=headers)
+        
+        print(f"\n❌ FIRST: {first.status_code}")
+        print(f"✅ RETRY: {retry.status_code} {retry.get_json()}")
+        assert first.status_code == 503
+        assert retry.status_code == 201
+        assert 'Idempotent-Replayed' not in retry.headers
+    
+    def test_05_mysql_keys_read_from_primary(self, client, mock_mysql):
+        """Stored keys are read from the primary, never a lagging replica"""
+        from unittest.mock import MagicMock, patch
+        from db_router import db_router, Endpoint
+        from repositories import idempotency_repository
+        
+        print("\n" + "="*80)
+        print("🔂 MySQL backend - Key Lookup on the Primary")
+        print("="*80)
+        
+        replica = Endpoint('replica-1', {}, 2)
+        connection = MagicMock()
+        db_router.replicas = [replica]
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(replica.pool, 'acquire', return_value=connection):
+                mock_mysql.connection.cursor.return_value.fetchone.return_value = {'fingerprint': 'abc', 'status_code': 201}
+                with client.application.test_request_context('/api/heroes', method='POST'):
+                    row = idempotency_repository.get('admin:create-hero-1')
+        finally:
+            db_router.replicas = []
+        
+        print(f"\n✅ ROW: {row}")
+        assert row['status_code'] == 201
+        assert not connection.cursor.called
+
+
+class TestVisualTracing:
+    """Visual tests for request tracing"""
+    
+    def test_01_traced_request_exports_spans(self, client, headers_with_token, mock_mysql, tmp_path):
+        """GET - A sampled request records auth, MySQL and serialization spans"""
+        from unittest.mock import patch
+        from tracing import tracer, FileSpanExporter
+        
+        print("\n" + "="*80)
+        print("🔭 ENDPOINT: GET /api/heroes/1 - Traced via traceparent")
+        print("="*80)
+        
+        path = tmp_path / 'traces.jsonl'
+        exporter = tracer.exporter
+        tracer.exporter = FileSpanExporter(str(path), 'mlbb-api')
+        client.application.config.update(TRACING_ENABLED=True)
+        parent = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+        
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = {'idHEROES': 1, 'hero_name': 'Alucard'}
+                
+                response = client.get('/api/heroes/1', headers=dict(headers_with_token, traceparent=parent))
+            tracer.exporter.flush()
+        finally:
+            client.application.config.update(TRACING_ENABLED=False)
+            tracer.exporter = exporter
+        
+        spans = json.loads(path.read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+        root = next(s for s in spans if s['kind'] == 2)
+        
+        print(f"\n✅ STATUS: {response.status_code}, traceparent: {response.headers.get('traceparent')}")
+        for s in spans:
+            duration = (int(s['endTimeUnixNano']) - int(s['startTimeUnixNano'])) / 1e6
+            print(f"  {s['name']:<30} {duration:8.3f} ms")
+        assert response.status_code == 200
+        assert response.headers['traceparent'].startswith('00-4bf92f3577b34da6a3ce929d0e0e4736-')
+        assert root['name'] == 'GET /api/heroes/<int:hero_id>'
+        assert root['parentSpanId'] == '00f067aa0ba902b7'
+        assert {s['name'] for s in spans} >= {'auth.token_required', 'db.query', 'db.fetch', 'serialize.json'}
+        assert all(s['traceId'] == '4bf92f3577b34da6a3ce929d0e0e4736' for s in spans)
+    
+    def test_02_unsampled_parent_records_nothing(self, client, headers_with_token):
+        """GET - A traceparent with the sampled flag off is not traced"""
+        print("\n" + "="*80)
+        print("🔭 ENDPOINT: GET /api/health/live - Not Sampled")
+        print("="*80)
+        
+        client.application.config.update(TRACING_ENABLED=True)
+        try:
+            response = client.get('/api/health/live', headers={
+                'traceparent': '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00'
+            })
+        finally:
+            client.application.config.update(TRACING_ENABLED=False)
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        assert response.status_code == 200
+        assert 'traceparent' not in response.headers
+
+
+class TestVisualProfiler:
+    """Visual tests for the admin-only stack sampling profiler"""
+    
+    def test_01_requires_admin(self, client, headers_with_token):
+        """GET - Tokens without the admin claim are refused"""
+        print("\n" + "="*80)
+        print("🔥 ENDPOINT: GET /api/admin/profile - Not an Admin")
+        print("="*80)
+        
+        response = client.get('/api/admin/profile?seconds=0.1', headers=headers_with_token)
+        
+        print(f"\n❌ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE: {response.get_json()}")
+        assert response.status_code == 403
+    
+    def test_02_capture_collapsed_and_speedscope(self, client):
+        """GET - Busy threads show up in the sampled stacks"""
+        import threading
+        from auth import create_token
+        
+        print("\n" + "="*80)
+        print("🔥 ENDPOINT: GET /api/admin/profile - Collapsed Stacks and Speedscope")
+        print("="*80)
+        
+        headers = {'Authorization': f"Bearer {create_token('admin', admin=True)}"}
+        stop = threading.Event()
+        
+        def spin_hot_loop():
+            while not stop.is_set():
+                sum(range(1000))
+        
+        worker = threading.Thread(target=spin_hot_loop, name='busy-worker')
+        worker.start()
+        try:
+            collapsed = client.get('/api/admin/profile?seconds=0.2&interval_ms=5', headers=headers)
+            speedscope = client.get('/api/admin/profile?seconds=0.1&output=speedscope', headers=headers)
+        finally:
+            stop.set()
+            worker.join()
+        
+        text = collapsed.get_data(as_text=True)
+        print(f"\n✅ STATUS: {collapsed.status_code}, samples: {collapsed.headers['X-Profile-Samples']}")
+        print(f"📥 COLLAPSED:\n{text[:400]}")
+        assert collapsed.status_code == 200
+        assert 'spin_hot_loop' in text
+        assert speedscope.status_code == 200
+        profile = speedscope.get_json()
+        assert profile['profiles'][0]['type'] == 'sampled'
+        assert len(profile['profiles'][0]['samples']) == len(profile['profiles'][0]['weights'])
+
+
+# ============================================================================
+# STATEMENT STATS
+# ============================================================================
+
+class TestVisualStatementStats:
+    """Visual tests for the named SQL statement registry"""
+    
+    def test_01_hero_reads_counted_by_name(self, client, headers_with_token, mock_mysql):
+        """GET - Each execution is counted under its statement name, sent compacted"""
+        from unittest.mock import patch
+        from auth import create_token
+        from repositories import HeroRepository
+        from statements import statements
+        
+        print("\n" + "="*80)
+        print("🧾 ENDPOINT: GET /api/admin/statements - Per-Statement Counts")
+        print("="*80)
+        
+        admin = {'Authorization': f"Bearer {create_token('admin', admin=True)}"}
+        client.delete('/api/admin/statements', headers=admin)
+        with patch('repositories.mysql', mock_mysql):
+            mock_cursor = mock_mysql.connection.cursor.return_value
+            mock_cursor.fetchone.return_value = {'idHEROES': 1, 'hero_name': 'Alucard'}
+            
+            client.get('/api/heroes/1', headers=headers_with_token)
+            client.get('/api/heroes/2', headers=headers_with_token)
+            sql = mock_cursor.execute.call_args[0][0]
+        
+        response = client.get('/api/admin/statements', headers=admin)
+        refused = client.get('/api/admin/statements', headers=headers_with_token)
+        response_data = response.get_json()
+        
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        print(f"📤 SENT SQL: {sql}")
+        assert response.status_code == 200
+        assert response_data['statements']['heroes.get_by_id']['count'] == 2
+        assert response_data['defined'] == len(statements.names())
+        assert sql is HeroRepository.GET_BY_ID
+        assert '\n' not in sql and '  ' not in sql
+        assert refused.status_code == 403
+    
+    def test_02_redefinition_must_match(self):
+        """A name can only be defined again with the same SQL"""
+        import pytest
+        from statements import StatementRegistry
+        
+        registry = StatementRegistry()
+        first = registry.define('heroes.exists', """
+            SELECT idHEROES FROM heroes
+            WHERE idHEROES = %s
+        """)
+        
+        print(f"\n📥 DEFINED: {first.name} -> {first}")
+        assert registry.define('heroes.exists', "SELECT idHEROES FROM heroes WHERE idHEROES = %s") == first
+        with pytest.raises(ValueError):
+            registry.define('heroes.exists', "SELECT 1")
+
+# ============================================================================
+# REGION SHARDS
+# ============================================================================
+
+class TestVisualRegionShards:
+    """Visual tests for per-region catalog databases"""
+    
+    def _stats_row(self, hp):
+        return {
+            'idHEROES': 1, 'hero_name': 'Alucard', 'role_id': 1, 'role_name': 'Fighter',
+            'specialty_id': 1, 'specialty_name': 'Charge',
+            'hp': hp, 'mana': 0, 'attack': 140, 'defense': 70, 'movement_speed': 260
+        }
+    
+    def test_01_region_from_param_or_token(self, client, headers_with_token, mock_mysql):
+        """GET - ?region= or the token's region claim picks the shard"""
+        from unittest.mock import MagicMock, patch
+        from auth import create_token
+        from shards import shard_router, Shard
+        
+        print("\n" + "="*80)
+        print("🌏 ENDPOINT: GET /api/heroes/:id?region=na - Region Shard")
+        print("="*80)
+        
+        na = Shard('na', {}, 2)
+        na_connection = MagicMock()
+        na_connection.cursor.return_value.fetchone.return_value = {'idHEROES': 1, 'hero_name': 'Alucard (NA)'}
+        shard_router.shards = {'na': na}
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(na.pool, 'acquire', return_value=na_connection):
+                mock_mysql.connection.cursor.return_value.fetchone.return_value = {'idHEROES': 1, 'hero_name': 'Alucard'}
+                
+                default = client.get('/api/heroes/1', headers=headers_with_token)
+                by_param = client.get('/api/heroes/1?region=na', headers=headers_with_token)
+                by_claim = client.get('/api/heroes/1', headers={
+                    'Authorization': f"Bearer {create_token('admin', region='na')}"
+                })
+                unknown = client.get('/api/heroes/1?region=mars', headers=headers_with_token)
+        finally:
+            shard_router.shards = {}
+        
+        print(f"\n✅ DEFAULT: {default.get_json()}")
+        print(f"✅ ?region=na: {by_param.get_json()}")
+        print(f"❌ ?region=mars: {unknown.status_code} {unknown.get_json()}")
+        assert default.get_json()['hero']['hero_name'] == 'Alucard'
+        assert by_param.get_json()['hero']['hero_name'] == 'Alucard (NA)'
+        assert by_claim.get_json()['hero']['hero_name'] == 'Alucard (NA)'
+        assert unknown.status_code == 400
+    
+    def test_02_compare_hero_across_regions(self, client, headers_with_token, mock_mysql):
+        """GET - Fan-out reads every region in parallel and merges the rows"""
+        from unittest.mock import MagicMock, patch
+        from shards import shard_router, Shard
+        
+        print("\n" + "="*80)
+        print("🌏 ENDPOINT: GET /api/regions/heroes/:id - Cross-Region Comparison")
+        print("="*80)
+        
+        na = Shard('na', {}, 2)
+        na_connection = MagicMock()
+        na_connection.cursor.return_value.fetchone.return_value = self._stats_row(2650)
+        shard_router.shards = {'na': na}
+        try:
+            with patch('repositories.mysql', mock_mysql), patch.object(na.pool, 'acquire', return_value=na_connection):
+                mock_mysql.connection.cursor.return_value.fetchone.return_value = self._stats_row(2800)
+                response = client.get('/api/regions/heroes/1', headers=headers_with_token)
+        finally:
+            shard_router.shards = {}
+        
+        response_data = response.get_json()
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(response_data, indent=2)}")
+        assert response.status_code == 200
+        assert response_data['hero']['regions']['sea']['hp'] == 2800
+        assert response_data['hero']['regions']['na']['hp'] == 2650
+        assert response_data['hero']['differences'] == {'hp': {'min': 2650, 'max': 2800}}
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+class TestVisualSearch:
+    """Visual tests for ranked, typo-tolerant hero search"""
+    
+    def _record(self, hero_id, name, origin, difficulty='Medium'):
+        return {'idHEROES': hero_id, 'hero_name': name, 'origin': origin, 'difficulty': difficulty}
+    
+    def test_01_typos_ranked_and_paginated(self, client, headers_with_token, mock_mysql):
+        """GET - "Chu" finds Chou first; limit/offset page through the ranking"""
+        from unittest.mock import patch
+        from search_index import search_index
+        
+        print("\n" + "="*80)
+        print("🔍 ENDPOINT: GET /api/heroes/search?q=Chu - Typo Tolerant")
+        print("="*80)
+        
+        search_index.built = False
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [
+                    self._record(1, 'Chou', 'Cadia Riverlands'),
+                    self._record(2, "Chang'e", 'Cadia Riverlands'),
+                    self._record(3, 'Alucard', 'Moniyan Empire', 'Hard')
+                ]
+                
+                typo = client.get('/api/heroes/search?q=Chu', headers=headers_with_token).get_json()
+                second_page = client.get('/api/heroes/search?q=cadia&limit=1&offset=1', headers=headers_with_token).get_json()
+                bad_limit = client.get('/api/heroes/search?q=cadia&limit=0', headers=headers_with_token)
+                
+                # The build reads the catalog version and rows; later searches come from memory
+                assert mock_cursor.execute.call_count == 2
+        finally:
+            search_index.built = False
+        
+        print(f"\n✅ RESPONSE:\n{json.dumps(typo, indent=2)}")
+        assert [hero['hero_name'] for hero in typo['heroes']] == ['Chou', "Chang'e"]
+        assert typo['heroes'][0]['score'] > typo['heroes'][1]['score']
+        assert second_page['total'] == 2
+        assert [hero['hero_name'] for hero in second_page['heroes']] == ['Chou']
+        assert bad_limit.status_code == 400
+    
+    def test_02_index_follows_hero_writes(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """PUT - A renamed hero is found by its new name"""
+        from unittest.mock import patch
+        from search_index import search_index
+        
+        print("\n" + "="*80)
+        print("🔍 PUT /api/heroes/:id - Search Index Kept Fresh")
+        print("="*80)
+        
+        search_index.build([])
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = self._record(7, 'Test Hero', 'Test Origin', 'Hard')
+                
+                client.put('/api/heroes/7', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                found = client.get('/api/heroes/search?q=tset', headers=headers_with_token).get_json()
+        finally:
+            search_index.built = False
+        
+        print(f"\n✅ RESPONSE:\n{json.dumps(found, indent=2)}")
+        assert [hero['idHEROES'] for hero in found['heroes']] == [7]
+    
+    def test_03_one_reread_updates_every_index(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """PUT - A hero write re-reads the hero once and applies it to every built index"""
+        from unittest.mock import patch
+        from hero_index import hero_index
+        from search_index import search_index
+        from similarity import similarity_index
+        from autocomplete import completions
+        from models import HeroRecord
+        
+        print("\n" + "="*80)
+        print("🔍 PUT /api/heroes/:id - One Re-read for All Indexes")
+        print("="*80)
+        
+        other = dict(self._record(8, 'Other Hero', 'Other Origin'), role_id=1, role_name='Fighter', hp=2600)
+        indexes = (hero_index, search_index, similarity_index, completions)
+        for index in indexes:
+            index.build([HeroRecord.from_row(other)])
+        
+        record = dict(self._record(7, 'Test Hero', 'Test Origin', 'Hard'), role_id=1, role_name='Fighter', hp=2500)
+        rereads = []
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.execute.side_effect = lambda query, params=None: rereads.append(query) if getattr(query, 'name', None) == 'heroes.get_record' else None
+                mock_cursor.fetchone.return_value = record
+                
+                client.put('/api/heroes/7', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                roles = [hero['idHEROES'] for hero in hero_index.heroes(role_ids=[1])]
+                total, matches = search_index.search('test hero')
+                similar = similarity_index.query(7)
+                completed = completions.complete('test')
+        finally:
+            for index in indexes:
+                index.built = False
+        
+        print(f"\n✅ RE-READS: {len(rereads)}")
+        assert len(rereads) == 1
+        assert sorted(roles) == [7, 8]
+        assert total == 1
+        assert [hero['idHEROES'] for hero in similar] == [8]
+        assert [value['text'] for value in completed] == ['Test Hero', 'Test Origin']
+    
+    def test_04_substrings_and_other_process_writes(self, client, headers_with_token, mock_mysql):
+        """GET - Substrings of names and difficulties match; the warm-up job picks up other workers' renames"""
+        from unittest.mock import patch
+        from search_index import search_index
+        from jobs import warm_search_index
+        
+        print("\n" + "="*80)
+        print("🔍 ENDPOINT: GET /api/heroes/search - Substrings and Rebuilds")
+        print("="*80)
+        
+        def names(query):
+            found = client.get(f'/api/heroes/search?q={query}', headers=headers_with_token).get_json()
+            return [hero['hero_name'] for hero in found['heroes']]
+        
+        search_index.built = False
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [
+                    self._record(1, 'Alucard', 'Moniyan Empire', 'Hard'),
+                    self._record(2, 'Chou', 'Cadia Riverlands'),
+                    self._record(3, 'Layla', 'Moniyan Empire', 'Easy')
+                ]
+                inner = names('uc')
+                difficulty = names('edi')
+                
+                # Another worker renames Chou; this process gets no signal
+                mock_cursor.fetchall.return_value = [
+                    self._record(1, 'Alucard', 'Moniyan Empire', 'Hard'),
+                    self._record(2, 'Chou Prime', 'Cadia Riverlands'),
+                    self._record(3, 'Layla', 'Moniyan Empire', 'Easy')
+                ]
+                warm_search_index()
+                renamed = names('prime')
+        finally:
+            search_index.built = False
+        
+        print(f"\n✅ 'uc': {inner}  'edi': {difficulty}  'prime': {renamed}")
+        assert inner == ['Alucard']
+        assert difficulty == ['Chou']
+        assert renamed == ['Chou Prime']
+
+
+class TestVisualAutocomplete:
+    """Visual tests for hero name and origin autocomplete"""
+    
+    def _record(self, hero_id, name, origin):
+        return {'idHEROES': hero_id, 'hero_name': name, 'origin': origin, 'difficulty': 'Medium'}
+    
+    def test_01_prefix_completions(self, client, headers_with_token, mock_mysql):
+        """GET - Names complete before origins, from any word start, with long-lived caching"""
+        from unittest.mock import patch
+        from autocomplete import completions
+        
+        print("\n" + "="*80)
+        print("⌨️  ENDPOINT: GET /api/heroes/autocomplete?prefix=c")
+        print("="*80)
+        
+        completions.built = False
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchall.return_value = [
+                    self._record(1, 'Chou', 'Cadia Riverlands'),
+                    self._record(2, "Chang'e", 'Cadia Riverlands'),
+                    self._record(3, 'Alucard', 'Moniyan Empire')
+                ]
+                
+                response = client.get('/api/heroes/autocomplete?prefix=c', headers=headers_with_token)
+                word_start = client.get('/api/heroes/autocomplete?prefix=RIV', headers=headers_with_token).get_json()
+                limited = client.get('/api/heroes/autocomplete?prefix=c&limit=1', headers=headers_with_token).get_json()
+                bad_limit = client.get('/api/heroes/autocomplete?prefix=c&limit=50', headers=headers_with_token)
+                
+                # The build reads the catalog version and rows; completions come from memory after it
+                assert mock_cursor.execute.call_count == 2
+        finally:
+            completions.built = False
+        
+        data = response.get_json()
+        print(f"\n✅ RESPONSE:\n{json.dumps(data, indent=2)}")
+        assert [item['text'] for item in data['completions']] == ["Chang'e", 'Chou', 'Cadia Riverlands']
+        assert data['completions'][0] == {'text': "Chang'e", 'type': 'hero', 'idHEROES': 2}
+        assert 'max-age=600' in response.headers['Cache-Control']
+        assert word_start['completions'] == [{'text': 'Cadia Riverlands', 'type': 'origin'}]
+        assert limited['count'] == 1
+        assert bad_limit.status_code == 400
+    
+    def test_02_completions_follow_hero_writes(self, client, headers_with_token, sample_hero_data, mock_mysql):
+        """PUT/DELETE - A renamed hero completes by its new name; a deleted one disappears"""
+        from unittest.mock import patch
+        from autocomplete import completions
+        
+        print("\n" + "="*80)
+        print("⌨️  PUT/DELETE /api/heroes/:id - Completions Kept Fresh")
+        print("="*80)
+        
+        completions.build([])
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = self._record(7, 'Test Hero', 'Test Origin')
+                
+                client.put('/api/heroes/7', data=json.dumps(sample_hero_data), headers=headers_with_token)
+                renamed = client.get('/api/heroes/autocomplete?prefix=test+h', headers=headers_with_token).get_json()
+                
+                client.delete('/api/heroes/7', headers=headers_with_token)
+                deleted = client.get('/api/heroes/autocomplete?prefix=test', headers=headers_with_token).get_json()
+        finally:
+            completions.built = False
+        
+        print(f"\n✅ RESPONSE:\n{json.dumps(renamed, indent=2)}")
+        assert renamed['completions'] == [{'text': 'Test Hero', 'type': 'hero', 'idHEROES': 7}]
+        assert deleted['completions'] == []
+    
+    def test_03_other_process_writes(self, client, headers_with_token, mock_mysql):
+        """GET - Heroes created or deleted by another worker appear and disappear"""
+        from unittest.mock import patch
+        import autocomplete
+        from autocomplete import completions
+        from jobs import warm_autocomplete
+        
+        print("\n" + "="*80)
+        print("⌨️  ENDPOINT: GET /api/heroes/autocomplete - Writes From Another Process")
+        print("="*80)
+        
+        def texts(prefix):
+            found = client.get(f'/api/heroes/autocomplete?prefix={prefix}', headers=headers_with_token).get_json()
+            return [value['text'] for value in found['completions']]
+        
+        completions.built = False
+        client.application.config.update(LIVE_INDEX_CHECK_SECONDS=15)
+        try:
+            with patch('repositories.mysql', mock_mysql):
+                mock_cursor = mock_mysql.connection.cursor.return_value
+                mock_cursor.fetchone.return_value = {'hero_count': 1, 'checksum': 111}
+                mock_cursor.fetchall.return_value = [self._record(1, 'Chou', 'Cadia Riverlands')]
+                before = texts('ch')
+                
+                # Another worker creates Chang'e; the version check picks it up
+                mock_cursor.fetchone.return_value = {'hero_count': 2, 'checksum': 222}
+                mock_cursor.fetchall.return_value = [
+                    self._record(1, 'Chou', 'Cadia Riverlands'),
+                    self._record(2, "Chang'e", 'Cadia Riverlands')
+                ]
+                autocomplete._live._regions.default.checked_at -= 15
+                created = texts('ch')
+                
+                # ...then deletes Chou; the warm-up job rebuilds whatever the version says
+                mock_cursor.fetchall.return_value = [self._record(2, "Chang'e", 'Cadia Riverlands')]
+                warm_autocomplete()
+                deleted = texts('ch')
+        finally:
+            client.application.config.update(LIVE_INDEX_CHECK_SECONDS=0)
+            completions.built = False
+        
+        print(f"\n✅ BEFORE: {before}  CREATED: {created}  DELETED: {deleted}")
+        assert before == ['Chou']
+        assert created == ["Chang'e", 'Chou']
+        assert deleted == ["Chang'e"]
+
+# ============================================================================
+# BOOTSTRAP
+# ============================================================================
+
+class TestVisualBootstrap:
+    """Visual tests for the combined launch endpoint"""
+    
+    ROWS = {
+        'FROM roles': [{'idROLES': 1, 'role_name': 'Tank'}],
+        'FROM specialty': [{'idSPECIALTY': 1, 'specialty_name': 'Burst'}],
+        'FROM heroes': [{'idHEROES': 1, 'hero_name': 'Alucard', 'role_name': 'Fighter'}]
+    }
+    
+    def _cursor_factory(self, threads):
+        """Cursors answering each query with its table's rows, noting the thread that ran it"""
+        from unittest.mock import MagicMock
+        import threading
+        
+        def make_cursor(*args):
+            cursor = MagicMock()
+            
+            def execute(query, params=None):
+                threads.add(threading.current_thread().name)
+                cursor.fetchall.return_value = next(rows for table, rows in self.ROWS.items() if table in query)
+            
+            cursor.execute.side_effect = execute
+            return cursor
+        
+        return make_cursor
+    
+    def test_01_parallel_fetch(self, client, headers_with_token, mock_mysql):
+        """GET - Heroes, roles and specialties queried on worker threads, in one response"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🚀 ENDPOINT: GET /api/bootstrap")
+        print("="*80)
+        
+        threads = set()
+        with patch('repositories.mysql', mock_mysql):
+            mock_mysql.connection.cursor.side_effect = self._cursor_factory(threads)
+            response = client.get('/api/bootstrap', headers=headers_with_token)
+        
+        data = response.get_json()
+        print(f"\n✅ STATUS: {response.status_code}")
+        print(f"📥 RESPONSE:\n{json.dumps(data, indent=2)}")
+        print(f"🏷️  ETag: {response.headers.get('ETag')}")
+        assert response.status_code == 200
+        assert data['heroes'][0]['hero_name'] == 'Alucard'
+        assert [role['role_name'] for role in data['roles']] == ['Tank']
+        assert [specialty['specialty_name'] for specialty in data['specialties']] == ['Burst']
+        assert data['counts'] == {'heroes': 1, 'roles': 1, 'specialties': 1}
+        assert threads and all(name.startswith('shard-fanout') for name in threads)
+        assert response.headers['ETag'].startswith('W/"')
+    
+    def test_02_etag_revalidation(self, client, headers_with_token, mock_mysql):
+        """GET - A matching If-None-Match gets 304; changed data gets a new ETag"""
+        from unittest.mock import patch
+        
+        print("\n" + "="*80)
+        print("🚀 ENDPOINT: GET /api/bootstrap - If-None-Match")
+        print("="*80)
+        
+        with patch('repositories.mysql', mock_mysql):
+            mock_mysql.connection.cursor.side_effect = self._cursor_factory(set())
+            etag = client.get('/api/bootstrap', headers=headers_with_token).headers['ETag']
+            
+            not_modified = client.get('/api/bootstrap', headers={**headers_with_token, 'If-None-Match': etag})
+            
+            with patch.dict(self.ROWS, {'FROM roles': [{'idROLES': 1, 'role_name': 'Tank'}, {'idROLES': 2, 'role_name': 'Mage'}]}):
+                changed = client.get('/api/bootstrap', headers={**headers_with_token, 'If-None-Match': etag})
+        
+        print(f"\n✅ SAME DATA: {not_modified.status_code}")
+        print(f"✅ CHANGED DATA: {changed.status_code} {changed.headers['ETag']}")
+        assert not_modified.status_code == 304
+        assert not_modified.get_data() == b''
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert changed.get_json()['counts']['roles'] == 2
 
 # ============================================================================
 # ERROR RESPONSES
@@ -483,7 +2687,7 @@ class TestVisualErrorResponses:
         print(f"  GET /api/heroes/999")
         print(f"  Header: Authorization: Bearer <token>")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             mock_cursor = mock_mysql.connection.cursor.return_value
             mock_cursor.fetchone.return_value = None
             
@@ -510,7 +2714,7 @@ class TestVisualErrorResponses:
         print(f"  Body:\n{json.dumps(invalid_data, indent=2)}")
         print(f"  ⚠️  Missing required field: hero_name")
         
-        with patch('routes.heroes.mysql', mock_mysql):
+        with patch('repositories.mysql', mock_mysql):
             response = client.post(
                 '/api/heroes',
                 data=json.dumps(invalid_data),
@@ -548,6 +2752,7 @@ class TestVisualStatusCodesSummary:
 
 ⚠️  SERVER ERROR CODES:
   • 500 Server Error     → Database or server error
+  • 503 Unavailable      → Database down or saturated (see Retry-After)
 
 📌 COMMON PATTERNS:
   • GET    → 200 (success) or 404 (not found)
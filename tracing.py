@@ -0,0 +1,303 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from flask import request, g, has_request_context
+
+# W3C Trace Context: version-traceid-parentid-flags
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_ERROR = 2
+
+def _attributes(attributes):
+    """Converts a dict to OTLP key/value attributes"""
+    converted = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        converted.append({'key': key, 'value': typed})
+    return converted
+
+class Span:
+    """One timed phase of a request"""
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace_id, parent_id, name, kind=KIND_INTERNAL, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.end_ns = time.time_ns()
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or time.time_ns()),
+            'attributes': _attributes(self.attributes)
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error is not None:
+            span['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return span
+
+class Trace:
+    """The spans recorded for one sampled request"""
+
+    def __init__(self, trace_id, parent_id):
+        self.trace_id = trace_id
+        self.spans = []
+        self.stack = []
+        self.root = self.start('', KIND_SERVER, parent_id)
+
+    def start(self, name, kind=KIND_INTERNAL, parent_id=None, attributes=None):
+        parent_id = self.stack[-1].span_id if self.stack else parent_id
+        span = Span(self.trace_id, parent_id, name, kind, attributes)
+        self.spans.append(span)
+        self.stack.append(span)
+        return span
+
+    def finish(self, span):
+        span.end()
+        if self.stack and self.stack[-1] is span:
+            self.stack.pop()
+
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.root.span_id}-01'
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """
+    Times a block as a child of the current span.
+
+    Outside a sampled request this yields None and costs one lookup, so
+    instrumentation can stay in hot paths.
+
+    Usage:
+        with span('db.query', kind=KIND_CLIENT, statement=query) as s:
+            ...
+            if s: s.set('db.rows', len(rows))
+    """
+    trace = g.get('trace') if has_request_context() else None
+    if trace is None:
+        yield None
+        return
+
+    current = trace.start(name, kind, attributes=attributes)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        trace.finish(current)
+
+# ==================== EXPORTERS ====================
+
+class SpanExporter:
+    """
+    Batches finished spans on a background thread and writes them as
+    OTLP/JSON (ExportTraceServiceRequest).
+
+    Requests only enqueue their spans; when the queue is full new spans
+    are dropped rather than slowing requests down.
+    """
+
+    def __init__(self, service_name, queue_size=2048, interval=5.0, batch_size=512):
+        self.service_name = service_name
+        self.interval = interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        for finished in spans:
+            try:
+                self._queue.put_nowait(finished)
+            except queue.Full:
+                self.dropped += 1
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='trace-exporter', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Writes every queued span now"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self.write(self.payload(batch))
+            except Exception:
+                # Tracing must never take the API down
+                self.dropped += len(batch)
+
+    def payload(self, spans):
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _attributes({'service.name': self.service_name})},
+                'scopeSpans': [{
+                    'scope': {'name': 'mlbb-api.tracing'},
+                    'spans': [finished.to_otlp() for finished in spans]
+                }]
+            }]
+        }
+
+    def write(self, payload):
+        raise NotImplementedError
+
+class FileSpanExporter(SpanExporter):
+    """Appends one OTLP/JSON request per line (readable by the collector's otlpjsonfile receiver)"""
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+
+    def write(self, payload):
+        line = json.dumps(payload, separators=(',', ':'))
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+class OTLPHTTPSpanExporter(SpanExporter):
+    """POSTs OTLP/JSON to a collector, e.g. http://localhost:4318/v1/traces"""
+
+    def __init__(self, endpoint, *args, timeout=2.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def write(self, payload):
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        req = urllib.request.Request(self.endpoint, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+# ==================== TRACER ====================
+
+class Tracer:
+    """
+    Samples requests and records a span tree for each sampled one.
+
+    A request continues the trace of an incoming `traceparent` header and
+    keeps its sampling decision (TRACE_RESPECT_PARENT); otherwise it is
+    sampled with probability TRACE_SAMPLE_RATE. Sampled responses carry
+    the request's own `traceparent` so clients can find their trace.
+    Unsampled requests record nothing.
+    """
+
+    def __init__(self):
+        self.exporter = None
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        options = {
+            'service_name': config.get('TRACE_SERVICE_NAME', 'mlbb-api'),
+            'queue_size': config.get('TRACE_QUEUE_SIZE', 2048),
+            'interval': config.get('TRACE_EXPORT_INTERVAL_SECONDS', 5.0)
+        }
+        if config.get('TRACE_EXPORTER') == 'otlp':
+            self.exporter = OTLPHTTPSpanExporter(config['TRACE_OTLP_ENDPOINT'], **options)
+        else:
+            self.exporter = FileSpanExporter(config.get('TRACE_FILE_PATH', 'traces.jsonl'), **options)
+
+        app.before_request(self._start)
+        app.after_request(self._annotate)
+        app.teardown_request(self._finish)
+
+    def _sampled(self, parent):
+        config = self.app.config
+        if parent is not None and config.get('TRACE_RESPECT_PARENT', True):
+            return parent.group(3) == '01'
+        return random.random() < config.get('TRACE_SAMPLE_RATE', 0.0)
+
+    def _start(self):
+        if not self.app.config.get('TRACING_ENABLED'):
+            return
+
+        parent = TRACEPARENT.match(request.headers.get('traceparent', ''))
+        if not self._sampled(parent):
+            return
+
+        if parent is not None:
+            trace = Trace(parent.group(1), parent.group(2))
+        else:
+            trace = Trace(os.urandom(16).hex(), None)
+        trace.root.name = f'{request.method} {request.path}'
+        trace.root.attributes.update({'http.method': request.method, 'url.path': request.path})
+        g.trace = trace
+
+    def _annotate(self, response):
+        trace = g.get('trace')
+        if trace is not None:
+            root = trace.root
+            if request.url_rule is not None:
+                root.name = f'{request.method} {request.url_rule.rule}'
+                root.set('http.route', request.url_rule.rule)
+            root.set('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                root.error = f'HTTP {response.status_code}'
+            response.headers['traceparent'] = trace.traceparent()
+        return response
+
+    def _finish(self, exc=None):
+        trace = g.pop('trace', None)
+        if trace is None:
+            return
+        if exc is not None:
+            trace.root.error = f'{type(exc).__name__}: {exc}'
+        for open_span in reversed(trace.stack):
+            open_span.end()
+        self.exporter.export(trace.spans)
+
+tracer = Tracer()
@@ -1,5 +1,22 @@
 from flask import request, jsonify, make_response
+from flask.json.provider import DefaultJSONProvider
 from dicttoxml import dicttoxml
+from models import Model, to_plain
+from tracing import span
+
+class ModelJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes row models.
+
+    The stdlib's C encoder writes everything else; it calls default()
+    only for the models, which become dicts with to_dict().
+    """
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, Model):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 def format_response(data, status_code=200):
     """
@@ -15,9 +32,12 @@ def format_response(data, status_code=200):
     output_format = request.args.get('format', 'json').lower()
     
     if output_format == 'xml':
-        xml_data = dicttoxml(data, custom_root='response', attr_type=False)
+        with span('serialize.xml'):
+            xml_data = dicttoxml(to_plain(data), custom_root='response', attr_type=False)
         response = make_response(xml_data)
         response.headers['Content-Type'] = 'application/xml'
         return response, status_code
     else:
-        return jsonify(data), status_code
\ No newline at end of file
+        with span('serialize.json'):
+            response = jsonify(data)
+        return response, status_code
\ No newline at end of file